@@ -1,4 +1,7 @@
 ﻿# -*- coding: utf-8 -*-
+import time
+_T0 = time.perf_counter()
+
 import sys
 import os
 from PySide6.QtWidgets import QApplication
@@ -22,6 +25,11 @@ def main():
     win = MainWindow()
     win.show()
 
+    # --startup-report：主窗口首次绘制后打印耗时与内存并退出（python -m benchmarks.startup --app）
+    if "--startup-report" in sys.argv:
+        from benchmarks.startup import install_first_paint_report
+        install_first_paint_report(app, win, _T0)
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+﻿# benchmarks package
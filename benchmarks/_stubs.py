@@ -0,0 +1,45 @@
+# benchmarks/_stubs.py
+"""
+基准测试用的输入模块替身
+
+- pydirectinput / keyboard 总是替换为空实现：基准会跑完整的战斗循环，不能向系统发送真实按键
+  （pydirectinput 的替身保留默认 100ms 的 PAUSE 休眠，与真实模块一致）
+- pyautogui / winsound 仅在无法导入时（如无显示的 Linux）替换
+须在导入 core.engine.engine 之前调用 install()
+"""
+import sys
+import time
+import types
+
+_ALWAYS = ("pydirectinput", "keyboard")
+_IF_MISSING = ("pyautogui", "winsound")
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+def _pausing(*args, _pause=True, **kwargs):
+    """与 pydirectinput 相同：未传 _pause=False 时按 PAUSE 休眠，派发线程漏传时基准会显出来"""
+    if _pause:
+        time.sleep(sys.modules["pydirectinput"].PAUSE)
+
+
+def _module(name, **attrs):
+    m = types.ModuleType(name)
+    m.__dict__.update(attrs)
+    return m
+
+
+def install():
+    sys.modules["pydirectinput"] = _module(
+        "pydirectinput", PAUSE=0.1, press=_pausing, keyDown=_pausing, keyUp=_pausing,
+    )
+    sys.modules["keyboard"] = _module(
+        "keyboard", is_pressed=lambda key: False, wait=_noop, add_hotkey=_noop, remove_hotkey=_noop, unhook_all=_noop,
+    )
+    for name in _IF_MISSING:
+        try:
+            __import__(name)
+        except Exception:
+            sys.modules[name] = _module(name, position=lambda: (0, 0), size=lambda: (2560, 1440), Beep=_noop)
@@ -0,0 +1,81 @@
+# benchmarks/bench_buffs.py
+"""
+Buff 检测基准：30 个模版、含 10 个激活 buff 的 buff 栏，报告每个 tick 的检测耗时与检测结果是否正确
+
+用法:
+    python -m benchmarks.bench_buffs [--templates 30] [--active 10] [--seconds 1]
+
+- 模版为合成的 32x32 图标（8x8 色块放大），保存为临时 PNG 后经 BuffDetector.from_dir 加载
+- buff 栏宽 800 像素，图标间距 34 像素，背景为暗色噪声
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from core.engine.buffs import BuffDetector
+from core.engine.capture import RegionFrame
+
+ICON = 32
+STRIDE = 34
+BAR = (600, 1300, 1400, 1300 + ICON)
+
+
+def _icons(n, rng):
+    blocks = rng.integers(0, 256, (n, 8, 8, 3), dtype=np.uint8)
+    return blocks.repeat(ICON // 8, axis=1).repeat(ICON // 8, axis=2)
+
+
+def _scene(icons, active, rng):
+    screen = rng.integers(0, 24, (1440, 2560, 3), dtype=np.uint8)
+    x0, y0 = BAR[0], BAR[1]
+    for slot, t in enumerate(active):
+        x = x0 + 2 + slot * STRIDE
+        screen[y0:y0 + ICON, x:x + ICON] = icons[t]
+    return screen
+
+
+def run(n_templates=30, n_active=10, seconds=1.0):
+    rng = np.random.default_rng(0)
+    icons = _icons(n_templates, rng)
+    active = sorted(rng.choice(n_templates, n_active, replace=False).tolist())
+    screen = _scene(icons, active, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, icon in enumerate(icons):
+            Image.fromarray(icon).save(os.path.join(tmp, f"buff{i:02d}.png"))
+        t0 = time.perf_counter()
+        det = BuffDetector.from_dir({"x0": BAR[0], "y0": BAR[1], "x1": BAR[2], "y1": BAR[3]}, tmp)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+
+    frame = RegionFrame([BAR], [screen[BAR[1]:BAR[3], BAR[0]:BAR[2]]])
+    found = det.read(frame)
+    expected = {f"buff{i:02d}" for i in active}
+
+    det.read(frame)
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        det.read(frame)
+        n += 1
+    per_tick = (time.perf_counter() - t0) / n * 1e6
+    return {
+        f"buffs.{n_templates}.detect_us": per_tick,
+        f"buffs.{n_templates}.load_ms": load_ms,
+        f"buffs.{n_templates}.correct": float(found == expected),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--templates", type=int, default=30)
+    ap.add_argument("--active", type=int, default=10)
+    ap.add_argument("--seconds", type=float, default=1.0)
+    args = ap.parse_args()
+    for k, v in run(args.templates, args.active, args.seconds).items():
+        print(f"{k:32s} {v:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
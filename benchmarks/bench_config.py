@@ -0,0 +1,87 @@
+# benchmarks/bench_config.py
+"""
+配置读写基准：save_config / load_config 在大量模版下的往返耗时
+
+- config.*：模版保存在 config.json 中
+- store.*：模版保存在 SQLite 模版库中（core/profile_store.py），load_ms 为读出索引并激活一个模版，
+  save_ms 为修改一个模版后保存
+
+用法:
+    python -m benchmarks.bench_config [--profiles 10 100 1000] [--skills 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from core.models.skill import SkillAction
+from core.config import load_config, save_config
+from core.profile_store import open_store
+
+PROFILES = (10, 100, 1000)
+
+
+def synthetic_profiles(n_profiles: int, n_skills: int):
+    return {
+        f"Profile {p:04d}": [
+            SkillAction(f"skill {i}", str(i % 10), 300, 300 + i * 43, 600, (200, 180, 40),
+                        283 + i * 43, 583, (90, 90, 90), cooldown=8000 + i)
+            for i in range(n_skills)
+        ]
+        for p in range(n_profiles)
+    }
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def run(profile_counts=PROFILES, n_skills=20, repeat=5):
+    gc = {str(i): {"cx": 300 + i * 43, "cy": 600, "p11x": 283 + i * 43, "p11y": 583} for i in range(10)}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        for n in profile_counts:
+            profiles = synthetic_profiles(n, n_skills)
+            results[f"config.{n}.save_ms"] = _best(lambda: save_config(path, gc, profiles), repeat)
+            results[f"config.{n}.load_ms"] = _best(lambda: load_config(path), repeat)
+            results[f"config.{n}.size_kb"] = os.path.getsize(path) / 1024.0
+
+            store_cfg = os.path.join(tmp, f"store{n}.json")
+            settings = {"store": {"profiles": f"profiles{n}.db"}}
+            save_config(store_cfg, gc, profiles, settings)
+            first = next(iter(profiles))
+
+            def load_one():
+                _, lazy = load_config(store_cfg)
+                return lazy[first]
+
+            results[f"store.{n}.load_ms"] = _best(load_one, repeat)
+            _, lazy = load_config(store_cfg)
+
+            def save_one():
+                lazy[first][0].delay += 1
+                save_config(store_cfg, gc, lazy, settings)
+
+            results[f"store.{n}.save_ms"] = _best(save_one, repeat)
+            open_store(os.path.join(tmp, f"profiles{n}.db")).close()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles", type=int, nargs="+", default=list(PROFILES))
+    ap.add_argument("--skills", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    for k, v in run(args.profiles, args.skills, args.repeat).items():
+        print(f"{k:32s} {v:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
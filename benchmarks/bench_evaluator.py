@@ -0,0 +1,93 @@
+# benchmarks/bench_evaluator.py
+"""
+评估器基准：合成技能栏与合成帧上，逐技能评估（evaluate_skill_on）与批量评估（BatchEvaluator）的吞吐
+
+用法:
+    python -m benchmarks.bench_evaluator [--sizes 10 100 1000] [--seconds 0.5]
+
+- 技能按网格排布在 2560x1440 画面内，约一半技能的参考颜色与画面一致（READY），其余为冷却
+- 帧只包含 compute_capture_regions 算出的抓取区域，与战斗循环实际使用的帧一致
+- patch 行为 k=7 的区域均值采样
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.models.skill import SkillAction
+from core.engine.capture import RegionFrame, collect_sample_points, compute_capture_regions
+from core.engine.evaluator import BatchEvaluator, evaluate_skill_on, sample_patch
+
+SCREEN = (2560, 1440)
+SIZES = (10, 100, 1000)
+
+
+def synthetic_screen(seed=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (SCREEN[1], SCREEN[0], 3), dtype=np.uint8)
+
+
+def synthetic_skills(n: int, screen: np.ndarray, patch: int = 1):
+    """n 个技能排成网格，偶数号技能的参考颜色取自画面（READY），奇数号取反色（冷却）"""
+    cols = 40
+    skills = []
+    for i in range(n):
+        cx = 40 + (i % cols) * 60
+        cy = 40 + (i // cols) * 50
+        p11x, p11y = cx - 17, cy - 17
+        skill = SkillAction(f"s{i}", str(i % 10), 0, cx, cy, None, p11x, p11y, None, patch=patch)
+        skills.append(skill)
+    full = RegionFrame([(0, 0, SCREEN[0], SCREEN[1])], [screen])
+    for i, s in enumerate(skills):
+        cr, pr = sample_patch(full, s.cx, s.cy, patch), sample_patch(full, s.p11x, s.p11y, patch)
+        if i % 2:
+            cr = tuple(255 - v for v in cr)
+        s.cr, s.p11r = tuple(cr), tuple(pr)
+    return skills
+
+
+def frame_for(skills, screen: np.ndarray) -> RegionFrame:
+    regions = compute_capture_regions(collect_sample_points(skills))
+    return RegionFrame(regions, [screen[t:b, l:r] for l, t, r, b in regions], time.monotonic())
+
+
+def _rate(fn, seconds: float) -> float:
+    """重复调用 fn 至少 seconds 秒，返回每次调用的微秒数"""
+    fn()
+    n, t0 = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= seconds:
+            return elapsed / n * 1e6
+
+
+def run(sizes=SIZES, seconds=0.5):
+    screen = synthetic_screen()
+    results = {}
+    for n in sizes:
+        for patch in (1, 7):
+            skills = synthetic_skills(n, screen, patch)
+            frame = frame_for(skills, screen)
+            batch = BatchEvaluator(skills)
+            tag = f"{n}" if patch == 1 else f"{n}.patch{patch}"
+            results[f"evaluator.batch.{tag}.eval_us"] = _rate(lambda: batch.evaluate(frame), seconds)
+            if patch == 1:
+                results[f"evaluator.scalar.{tag}.eval_us"] = _rate(
+                    lambda: [evaluate_skill_on(frame, s) for s in skills], seconds)
+        results[f"evaluator.batch.{n}.skills_per_sec"] = n / results[f"evaluator.batch.{n}.eval_us"] * 1e6
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    ap.add_argument("--seconds", type=float, default=0.5)
+    args = ap.parse_args()
+    for k, v in run(args.sizes, args.seconds).items():
+        print(f"{k:40s} {v:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_tick.py
+"""
+战斗循环基准：以 replay 后端回放合成截图，运行真实的 Engine（抓屏线程 + 战斗循环 + 按键派发线程），
+由 Engine.stats() 报告整个 tick 与各阶段的耗时分位数
+
+用法:
+    python -m benchmarks.bench_tick [--skills 21] [--seconds 3]
+
+- pydirectinput / keyboard 使用空实现（benchmarks._stubs），不会发送真实按键
+- 抓屏不限帧率（max_fps=0），相邻帧内容不同，画面变化检测不会跳过评估
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import _stubs
+
+_stubs.install()
+
+from PIL import Image  # noqa: E402
+
+from benchmarks.bench_evaluator import synthetic_screen, synthetic_skills  # noqa: E402
+from core.config import save_config  # noqa: E402
+from core.engine.engine import Engine  # noqa: E402
+
+
+def _write_fixture(directory, n_skills, frames=4):
+    screens = [synthetic_screen(seed) for seed in range(frames)]
+    shots = os.path.join(directory, "shots")
+    os.makedirs(shots)
+    for i, screen in enumerate(screens):
+        Image.fromarray(screen).save(os.path.join(shots, f"frame_{i:03d}.png"))
+    skills = synthetic_skills(n_skills, screens[0])
+    settings = {
+        "capture": {"backend": "replay", "replay_path": shots, "slots": 3, "max_fps": 0},
+        "stats": {"enabled": True, "overlay": False},
+        "input": {"pause_ms": 0},
+    }
+    path = os.path.join(directory, "config.json")
+    save_config(path, {}, {"bench": skills}, settings)
+    return path
+
+
+def run(n_skills=21, seconds=3.0):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = Engine(_write_fixture(tmp, n_skills))
+        engine.set_profile("bench")
+        engine.start()
+        time.sleep(0.3)
+        engine.set_stats_enabled(True)
+        time.sleep(seconds)
+        stats = engine.stats()
+        engine.stop()
+        engine.frame_source.close()
+
+    results = {f"tick.{n_skills}.ticks_per_sec": stats["ticks_per_sec"]}
+    for stage, h in stats["stages"].items():
+        for q in ("p50", "p99"):
+            results[f"tick.{n_skills}.{stage}.{q}_ms"] = h[q]
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--skills", type=int, default=21)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+    print(json.dumps(run(args.skills, args.seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/run.py
+"""
+运行全部核心基准并保存为 JSON 基线，或比较两次结果
+
+用法:
+    python -m benchmarks.run [--save benchmarks/baselines/mine.json] [--quick]
+    python -m benchmarks.run compare 基线.json 新结果.json [--threshold 10]
+
+- 指标名后缀决定方向：_us / _ms 越小越好，per_sec 越大越好，其余（如 size_kb）仅供参考不比较
+- compare 列出变差超过 threshold%（默认 10%）的指标，存在退化时退出码为 1
+- 基线与机器相关，只应与同一台机器上的结果比较
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import _stubs
+
+_stubs.install()
+
+import numpy as np  # noqa: E402
+
+from benchmarks import bench_buffs, bench_capture, bench_config, bench_evaluator, bench_tick, startup  # noqa: E402
+
+
+def direction(metric: str) -> int:
+    """1：越大越好；-1：越小越好；0：不比较"""
+    if metric.endswith("per_sec"):
+        return 1
+    if metric.endswith("_us") or metric.endswith("_ms"):
+        return -1
+    return 0
+
+
+def run_all(quick: bool = False) -> dict:
+    seconds = 0.2 if quick else 0.5
+    results = {}
+    results.update(bench_evaluator.run(seconds=seconds))
+    results.update(bench_tick.run(seconds=1.0 if quick else 3.0))
+    results.update(bench_buffs.run(seconds=seconds))
+    results.update(bench_config.run((10, 100) if quick else bench_config.PROFILES, repeat=3 if quick else 5))
+    for r in bench_capture.run(iterations=50 if quick else 200):
+        results[f"capture.{r['backend']}.captures_per_sec"] = r["captures_per_sec"]
+    results.update(startup.run(repeat=1 if quick else 3))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.node(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float):
+    """返回 (行列表, 退化数)；变化率为正表示变好"""
+    rows, regressions = [], 0
+    for metric, old in base["results"].items():
+        sign = direction(metric)
+        cur = new["results"].get(metric)
+        if cur is None or not sign or not old:
+            continue
+        change = (cur - old) / old * 100.0 * sign
+        bad = change < -threshold
+        regressions += bad
+        rows.append((metric, old, cur, change, bad))
+    return rows, regressions
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "compare":
+        ap = argparse.ArgumentParser(prog="benchmarks.run compare")
+        ap.add_argument("base")
+        ap.add_argument("new")
+        ap.add_argument("--threshold", type=float, default=10.0, help="允许的退化百分比")
+        args = ap.parse_args(argv[1:])
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        rows, regressions = compare(base, new, args.threshold)
+        for metric, old, cur, change, bad in rows:
+            print(f"{'!!' if bad else '  '} {metric:40s} {old:12.3f} -> {cur:12.3f}  {change:+7.1f}%")
+        print(f"{regressions} regression(s) beyond {args.threshold:.0f}%")
+        return 1 if regressions else 0
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--save", help="结果保存路径（JSON）")
+    ap.add_argument("--quick", action="store_true", help="缩短每项基准的运行时间")
+    args = ap.parse_args(argv)
+
+    report = run_all(args.quick)
+    for metric, value in report["results"].items():
+        print(f"{metric:40s} {value:14.3f}")
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved -> {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# benchmarks/startup.py
+"""
+启动耗时报告
+
+用法:
+    python -m benchmarks.startup [--module core.engine.engine] [--top 20] [--no-stubs]
+    python -m benchmarks.startup --app      # 启动 app.py 直到主窗口首次绘制，报告耗时与常驻内存（需要 PySide6）
+
+- 在子进程中以 python -X importtime 导入 --module，列出累计耗时最长的模块，并按顶层包汇总自身耗时
+- 默认用 benchmarks._stubs 替换 pydirectinput / keyboard（与其他基准一致，可在无显示的 Linux 上运行），
+  --no-stubs 导入真实模块以衡量它们的开销
+- --app 以 app.py --startup-report 启动真实界面：主窗口第一次绘制后打印耗时（自进程启动）与常驻内存并退出
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb() -> float:
+    """当前进程的常驻内存（MB）；Windows 用 psapi，其他平台用 resource 的峰值"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize / 2 ** 20
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def install_first_paint_report(app, window, t0: float):
+    """app.py --startup-report：主窗口第一次绘制后打印耗时与内存并退出"""
+    from PySide6 import QtCore
+
+    class _FirstPaint(QtCore.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Paint:
+                window.removeEventFilter(self)
+                ms = (time.perf_counter() - t0) * 1000.0
+                QtCore.QTimer.singleShot(0, lambda: (print(f"first_paint_ms={ms:.1f} rss_mb={rss_mb():.1f}"),
+                                                     app.quit()))
+            return False
+
+    window._first_paint_filter = _FirstPaint(window)
+    window.installEventFilter(window._first_paint_filter)
+
+
+def import_times(module: str, stubs: bool = True):
+    """
+    在子进程中导入 module 并解析 -X importtime 输出
+    :return: (总耗时 ms, [(累计 ms, 自身 ms, 模块名)], {顶层包: 自身 ms 合计})
+    """
+    code = (f"from benchmarks import _stubs; _stubs.install(); import {module}" if stubs else f"import {module}")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows, packages = [], defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cum_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        rows.append((int(cum_us) / 1000.0, int(self_us) / 1000.0, name))
+        packages[name.split(".")[0]] += int(self_us) / 1000.0
+    total = next((cum for cum, _, name in reversed(rows) if name == module), 0.0)
+    return total, sorted(rows, reverse=True), dict(packages)
+
+
+def app_startup():
+    """启动 app.py 直到主窗口首次绘制，返回 (子进程墙钟 ms, 进程内首次绘制 ms, 常驻内存 MB)"""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(ROOT, "app.py"), "--startup-report"], cwd=ROOT,
+                          capture_output=True, text=True, timeout=60)
+    wall = (time.perf_counter() - t0) * 1000.0
+    for line in proc.stdout.splitlines():
+        if line.startswith("first_paint_ms="):
+            fields = dict(part.split("=") for part in line.split())
+            return wall, float(fields["first_paint_ms"]), float(fields["rss_mb"])
+    raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no report from app.py")
+
+
+def run(module="core.engine.engine", repeat=3):
+    """供 benchmarks.run 汇总：导入引擎的最短耗时（使用替身模块）"""
+    best = min(import_times(module)[0] for _ in range(repeat))
+    return {"startup.engine_import_ms": best}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="core.engine.engine")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--no-stubs", action="store_true")
+    ap.add_argument("--app", action="store_true")
+    args = ap.parse_args()
+
+    if args.app:
+        wall, paint, rss = app_startup()
+        print(f"{'startup.app.wall_ms':32s} {wall:12.2f}")
+        print(f"{'startup.app.first_paint_ms':32s} {paint:12.2f}")
+        print(f"{'startup.app.rss_mb':32s} {rss:12.2f}")
+        return
+
+    total, rows, packages = import_times(args.module, stubs=not args.no_stubs)
+    print(f"import {args.module}: {total:.1f} ms\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cum, own, name in rows[:args.top]:
+        print(f"{cum:14.2f} {own:9.2f}  {name}")
+    print(f"\n{'self ms':>9}  top-level package")
+    for name, own in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{own:9.2f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
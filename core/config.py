@@ -1,8 +1,98 @@
 ﻿# -*- coding: utf-8 -*-
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
+import time
 from core.models.skill import SkillAction
 
+# 后台写配置的静默期（毫秒）：最后一次修改后这么久没有新修改才写文件
+SAVE_DELAY_MS = 500
+
+# 除 global_coords / profiles 之外的顶层配置段及其默认值
+DEFAULT_SETTINGS = {
+	"capture": {
+		"backend": "pil",        # pil / gdi / replay / recording
+		"replay_path": "",       # replay / recording 后端：截图文件、目录或录制文件
+		"slots": 3,              # 抓屏线程的环形缓冲帧数（>= 3）
+		"max_fps": 60,           # 抓屏线程帧率上限，0 表示不限
+	},
+	"cooldown": {
+		"enabled": True,         # 学习技能冷却时长，冷却中的技能降低采样频率
+		"slow_ms": 500,          # 预计仍在冷却时的采样间隔
+		"lead_ms": 300,          # 距预计就绪不足该时长时每个 tick 都采样
+		"alpha": 0.3,            # 冷却估计的指数平滑系数
+	},
+	"scheduler": {
+		"recast_ms": 150,        # 同一技能两次按键的最短间隔
+	},
+	"input": {
+		"pause_ms": 10,          # 两次按键的最短间隔（取代 pydirectinput 默认 100ms 的 PAUSE）
+	},
+	"stats": {
+		"enabled": False,        # 统计战斗循环各阶段耗时（Engine.stats()）
+		"overlay": False,        # 在悬浮窗显示耗时摘要
+	},
+	"profiler": {
+		"dir": "profiles",       # 性能采样结果目录
+		"seconds": 10,           # 每次采样的窗口时长
+		"mode": "cprofile",      # cprofile（.pstats）/ sample（调用栈采样，.collapsed）
+		"interval_ms": 1,        # sample 模式的采样间隔
+	},
+	"record": {
+		"dir": "recordings",     # 录制文件目录
+		"frames": False,         # 是否同时保存抓取区域的整帧像素
+	},
+	"buffs": {
+		"dir": "buffs",          # buff 图标模版目录（文件名即 buff 名）
+		"scale": 4,              # 降采样块边长（像素）
+		"threshold": 0.8,        # 归一化互相关阈值
+		"step": 1,               # 窗口位置的搜索步长（像素）
+	},
+	"bars": {                    # 屏幕事实的校准矩形（血条校准 / buff 栏校准写入），空字典表示未校准
+		"hp": {},                # 血条扫描线 {"x0", "x1", "y", "fill", "tol"}
+		"buffs": {},             # buff 栏矩形 {"x0", "y0", "x1", "y1", "icon"}
+	},
+	"ui": {
+		"snapshot_ms": 100,      # 技能状态推送到界面的最短间隔，期间的变化合并为一次推送
+		"hud_fps": 30,           # 悬浮窗 HUD 的最高重绘帧率
+	},
+	"store": {
+		"profiles": "",          # SQLite 模版库文件（相对 config.json），空表示模版保存在 config.json 中
+	},
+	"hotkeys": {                 # 全局热键：动作 -> 按键组合，空字符串表示不绑定
+		"toggle": "f8",          # 开始 / 停止
+		"profiling": "f9",       # 性能采样开始 / 提前结束
+		"next_profile": "",      # 切换到下一个模版
+		"record": "",            # 录制开始 / 停止
+		"calibrate": "",         # 技能栏校准
+		"calibrate_hp": "",      # 血条校准
+		"calibrate_buffs": "",   # buff 栏校准
+	},
+}
+
+# 旧版把血条 / buff 栏写在 global_coords["HP"] / ["BUFFS"] 中，与技能槽位混在一起；读取时迁移到 "bars" 段
+_LEGACY_BARS = {"HP": "hp", "BUFFS": "buffs"}
+
+
+def _read_json(path):
+	"""读取 JSON 配置，兼容带 BOM 的文件；解析失败返回 None"""
+	try:
+		with open(path, "r", encoding="utf-8-sig") as f:
+			return json.load(f)
+	except json.JSONDecodeError:
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				text = f.read()
+			text = text.lstrip('\ufeff')
+			return json.loads(text)
+		except Exception as e:
+			print(f"Failed to parse config file '{path}': {e}")
+			return None
+
+
 def load_config(path="config.json"):
 	"""
 	加载配置文件
@@ -18,6 +108,8 @@ def load_config(path="config.json"):
 		- 使用 utf-8-sig 读取以兼容带 BOM 的 JSON 文件
 		- 缺失文件时创建默认空配置文件
 		- JSON 解析失败时尝试去除 BOM 再次解析，仍失败则返回空结构
+		- 旧版写在 global_coords 中的 "HP" / "BUFFS" 不属于技能槽位，这里丢弃，由 load_settings 迁移到 "bars" 段
+		- 设置了 "store": {"profiles": ...} 时 profiles 为按需加载的 LazyProfiles（见 core/profile_store.py）
 	"""
 	if not os.path.exists(path):
 		default = {"global_coords": {}, "profiles": {}}
@@ -25,20 +117,19 @@ def load_config(path="config.json"):
 			json.dump(default, f, indent=2, ensure_ascii=False)
 		return {}, {}
 
-	try:
-		with open(path, "r", encoding="utf-8-sig") as f:
-			data = json.load(f)
-	except json.JSONDecodeError:
-		try:
-			with open(path, "r", encoding="utf-8") as f:
-				text = f.read()
-			text = text.lstrip('\ufeff')
-			data = json.loads(text)
-		except Exception as e:
-			print(f"Failed to parse config file '{path}': {e}")
-			return {}, {}
+	data = _read_json(path)
+	if data is None:
+		return {}, {}
 
 	global_coords = data.get("global_coords", {})
+	for legacy in _LEGACY_BARS:
+		global_coords.pop(legacy, None)
+	store = _store_path(path, data)
+	if store:
+		# 模版库：只读出模版名索引，模版在第一次访问时才加载
+		from core.profile_store import open_store
+		return global_coords, open_store(store).profiles()
+
 	profiles = {}
 
 	for name, skills in data.get("profiles", {}).items():
@@ -47,7 +138,31 @@ def load_config(path="config.json"):
 	return global_coords, profiles
 
 
-def save_config(path, global_coords, profiles):
+def load_settings(path="config.json"):
+	"""
+	加载引擎设置（config.json 中除 global_coords / profiles 外的顶层配置段）
+
+	返回:
+		settings -- 以 DEFAULT_SETTINGS 为底、逐段合并文件内容后的字典
+	"""
+	data = _read_json(path) if os.path.exists(path) else None
+	settings = copy.deepcopy(DEFAULT_SETTINGS)
+	for section, values in (data or {}).items():
+		if section in ("global_coords", "profiles"):
+			continue
+		if isinstance(values, dict) and isinstance(settings.get(section), dict):
+			settings[section].update(values)
+		else:
+			settings[section] = values
+	bars = settings["bars"]
+	for legacy, name in _LEGACY_BARS.items():
+		rect = ((data or {}).get("global_coords") or {}).get(legacy)
+		if rect and not bars.get(name):
+			bars[name] = {k: v for k, v in rect.items() if k not in ("cx", "cy")}
+	return settings
+
+
+def save_config(path, global_coords, profiles, settings=None):
 	"""
 	保存配置文件
 
@@ -55,16 +170,140 @@ def save_config(path, global_coords, profiles):
 		path -- 配置文件路径
 		global_coords -- 全局坐标配置
 		profiles -- 技能配置文件，包含各个角色的技能设置
+		settings -- 引擎设置；为 None 时保留文件中已有的设置段
 
 	说明:
 		- 使用 utf-8-sig 写出，确保文件带 BOM（某些编辑器需要）
+		- 设置了模版库时只写出变化的模版到库中
 	"""
-	data = {
-		"global_coords": global_coords,
-		"profiles": {
+	if settings is None:
+		existing = _read_json(path) if os.path.exists(path) else None
+		settings = {k: v for k, v in (existing or {}).items() if k not in ("global_coords", "profiles")}
+
+	data = dict(settings)
+	data["global_coords"] = global_coords
+	store = _store_path(path, settings)
+	if store:
+		# 模版库：只写出变化的模版，config.json 不再包含 profiles
+		from core.profile_store import LazyProfiles, open_store
+		if isinstance(profiles, LazyProfiles):
+			profiles.commit()
+		else:
+			open_store(store).save_all(profiles)
+	else:
+		data["profiles"] = {
 			name: [s.to_dict() for s in skills]
 			for name, skills in profiles.items()
 		}
-	}
-	with open(path, "w", encoding="utf-8-sig") as f:
-		json.dump(data, f, indent=2, ensure_ascii=False)
+	_write_atomic(path, data)
+
+
+def _store_path(path, data):
+	"""配置中设置的模版库文件（相对配置文件所在目录），未设置返回空字符串"""
+	rel = ((data or {}).get("store") or {}).get("profiles") or ""
+	if not rel:
+		return ""
+	return os.path.join(os.path.dirname(os.path.abspath(path)), rel)
+
+
+def _write_atomic(path, data):
+	"""
+	先写同目录临时文件并 fsync，再 os.replace 原子替换；中途崩溃时原文件保持完整
+	临时文件名每次唯一（mkstemp），并发的写入不会共用同一个临时文件
+	"""
+	fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".config.", suffix=".tmp")
+	try:
+		with os.fdopen(fd, "w", encoding="utf-8-sig") as f:
+			json.dump(data, f, indent=2, ensure_ascii=False)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, path)
+	except BaseException:
+		try:
+			os.remove(tmp)
+		except OSError:
+			pass
+		raise
+
+
+class ConfigWriter:
+	"""
+	后台写配置（write-behind）
+
+	- schedule() 只登记“需要保存”，连续的修改在 delay_ms 静默后合并为一次写入
+	- 写入时才在后台线程调用 snapshot() 取 (global_coords, profiles, settings) 并序列化，
+	  写入期间再有修改会在之后另写一次，因此最终落盘的总是最新状态
+	- flush() 在调用线程立即写出待保存的内容（关闭窗口 / 退出进程时调用）
+	"""
+
+	def __init__(self, path, snapshot, delay_ms=SAVE_DELAY_MS, on_saved=None, on_error=None):
+		self.path = path
+		self.snapshot = snapshot
+		self.delay = delay_ms / 1000.0
+		self.on_saved = on_saved or (lambda: None)
+		self.on_error = on_error or (lambda e: None)
+		self.writes = 0
+		self._cond = threading.Condition()
+		self._write_lock = threading.Lock()
+		self._pending = False
+		self._due = 0.0
+		self._thread = None
+		self._closed = False
+		atexit.register(self.flush)
+
+	def schedule(self):
+		with self._cond:
+			self._pending = True
+			self._due = time.monotonic() + self.delay
+			if self._thread is None and not self._closed:
+				self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+				self._thread.start()
+			self._cond.notify()
+
+	@property
+	def pending(self):
+		return self._pending
+
+	def flush(self):
+		"""立即写出待保存的内容并等待后台正在进行的写入结束，返回是否写了文件"""
+		with self._cond:
+			pending, self._pending = self._pending, False
+		if not pending:
+			with self._write_lock:
+				return False
+		return self._write()
+
+	def close(self):
+		self.flush()
+		with self._cond:
+			self._closed = True
+			self._cond.notify()
+
+	def _run(self):
+		while True:
+			with self._cond:
+				# 等到有待写内容且静默期结束；期间的新修改会推迟截止时刻
+				while not self._closed:
+					if self._pending:
+						wait = self._due - time.monotonic()
+						if wait <= 0:
+							break
+						self._cond.wait(wait)
+					else:
+						self._cond.wait()
+				if self._closed:
+					self._thread = None
+					return
+				self._pending = False
+			self._write()
+
+	def _write(self):
+		with self._write_lock:
+			try:
+				save_config(self.path, *self.snapshot())
+			except Exception as e:
+				self.on_error(e)
+				return False
+			self.writes += 1
+		self.on_saved()
+		return True
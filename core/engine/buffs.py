@@ -0,0 +1,179 @@
+# core/engine/buffs.py
+"""
+Buff 图标检测（BUFF_ACTIVE 条件）
+
+校准后设置 "bars" 段的 "buffs" 记录 buff 栏矩形 {"x0", "y0", "x1", "y1"}（右、下边界不含），
+模版图标为 buff 目录下的图片文件（文件名即 buff 名，如 buffs/Might.png）
+
+- 模版在加载时缩放到 buff 栏图标尺寸，再按 scale 块均值降采样、去均值并归一化为单位向量，
+  按 (路径, 修改时间, 尺寸, scale) 缓存，模版不变时不会重复处理
+- 每个 tick 只取 buff 栏矩形，求出以每个像素为起点的块均值，按 step 枚举窗口位置（不受降采样网格对齐限制）
+- 提前剔除：窗口平均色与模版平均色相差过大的组合、近乎纯色（空槽位）的窗口不做相关运算
+- 余下的窗口与全部模版一次矩阵乘法得到归一化互相关（NCC），每个模版取最大值与阈值比较
+一次检测返回全部激活的 buff，无论有多少条件引用
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.engine.capture import RegionFrame
+from core.engine.conditions import BUFFS, FactProvider
+
+IMAGE_EXTS = (".png", ".bmp", ".jpg", ".jpeg")
+# 窗口平均色与模版平均色的最大欧氏距离（RGB，0~255）
+MEAN_TOL = 64.0
+# 窗口的最小标准差，低于此视为空槽位
+MIN_STD = 4.0
+
+_template_cache: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _downsample(a: np.ndarray, scale: int) -> np.ndarray:
+    """(H, W, 3) -> (H // scale, W // scale, 3) float32 块均值"""
+    h, w = a.shape[0] // scale * scale, a.shape[1] // scale * scale
+    a = a[:h, :w, :3].astype(np.float32)
+    return a.reshape(h // scale, scale, w // scale, scale, 3).mean(axis=(1, 3))
+
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    """逐行去均值并归一化为单位向量"""
+    vecs = vecs - vecs.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norm, 1e-6)
+
+
+def load_template(path: str, size: int, scale: int) -> Tuple[np.ndarray, np.ndarray]:
+    """返回 (归一化向量, 平均色)，按文件修改时间缓存"""
+    key = (os.path.abspath(path), os.path.getmtime(path), size, scale)
+    cached = _template_cache.get(key)
+    if cached is None:
+        from PIL import Image
+        with Image.open(path) as img:
+            icon = np.asarray(img.convert("RGB").resize((size, size), Image.BILINEAR))
+        small = _downsample(icon, scale)
+        cached = (_normalize(small.reshape(1, -1))[0], small.reshape(-1, 3).mean(axis=0))
+        _template_cache[key] = cached
+    return cached
+
+
+class BuffDetector(FactProvider):
+    name = BUFFS
+
+    def __init__(self, rect: dict, templates: Dict[str, str], scale: int = 4, threshold: float = 0.8,
+                 icon: Optional[int] = None, step: int = 1):
+        """
+        :param rect: buff 栏矩形
+        :param templates: buff 名 -> 图标文件
+        :param icon: 图标边长（像素），默认为 buff 栏高度
+        :param step: 窗口起点的搜索步长（像素）
+        """
+        self.x0, self.y0 = int(rect["x0"]), int(rect["y0"])
+        self.x1, self.y1 = int(rect["x1"]), int(rect["y1"])
+        self.scale = max(1, int(scale))
+        self.step = max(1, int(step))
+        self.threshold = threshold
+        size = int(icon or rect.get("icon") or (self.y1 - self.y0))
+        self.cell = max(1, size // self.scale)
+        self.size = self.cell * self.scale
+        if self.x1 - self.x0 < self.size or self.y1 - self.y0 < self.size:
+            raise ValueError("buff bar is smaller than one icon")
+        self.names: List[str] = []
+        vecs, means = [], []
+        for name, path in sorted(templates.items()):
+            v, m = load_template(path, self.size, self.scale)
+            self.names.append(name)
+            vecs.append(v)
+            means.append(m)
+        self._vecs = np.array(vecs, dtype=np.float32).reshape(len(vecs), self.cell * self.cell * 3)  # (T, D)
+        self._means = np.array(means, dtype=np.float32).reshape(len(means), 3)  # (T, 3)
+        self._mean_sq = (self._means * self._means).sum(axis=1)
+        self._color_mean = np.tile(np.eye(3, dtype=np.float32), (self.cell * self.cell, 1)) / (self.cell * self.cell)
+        self._region = None
+        self._index = None
+        self.last_scores: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_dir(cls, rect: dict, directory: str, **kwargs) -> "BuffDetector":
+        templates = {}
+        if os.path.isdir(directory):
+            for fn in os.listdir(directory):
+                stem, ext = os.path.splitext(fn)
+                if ext.lower() in IMAGE_EXTS:
+                    templates[stem] = os.path.join(directory, fn)
+        return cls(rect, templates, **kwargs)
+
+    def regions(self) -> List[tuple]:
+        return [(self.x0, self.y0, self.x1, self.y1)]
+
+    def _rect(self, frame) -> np.ndarray:
+        if not isinstance(frame, RegionFrame):
+            frame = RegionFrame.from_image(frame)
+        key = tuple(frame.regions)
+        if self._region is None or self._region[0] != key:
+            for i, (l, t, r, b) in enumerate(frame.regions):
+                if l <= self.x0 and self.x1 <= r and t <= self.y0 and self.y1 <= b:
+                    self._region = (key, i, self.x0 - l, self.y0 - t)
+                    break
+            else:
+                raise IndexError("buff bar is not inside one capture region")
+        _, i, lx, ly = self._region
+        return frame.array(i)[ly:ly + self.y1 - self.y0, lx:lx + self.x1 - self.x0]
+
+    def _windows(self, rect: np.ndarray) -> np.ndarray:
+        """
+        所有候选位置的降采样窗口 (P, cell*cell*3)
+        先用平移相加求出以每个像素为左上角的 scale×scale 块均值，窗口由相隔 scale 的块组成，
+        因此窗口起点可以落在任意像素（按 step 步进），不受降采样网格对齐的限制
+        """
+        s, c = self.scale, self.cell
+        a = rect[:, :, :3].astype(np.float32)
+        w = a.shape[1] - s + 1
+        bx = a[:, :w].copy()
+        for k in range(1, s):
+            bx += a[:, k:k + w]
+        h = a.shape[0] - s + 1
+        box = bx[:h].copy()
+        for k in range(1, s):
+            box += bx[k:k + h]
+        box *= 1.0 / (s * s)                                  # (H-s+1, W-s+1, 3)
+        if self._index is None or self._index[0] != box.shape:
+            self._index = (box.shape, self._window_index(box.shape))
+        return box.reshape(-1).take(self._index[1]).reshape(-1, c * c * 3)
+
+    def _window_index(self, shape: tuple) -> np.ndarray:
+        """块均值图 (展平) 中每个窗口各元素的下标，按形状缓存；np.take 一维取值比多维步长视图复制快得多"""
+        h, w, _ = shape
+        s, c = self.scale, self.cell
+        span = (c - 1) * s
+        ys = np.arange(0, h - span, self.step)
+        xs = np.arange(0, w - span, self.step)
+        off = np.arange(c) * s
+        yy = ys[:, None, None, None, None] + off[None, None, :, None, None]
+        xx = xs[None, :, None, None, None] + off[None, None, None, :, None]
+        return ((yy * w + xx) * 3 + np.arange(3)).ravel().astype(np.intp)
+
+    def scores(self, frame) -> np.ndarray:
+        """每个模版在 buff 栏内的最大 NCC (T,)，被提前剔除的为 -1"""
+        best = np.full(len(self.names), -1.0, dtype=np.float32)
+        if not self.names:
+            return best
+        flat = self._windows(self._rect(frame))                              # (P, D)
+        d = flat.shape[1]
+        means = flat @ self._color_mean                                        # (P, 3)
+        mu = means.mean(axis=1)
+        # 方差由平方和与均值得出，只有候选窗口才去均值
+        norms = np.sqrt(np.maximum(np.einsum("ij,ij->i", flat, flat) - d * mu * mu, 0.0))
+        # 提前剔除：空槽位（标准差过低）、平均色与模版相差过大的组合（欧氏距离，矩阵乘法展开）
+        dist2 = (means * means).sum(axis=1)[:, None] + self._mean_sq[None, :] - 2.0 * means @ self._means.T
+        close = (dist2 < MEAN_TOL * MEAN_TOL) & (norms >= MIN_STD * np.sqrt(d))[:, None]  # (P, T)
+        rows = np.flatnonzero(close.any(axis=1))
+        if not len(rows):
+            return best
+        ncc = ((flat[rows] - mu[rows, None]) / norms[rows, None]) @ self._vecs.T  # (R, T)
+        return np.where(close[rows], ncc, -1.0).max(axis=0)
+
+    def read(self, frame) -> frozenset:
+        scores = self.scores(frame)
+        self.last_scores = scores
+        return frozenset(n for n, s in zip(self.names, scores) if s >= self.threshold)
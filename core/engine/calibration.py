@@ -1,10 +1,10 @@
 ﻿# core/engine/calibration.py
 import math
 import time
-import pyautogui
-import keyboard
-import winsound # 引入声音库
-from PIL import ImageGrab
+
+import numpy as np
+
+# pyautogui / keyboard / winsound 只在校准时用到，在各校准函数内导入，不拖慢程序启动
 
 def calibrate(global_coords, log, overlay_callback=None):
     """
@@ -13,6 +13,10 @@ def calibrate(global_coords, log, overlay_callback=None):
     :param log: 日志回调函数
     :param overlay_callback: 悬浮窗回调函数 (用于显示提示)
     """
+    import keyboard
+    import pyautogui
+    import winsound  # 引入声音库
+
     steps = [
         ("Step 1/6: 指向 [1] 左上 → 按 P", "p"),
         ("Step 2/6: 指向 [5] 右下 → 按 P", "p"),
@@ -70,4 +74,78 @@ def calibrate(global_coords, log, overlay_callback=None):
         log(">>> 校准计算完成")
         
     except Exception as e:
-        log(f"校准逻辑错误: {e}")
\ No newline at end of file
+        log(f"校准逻辑错误: {e}")
+
+
+def calibrate_hp(bars, grab, log, overlay_callback=None):
+    """
+    校准血条扫描线（请在满血时进行）
+    依次指向血条左端、右端按 P，取两点所在行为扫描线，并采样左段像素的中位色作为填充色
+    :param bars: 设置中的 "bars" 段 (引用)，结果写入 bars["hp"]
+    :param grab: 抓取函数 (FrameSource.grab)，与战斗循环使用同一抓取后端
+    """
+    import keyboard
+    import pyautogui
+    import winsound
+
+    steps = [
+        ("HP 1/2: 指向血条左端 → 按 P", "p"),
+        ("HP 2/2: 指向血条右端 → 按 P", "p"),
+    ]
+    points = []
+    log(">>> 进入血条校准 (请保持满血)")
+    try:
+        for text, key in steps:
+            log(text)
+            if overlay_callback:
+                overlay_callback(text, "#FFD60A")
+            keyboard.wait(key)
+            winsound.Beep(800, 100)
+            points.append(pyautogui.position())
+            time.sleep(0.3)
+
+        x0, x1 = sorted((points[0].x, points[1].x))
+        y = int((points[0].y + points[1].y) / 2)
+        # 采样左侧 1/4 段的中位色作为填充色
+        row = grab([(x0, y, x0 + max(1, (x1 - x0) // 4), y + 1)]).array(0)[0]
+        pixels = row[np.argsort(row.sum(axis=1, dtype=np.int32), kind="stable")]
+        fill = [int(c) for c in pixels[len(pixels) // 2]]
+        bars["hp"] = {"x0": x0, "x1": x1, "y": y, "fill": fill, "tol": 40}
+        log(f">>> 血条校准完成: x {x0}-{x1}, y {y}, 填充色 {tuple(fill)}")
+    except Exception as e:
+        log(f"血条校准错误: {e}")
+
+
+def calibrate_buffs(bars, log, overlay_callback=None):
+    """
+    校准 buff 栏矩形
+    依次指向 buff 栏第一个图标的左上角、buff 栏最右端图标的右下角按 P，图标边长取矩形高度
+    :param bars: 设置中的 "bars" 段 (引用)，结果写入 bars["buffs"]
+    """
+    import keyboard
+    import pyautogui
+    import winsound
+
+    steps = [
+        ("BUFF 1/2: 指向第一个 buff 图标左上角 → 按 P", "p"),
+        ("BUFF 2/2: 指向 buff 栏最右端图标右下角 → 按 P", "p"),
+    ]
+    points = []
+    log(">>> 进入 buff 栏校准")
+    try:
+        for text, key in steps:
+            log(text)
+            if overlay_callback:
+                overlay_callback(text, "#FFD60A")
+            keyboard.wait(key)
+            winsound.Beep(800, 100)
+            points.append(pyautogui.position())
+            time.sleep(0.3)
+
+        x0, x1 = sorted((points[0].x, points[1].x))
+        y0, y1 = sorted((points[0].y, points[1].y))
+        x1, y1 = x1 + 1, y1 + 1
+        bars["buffs"] = {"x0": x0, "y0": y0, "x1": x1, "y1": y1, "icon": y1 - y0}
+        log(f">>> buff 栏校准完成: ({x0}, {y0}) - ({x1}, {y1}), 图标 {y1 - y0}px")
+    except Exception as e:
+        log(f"buff 栏校准错误: {e}")
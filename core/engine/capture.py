@@ -0,0 +1,540 @@
+﻿# core/engine/capture.py
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models.skill import SkillAction
+
+Point = Tuple[int, int]
+# 采样键：单像素为 (x, y)，k×k 区域均值为 (x, y, k)
+Sample = Tuple[int, ...]
+# (left, top, right, bottom)，与 PIL bbox 一致，right/bottom 不包含
+Region = Tuple[int, int, int, int]
+
+
+def sample_key(x: int, y: int, k: int = 1) -> Sample:
+    return (x, y) if k <= 1 else (x, y, k)
+
+
+def collect_sample_points(skills: Iterable[SkillAction]) -> List[Sample]:
+    """收集技能评估所需的全部采样点（未绑定颜色的技能不参与评估，跳过）"""
+    points = set()
+    for s in skills:
+        if not (s.cr and s.p11r):
+            continue
+        points.add(sample_key(s.cx, s.cy, s.patch))
+        points.add(sample_key(s.p11x, s.p11y, s.patch))
+    return sorted(points)
+
+
+def _merge(a: Region, b: Region) -> Region:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _area(r: Region) -> int:
+    return (r[2] - r[0]) * (r[3] - r[1])
+
+
+def compute_capture_regions(
+    points: Sequence[Sample],
+    pad: int = 2,
+    gap: int = 48,
+    max_regions: int = 4,
+) -> List[Region]:
+    """
+    由采样点计算最小抓取矩形集合
+    :param points: 屏幕坐标采样点（(x, y) 或带区域边长的 (x, y, k)）
+    :param pad: 每个点四周保留的像素
+    :param gap: 两个矩形间距小于该值时合并（多一次抓取的开销大于多抓几行像素）
+    :param max_regions: 矩形数量上限，超过时按面积增量最小的顺序继续合并
+    """
+    regions: List[Region] = []
+    for p in points:
+        x, y = p[0], p[1]
+        r = pad + (p[2] // 2 if len(p) > 2 else 0)
+        regions.append((x - r, y - r, x + r + 1, y + r + 1))
+    regions = [(max(0, l), max(0, t), r, b) for l, t, r, b in regions]
+
+    # 1. 合并相互靠近的矩形
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i], regions[j]
+                if (a[0] - gap < b[2] and b[0] - gap < a[2] and
+                        a[1] - gap < b[3] and b[1] - gap < a[3]):
+                    regions[i] = _merge(a, b)
+                    regions.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+
+    # 2. 数量超限时，合并代价最小的一对
+    while len(regions) > max(1, max_regions):
+        best = None
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                m = _merge(regions[i], regions[j])
+                cost = _area(m) - _area(regions[i]) - _area(regions[j])
+                if best is None or cost < best[0]:
+                    best = (cost, i, j, m)
+        _, i, j, m = best
+        regions[i] = m
+        regions.pop(j)
+
+    return sorted(regions, key=lambda r: (r[1], r[0]))
+
+
+class RegionFrame:
+    """
+    局部抓取得到的帧：若干矩形区域的像素数组 (h, w, 3) uint8 RGB
+    getpixel 接收屏幕坐标并换算到对应区域，可直接替代整屏 Image 使用
+    数组可能是抓屏后端缓冲区的视图，下一次抓取会覆盖其内容
+    """
+
+    def __init__(self, regions: Sequence[Region], arrays: Sequence[np.ndarray], timestamp: float = 0.0):
+        self.regions = list(regions)
+        self.arrays = list(arrays)
+        self.timestamp = timestamp   # time.monotonic()，抓取完成的时刻
+        self.seq = 0                 # 抓屏线程写入的帧序号
+        self.buffers = None          # 后端私有的缓冲区句柄（如 GDI 抓取面）
+        # 可选：像素连续的原始缓冲（如 BGRA）及其中 R/G/B 的通道下标，批量运算直接在原始缓冲上进行更快
+        self.raw: Optional[List[np.ndarray]] = None
+        self.channels = [0, 1, 2]
+
+    @classmethod
+    def from_image(cls, image) -> "RegionFrame":
+        """整屏 Image 视为从 (0, 0) 开始的单个区域"""
+        return cls([(0, 0, image.width, image.height)], [_to_rgb_array(image)])
+
+    def locate(self, xy: Point) -> Tuple[int, int, int]:
+        """屏幕坐标 -> (区域序号, 区域内 x, 区域内 y)"""
+        x, y = xy
+        for i, (l, t, r, b) in enumerate(self.regions):
+            if l <= x < r and t <= y < b:
+                return i, x - l, y - t
+        raise IndexError(f"point {xy} outside capture regions")
+
+    def getpixel(self, xy: Point):
+        i, x, y = self.locate(xy)
+        return tuple(int(v) for v in self.arrays[i][y, x, :3])
+
+    def array(self, i: int) -> np.ndarray:
+        return self.arrays[i]
+
+    def pixels(self, i: int):
+        """(像素连续的区域数组, R/G/B 通道下标)"""
+        if self.raw is not None:
+            return self.raw[i], self.channels
+        return self.arrays[i], self.channels
+
+    @property
+    def nbytes(self) -> int:
+        return sum(_area(r) * 3 for r in self.regions)
+
+
+def _to_rgb_array(image) -> np.ndarray:
+    return np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
+
+
+# --- 抓屏后端 ---
+class FrameSource:
+    """
+    抓屏后端接口
+    - set_regions: 设置常规抓取区域（后端可在此预分配缓冲区）
+    - capture: 抓取常规区域，返回 RegionFrame
+    - allocate / capture_into: 预分配一帧缓冲并原地写入（供抓屏线程的环形缓冲使用）
+    - grab: 一次性抓取任意区域（如添加技能时取色），不影响常规缓冲区
+    """
+    name = "base"
+
+    def __init__(self):
+        self.regions: List[Region] = []
+
+    def set_regions(self, regions: Sequence[Region]):
+        self.regions = list(regions)
+
+    def capture(self) -> RegionFrame:
+        return self.grab(self.regions)
+
+    def allocate(self) -> RegionFrame:
+        """按当前区域预分配一帧缓冲"""
+        arrays = [np.zeros((b - t, r - l, 3), dtype=np.uint8) for l, t, r, b in self.regions]
+        return RegionFrame(self.regions, arrays)
+
+    def capture_into(self, frame: RegionFrame) -> RegionFrame:
+        """抓取常规区域并写入 frame 的缓冲区（默认实现：抓取后复制）"""
+        src = self.capture()
+        for dst, a in zip(frame.arrays, src.arrays):
+            dst[:a.shape[0], :a.shape[1]] = a[:, :, :3]
+        frame.timestamp = src.timestamp
+        return frame
+
+    def grab(self, regions: Sequence[Region]) -> RegionFrame:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PilFrameSource(FrameSource):
+    """PIL.ImageGrab 后端：每次抓取都分配新的 Image 与数组"""
+    name = "pil"
+
+    def grab(self, regions: Sequence[Region]) -> RegionFrame:
+        from PIL import ImageGrab
+        arrays = [_to_rgb_array(ImageGrab.grab(bbox=r)) for r in regions]
+        return RegionFrame(regions, arrays, time.monotonic())
+
+
+class _GdiSurface:
+    """单个区域的 GDI 抓取面：DIB Section 的像素内存直接暴露为 NumPy 视图"""
+
+    def __init__(self, gdi, region: Region):
+        import ctypes
+        self._gdi = gdi
+        l, t, r, b = region
+        self.origin = (l, t)
+        self.size = (r - l, b - t)
+        w, h = self.size
+
+        user32, gdi32 = gdi
+        self._screen_dc = user32.GetDC(None)
+        self._mem_dc = gdi32.CreateCompatibleDC(self._screen_dc)
+
+        bmi = _BITMAPINFO()
+        bmi.bmiHeader.biSize = ctypes.sizeof(_BITMAPINFOHEADER)
+        bmi.bmiHeader.biWidth = w
+        bmi.bmiHeader.biHeight = -h          # 负数表示自上而下的行序
+        bmi.bmiHeader.biPlanes = 1
+        bmi.bmiHeader.biBitCount = 32
+        bmi.bmiHeader.biCompression = 0      # BI_RGB
+        bits = ctypes.c_void_p()
+        self._bitmap = gdi32.CreateDIBSection(self._mem_dc, ctypes.byref(bmi), 0, ctypes.byref(bits), None, 0)
+        if not self._bitmap:
+            raise OSError("CreateDIBSection failed")
+        self._old = gdi32.SelectObject(self._mem_dc, self._bitmap)
+
+        buf = (ctypes.c_ubyte * (w * h * 4)).from_address(bits.value)
+        self.bgra = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 4)
+        # BGRA -> RGB 仅调整步长，不复制
+        self.array = self.bgra[:, :, 2::-1]
+
+    def capture(self):
+        user32, gdi32 = self._gdi
+        w, h = self.size
+        gdi32.BitBlt(self._mem_dc, 0, 0, w, h, self._screen_dc, self.origin[0], self.origin[1], 0x00CC0020 | 0x40000000)  # SRCCOPY | CAPTUREBLT
+
+    def close(self):
+        user32, gdi32 = self._gdi
+        gdi32.SelectObject(self._mem_dc, self._old)
+        gdi32.DeleteObject(self._bitmap)
+        gdi32.DeleteDC(self._mem_dc)
+        user32.ReleaseDC(None, self._screen_dc)
+
+
+def _load_gdi():
+    import ctypes
+    from ctypes import wintypes
+
+    global _BITMAPINFOHEADER, _BITMAPINFO
+
+    class _BITMAPINFOHEADER(ctypes.Structure):
+        _fields_ = [
+            ("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+            ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+            ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG), ("biYPelsPerMeter", wintypes.LONG),
+            ("biClrUsed", wintypes.DWORD), ("biClrImportant", wintypes.DWORD),
+        ]
+
+    class _BITMAPINFO(ctypes.Structure):
+        _fields_ = [("bmiHeader", _BITMAPINFOHEADER), ("bmiColors", wintypes.DWORD * 3)]
+
+    user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+    # 64 位下句柄必须声明类型，否则会被截断为 int
+    user32.GetDC.argtypes = [wintypes.HWND]
+    user32.GetDC.restype = wintypes.HDC
+    user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+    gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+    gdi32.CreateCompatibleDC.restype = wintypes.HDC
+    gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.c_void_p, wintypes.UINT,
+                                       ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD]
+    gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+    gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+    gdi32.SelectObject.restype = wintypes.HGDIOBJ
+    gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                             wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+    gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+    gdi32.DeleteDC.argtypes = [wintypes.HDC]
+    # 与 pyautogui 的坐标系保持一致（物理像素）
+    user32.SetProcessDPIAware()
+    return user32, gdi32
+
+
+class GdiFrameSource(FrameSource):
+    """
+    GDI BitBlt 后端（仅 Windows）
+    每帧缓冲区都是预分配的 DIB Section，capture 直接 BitBlt 写入，
+    RegionFrame 的数组是缓冲区的零拷贝视图；capture 每次返回同一个对象
+    """
+    name = "gdi"
+
+    def __init__(self):
+        super().__init__()
+        if sys.platform != "win32":
+            raise OSError("gdi capture backend requires Windows")
+        self._gdi = _load_gdi()
+        self._live: List[_GdiSurface] = []      # 当前区域下分配的全部抓取面
+        self._retired: List[_GdiSurface] = []   # 上一代抓取面，可能仍被读取方持有，延后一代释放
+        self._frame = RegionFrame([], [])
+
+    def set_regions(self, regions: Sequence[Region]):
+        self._release(self._retired)
+        self._retired, self._live = self._live, []
+        super().set_regions(regions)
+        self._frame = self.allocate()
+
+    def allocate(self) -> RegionFrame:
+        surfaces = [_GdiSurface(self._gdi, r) for r in self.regions]
+        self._live.extend(surfaces)
+        frame = RegionFrame(self.regions, [s.array for s in surfaces])
+        frame.buffers = surfaces
+        frame.raw = [s.bgra for s in surfaces]
+        frame.channels = [2, 1, 0]
+        return frame
+
+    def capture_into(self, frame: RegionFrame) -> RegionFrame:
+        for s in frame.buffers:
+            s.capture()
+        self._gdi[1].GdiFlush()
+        frame.timestamp = time.monotonic()
+        return frame
+
+    def capture(self) -> RegionFrame:
+        return self.capture_into(self._frame)
+
+    def grab(self, regions: Sequence[Region]) -> RegionFrame:
+        surfaces = [_GdiSurface(self._gdi, r) for r in regions]
+        try:
+            for s in surfaces:
+                s.capture()
+            self._gdi[1].GdiFlush()
+            # 临时缓冲区马上释放，这里需要复制
+            return RegionFrame(regions, [s.array.copy() for s in surfaces], time.monotonic())
+        finally:
+            self._release(surfaces)
+
+    @staticmethod
+    def _release(surfaces: List[_GdiSurface]):
+        for s in surfaces:
+            s.close()
+        surfaces.clear()
+
+    def close(self):
+        self._release(self._retired)
+        self._release(self._live)
+
+
+_IMAGE_EXTS = (".png", ".bmp", ".jpg", ".jpeg")
+
+class ReplayFrameSource(FrameSource):
+    """
+    回放后端：从截图文件或目录依次读取整屏截图（循环），用于无显示环境下的测试
+    截图在构造时一次性解码，capture 返回的区域数组是截图的切片视图
+    """
+    name = "replay"
+
+    def __init__(self, path: str, loop: bool = True):
+        super().__init__()
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                           if f.lower().endswith(_IMAGE_EXTS))
+        else:
+            files = [path]
+        if not files:
+            raise FileNotFoundError(f"no screenshots in '{path}'")
+        self.files = files
+        from PIL import Image
+        self._images = [_to_rgb_array(Image.open(f)) for f in files]
+        self._pos = 0
+        self.loop = loop
+
+    def _next_image(self) -> np.ndarray:
+        if self._pos >= len(self._images):
+            if not self.loop:
+                raise EOFError("replay finished")
+            self._pos = 0
+        img = self._images[self._pos]
+        self._pos += 1
+        return img
+
+    def capture(self) -> RegionFrame:
+        img = self._next_image()
+        return RegionFrame(self.regions, [img[t:b, l:r] for l, t, r, b in self.regions], time.monotonic())
+
+    def grab(self, regions: Sequence[Region]) -> RegionFrame:
+        img = self._images[max(0, self._pos - 1) % len(self._images)]
+        return RegionFrame(regions, [img[t:b, l:r] for l, t, r, b in regions], time.monotonic())
+
+
+# --- 抓屏线程 ---
+class CaptureThread:
+    """
+    独立抓屏线程（生产者）
+    - 预分配 slots 个帧缓冲轮流写入，每帧带单调时钟时间戳与递增序号
+    - latest() 不阻塞，总是返回最新完成的一帧；读取方持有的帧不会被覆盖
+    - 抓取第 N+1 帧与评估第 N 帧并行进行
+    - wait() 阻塞到出现更新的帧或超时，供战斗循环按“下一帧或下一个截止时刻”唤醒
+    """
+
+    def __init__(self, source: FrameSource, slots: int = 3, max_fps: float = 0,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        if slots < 3:
+            raise ValueError("CaptureThread needs at least 3 slots (writing / latest / reading)")
+        self.source = source
+        self.slots = slots
+        self.interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self.on_error = on_error or (lambda e: None)
+        # 可选的抓取耗时直方图（core.engine.stats.LatencyHistogram），为 None 时不计时
+        self.timing = None
+
+        self._lock = threading.Lock()
+        self._fresh = threading.Condition(self._lock)
+        self._ring: List[RegionFrame] = []
+        self._latest: Optional[int] = None    # 最新完成的槽位
+        self._held: Optional[int] = None      # 读取方当前持有的槽位
+        self._next = 0
+        self._seq = 0
+        self._pending: Optional[List[Region]] = None
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def set_regions(self, regions: Sequence[Region]):
+        """区域变化：由抓屏线程在两次抓取之间重新分配缓冲"""
+        self._pending = list(regions)
+        self._wake.set()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        with self._fresh:
+            self._fresh.notify_all()
+
+    def latest(self) -> Optional[RegionFrame]:
+        """最新一帧（无帧时返回 None），调用后该帧在下次调用前保持不被覆盖"""
+        with self._lock:
+            if self._latest is None:
+                return None
+            self._held = self._latest
+            return self._ring[self._held]
+
+    def wait(self, seq: int, timeout: Optional[float] = None) -> Optional[RegionFrame]:
+        """等待序号大于 seq 的帧，返回并持有它（同 latest()）；超时或线程停止时返回 None"""
+        def fresh():
+            return not self._running or (self._latest is not None and self._ring[self._latest].seq > seq)
+
+        with self._fresh:
+            if not self._fresh.wait_for(fresh, timeout) or self._latest is None or not self._running:
+                return None
+            self._held = self._latest
+            return self._ring[self._held]
+
+    def _run(self):
+        failed = False
+        while self._running:
+            if self._pending is not None:
+                regions, self._pending = self._pending, None
+                self.source.set_regions(regions)
+                ring = [self.source.allocate() for _ in range(self.slots)] if regions else []
+                with self._lock:
+                    self._ring = ring
+                    self._latest = self._held = None
+
+            if not self._ring:
+                self._wake.wait(0.1)
+                self._wake.clear()
+                continue
+
+            with self._lock:
+                i = self._next
+                while i == self._latest or i == self._held:
+                    i = (i + 1) % self.slots
+                self._next = (i + 1) % self.slots
+                frame = self._ring[i]
+
+            t0 = time.monotonic()
+            timing = self.timing
+            if timing is not None:
+                ns = time.perf_counter_ns()
+            try:
+                self.source.capture_into(frame)
+                if timing is not None:
+                    timing.record(time.perf_counter_ns() - ns)
+            except Exception as e:
+                if not failed:
+                    self.on_error(e)
+                failed = True
+                self._wake.wait(0.1)
+                continue
+            failed = False
+
+            with self._lock:
+                self._seq += 1
+                frame.seq = self._seq
+                self._latest = i
+                self._fresh.notify_all()
+
+            if self.interval:
+                remaining = self.interval - (time.monotonic() - t0)
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    self._wake.clear()
+
+
+FRAME_SOURCES: Dict[str, Callable[..., FrameSource]] = {
+    PilFrameSource.name: PilFrameSource,
+    GdiFrameSource.name: GdiFrameSource,
+    ReplayFrameSource.name: ReplayFrameSource,
+}
+
+
+def create_frame_source(settings: dict, log: Callable[[str], None] = print) -> FrameSource:
+    """
+    按配置创建抓屏后端（config.json 的 "capture" 段）
+    后端不可用时回退到 PIL
+    """
+    backend = settings.get("backend", "pil")
+    try:
+        if backend == ReplayFrameSource.name:
+            return ReplayFrameSource(settings.get("replay_path", ""), settings.get("replay_loop", True))
+        if backend == "recording":
+            from core.engine.recorder import RecordingFrameSource
+            return RecordingFrameSource(settings.get("replay_path", ""), settings.get("replay_loop", True))
+        return FRAME_SOURCES[backend]()
+    except Exception as e:
+        log(f"抓屏后端 '{backend}' 不可用 ({e})，回退到 pil")
+        return PilFrameSource()
+
+
+_pil_source = PilFrameSource()
+
+def grab(regions: Optional[Sequence[Region]] = None) -> RegionFrame:
+    """regions 为 None 时抓取整屏（兼容旧行为），否则只抓取给定区域"""
+    if regions is None:
+        from PIL import ImageGrab
+        return RegionFrame.from_image(ImageGrab.grab())
+    return _pil_source.grab(regions)
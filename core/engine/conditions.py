@@ -0,0 +1,198 @@
+# core/engine/conditions.py
+"""
+技能施放条件
+
+- compile_condition 把 Condition 树编译为扁平的闭包：常量与参数在编译时取出，同类组合（AND 套 AND）展开为一层，
+  求值时短路
+- TickContext 每个 tick 一份，屏幕推导的事实（HP 百分比、已激活的 buff 集合）由 FactProvider 按需读取，
+  每个 tick 至多读取一次并在所有技能之间共享；模版里再多的条件也不会增加抓屏或像素读取
+- 读取不到的事实（未校准 / 没有对应的 provider）：HP_BELOW 视为不满足，buff 视为未激活
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from core.models.condition import Condition, ConditionType
+from core.models.skill import SkillAction
+
+Predicate = Callable[["TickContext"], bool]
+
+HP = "hp"
+BUFFS = "buffs"
+
+
+class FactProvider:
+    """
+    屏幕事实的读取器
+    name 为事实名（HP / BUFFS），regions() 为读取所需的抓取区域（并入战斗循环的抓取区域），
+    read(frame) 返回事实值，读取失败返回 None
+    """
+    name = ""
+
+    def regions(self) -> List[tuple]:
+        return []
+
+    def read(self, frame):
+        raise NotImplementedError
+
+
+class TickContext:
+    """单个 tick 的条件求值上下文，由战斗循环线程独占使用"""
+
+    __slots__ = ("frame", "_providers", "_cache", "reads")
+
+    def __init__(self, providers: Optional[Dict[str, FactProvider]] = None):
+        self.frame = None
+        self._providers = dict(providers or {})
+        self._cache: Dict[str, object] = {}
+        self.reads = 0
+
+    def reset(self, frame):
+        """新的一帧：清空上一 tick 的事实"""
+        self.frame = frame
+        self._cache.clear()
+
+    def fact(self, name: str):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        provider = self._providers.get(name)
+        value = None
+        if provider is not None and self.frame is not None:
+            try:
+                value = provider.read(self.frame)
+            except Exception:
+                value = None
+            self.reads += 1
+        self._cache[name] = value
+        return value
+
+    def hp_percent(self) -> Optional[float]:
+        return self.fact(HP)
+
+    def buffs(self) -> frozenset:
+        return self.fact(BUFFS) or frozenset()
+
+    def buff_active(self, name: str) -> bool:
+        return name in self.buffs()
+
+
+def _always(ctx) -> bool:
+    return True
+
+
+def _never(ctx) -> bool:
+    return False
+
+
+def _flatten(kind: ConditionType, children: Sequence[Condition]) -> List[Condition]:
+    out = []
+    for c in children:
+        if c.type == kind:
+            out.extend(_flatten(kind, c.children))
+        else:
+            out.append(c)
+    return out
+
+
+def compile_condition(cond: Condition) -> Predicate:
+    t = cond.type
+    if t == ConditionType.ALWAYS:
+        return _always
+    if t == ConditionType.HP_BELOW:
+        limit = float(cond.value)
+
+        def hp_below(ctx) -> bool:
+            hp = ctx.fact(HP)
+            return hp is not None and hp < limit
+        return hp_below
+    if t == ConditionType.BUFF_ACTIVE:
+        name = str(cond.value)
+
+        def buff_active(ctx) -> bool:
+            buffs = ctx.fact(BUFFS)
+            return buffs is not None and name in buffs
+        return buff_active
+    if t in (ConditionType.AND, ConditionType.OR):
+        children = _flatten(t, cond.children)
+        if t == ConditionType.AND:
+            children = [c for c in children if c.type != ConditionType.ALWAYS]
+            if not children:
+                return _always
+        elif any(c.type == ConditionType.ALWAYS for c in children):
+            return _always
+        parts = tuple(compile_condition(c) for c in children)
+        if not parts:
+            return _never
+        if len(parts) == 1:
+            return parts[0]
+        if t == ConditionType.AND:
+            def all_of(ctx) -> bool:
+                for p in parts:
+                    if not p(ctx):
+                        return False
+                return True
+            return all_of
+
+        def any_of(ctx) -> bool:
+            for p in parts:
+                if p(ctx):
+                    return True
+            return False
+        return any_of
+    if t == ConditionType.NOT:
+        inner = compile_condition(Condition(ConditionType.AND, children=cond.children))
+
+        def negate(ctx) -> bool:
+            return not inner(ctx)
+        return negate
+    raise ValueError(f"unknown condition type {t}")
+
+
+def referenced_facts(cond: Condition) -> Set[str]:
+    if cond.type == ConditionType.HP_BELOW:
+        return {HP}
+    if cond.type == ConditionType.BUFF_ACTIVE:
+        return {BUFFS}
+    out: Set[str] = set()
+    for c in cond.children:
+        out |= referenced_facts(c)
+    return out
+
+
+class ConditionSet:
+    """
+    一个模版的全部施放条件，编译一次
+    技能的 conditions 列表之间为“与”关系；没有条件的技能不参与求值
+    """
+
+    def __init__(self, skills: Sequence[SkillAction]):
+        self.index: List[int] = []
+        self.predicates: List[Predicate] = []
+        self.facts: Set[str] = set()
+        for i, s in enumerate(skills):
+            if not s.conditions:
+                continue
+            cond = s.conditions[0] if len(s.conditions) == 1 else Condition(ConditionType.AND, children=s.conditions)
+            pred = compile_condition(cond)
+            if pred is _always:
+                continue
+            self.index.append(i)
+            self.predicates.append(pred)
+            self.facts |= referenced_facts(cond)
+        self.allowed = np.ones(len(skills), dtype=bool)
+
+    def __bool__(self):
+        return bool(self.index)
+
+    def evaluate(self, ctx: TickContext, candidates: np.ndarray) -> np.ndarray:
+        """
+        只对 candidates（通常为就绪技能）求值，返回允许施放的掩码（共享缓冲，下次调用前有效）
+        不在 candidates 中的技能保持上次的结果
+        """
+        allowed = self.allowed
+        for i, pred in zip(self.index, self.predicates):
+            if candidates[i]:
+                allowed[i] = pred(ctx)
+        return allowed
@@ -0,0 +1,98 @@
+# core/engine/cooldown.py
+"""
+技能冷却模型
+
+观察每个技能的 READY -> COOLDOWN -> READY 转换，学习冷却时长（指数平滑），
+并据此给出每个 tick 需要采样的技能：
+    - 就绪 / 状态未知 / 尚未学到冷却：每个 tick 采样
+    - 冷却中且距预计就绪较远：每 slow_ms 采样一次
+    - 距预计就绪不足 lead_ms（或已超过预计时刻）：每个 tick 采样
+于是采样开销只随“即将就绪”的技能数增长，而不是模版里的技能总数
+"""
+from typing import Sequence
+
+import numpy as np
+
+from core.models.skill import SkillAction
+from core.engine.evaluator import COOLDOWN, FAIL, READY
+
+# 短于该时长的冷却视为公共冷却 / 画面抖动，不计入估计
+MIN_COOLDOWN = 0.2
+# 施放后这段时间内进入冷却才以施放时刻为起点
+CAST_WINDOW = 1.0
+
+
+class CooldownModel:
+    """与一个 BatchEvaluator 的技能列表一一对应，由战斗循环线程独占使用"""
+
+    def __init__(self, skills: Sequence[SkillAction], slow_ms: int = 500, lead_ms: int = 300, alpha: float = 0.3):
+        self.skills = list(skills)
+        n = len(self.skills)
+        self.slow = slow_ms / 1000.0
+        self.lead = lead_ms / 1000.0
+        self.alpha = alpha
+        # 冷却估计（秒），0 为未知；以技能上保存的值为初值
+        self.estimate = np.array([s.cooldown / 1000.0 for s in self.skills], dtype=np.float64)
+        self.samples = np.zeros(n, dtype=np.int32)
+        # 本轮冷却开始时刻（最近一次施放或观察到进入冷却的时刻），NaN 表示不在冷却中
+        self.started = np.full(n, np.nan)
+        self.next_poll = np.zeros(n, dtype=np.float64)
+        self.last_poll = np.zeros(n, dtype=np.float64)
+        self.state = np.full(n, FAIL, dtype=np.int8)
+        self.dirty = False
+
+    def due(self, now: float) -> np.ndarray:
+        """本 tick 需要采样的技能（布尔掩码）"""
+        return self.next_poll <= now
+
+    def cast(self, i: int, t: float):
+        """记录施放时刻，作为随后一轮冷却的起点"""
+        self.started[i] = t
+
+    def observe(self, now: float, polled: np.ndarray, codes: np.ndarray):
+        """
+        用本 tick 采样到的状态更新模型
+        :param polled: 本 tick 采样的技能掩码
+        :param codes: 全部技能的状态编码（未采样的技能忽略）
+        """
+        idx = np.flatnonzero(polled)
+        if not len(idx):
+            return
+        prev, cur = self.state[idx], codes[idx]
+
+        # 进入冷却：以最近的施放时刻为起点；没有近期施放记录（如手动施放）时，
+        # 只有从就绪转入冷却才以本次观察为起点，状态未知时（如启动时已在冷却中）无法确定起点，本轮不计
+        entered = (cur == COOLDOWN) & (prev != COOLDOWN)
+        stale = entered & ~(now - self.started[idx] <= CAST_WINDOW)
+        self.started[idx[stale]] = np.where(prev[stale] == READY, now, np.nan)
+
+        # 冷却结束：就绪时刻落在 (上次采样, 本次采样] 之间，取中点作为观测值
+        done = idx[(cur == READY) & (prev == COOLDOWN) & ~np.isnan(self.started[idx])]
+        finished = done
+        if len(done):
+            ready_at = now - (now - self.last_poll[done]) / 2
+            sample = ready_at - self.started[done]
+            ok = sample >= MIN_COOLDOWN
+            done, sample = done[ok], sample[ok]
+            est = self.estimate[done]
+            self.estimate[done] = np.where(est > 0, est + self.alpha * (sample - est), sample)
+            self.samples[done] += 1
+            self.dirty = self.dirty or bool(len(done))
+        # 本轮冷却结束，清空起点
+        self.started[finished] = np.nan
+
+        self.state[idx] = cur
+        self.last_poll[idx] = now
+
+        # 下次采样时刻：冷却中且估计已知时按预计就绪时刻分档，其余每个 tick 采样
+        est = self.estimate[idx]
+        cooling = (cur == COOLDOWN) & (est > 0) & ~np.isnan(self.started[idx])
+        wake = np.where(cooling, self.started[idx] + est - self.lead, now)
+        self.next_poll[idx] = np.where(wake > now, np.minimum(wake, now + self.slow), now)
+
+    def commit(self):
+        """把学到的冷却写回技能配置（毫秒），随模版一起保存；只写出观察到完整冷却的技能"""
+        for s, est, n in zip(self.skills, self.estimate, self.samples):
+            if n > 0:
+                s.cooldown = int(round(est * 1000))
+        self.dirty = False
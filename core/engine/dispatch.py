@@ -0,0 +1,103 @@
+﻿# core/engine/dispatch.py
+"""
+异步按键派发
+
+战斗循环只把施放命令放进队列（SimpleQueue，C 实现、入队不加 Python 锁、不阻塞），
+由独立的派发线程依次按键。按键使用可配置的最短间隔代替 pydirectinput 默认的 PAUSE，
+每个按键记录 入队 / 开始发送 / 发送完成 三个时刻（perf_counter_ns），计入延迟直方图并统计队列深度
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+from core.engine.stats import LatencyHistogram
+
+
+class KeyCommand:
+    __slots__ = ("key", "skill", "enqueued", "sent", "completed")
+
+    def __init__(self, key: str, skill: int, enqueued: int):
+        self.key = key
+        self.skill = skill
+        self.enqueued = enqueued
+        self.sent = 0
+        self.completed = 0
+
+
+class InputDispatcher:
+    """
+    按键派发线程（消费者）
+    - send() 只入队并立即返回，评估侧从不等待按键
+    - 两次按键之间至少间隔 pause_ms（取代 pydirectinput.PAUSE）
+    - 延迟直方图：queue 为入队到开始发送，press 为入队到发送完成
+    """
+
+    def __init__(self, pause_ms: float = 10, on_error: Optional[Callable[[Exception], None]] = None):
+        self.pause = pause_ms / 1000.0
+        self.on_error = on_error or (lambda e: None)
+        self._queue: "queue.SimpleQueue[Optional[KeyCommand]]" = queue.SimpleQueue()
+        self.queue_latency = LatencyHistogram()
+        self.press_latency = LatencyHistogram()
+        self.sent = 0
+        self.max_depth = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="input", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """停止派发线程；队列中尚未发送的按键被丢弃"""
+        if self._thread is None:
+            return
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def send(self, key: str, skill: int = -1) -> KeyCommand:
+        cmd = KeyCommand(key, skill, time.perf_counter_ns())
+        self._queue.put(cmd)
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return cmd
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        import pydirectinput  # 首次启动派发线程时才导入
+        pause = int(self.pause * 1e9)
+        last = 0
+        while True:
+            cmd = self._queue.get()
+            if cmd is None:
+                return
+            wait = last + pause - time.perf_counter_ns()
+            if wait > 0:
+                time.sleep(wait / 1e9)
+            cmd.sent = time.perf_counter_ns()
+            try:
+                # 不用 press()：其内部的 keyDown / keyUp 各自仍按 PAUSE 休眠
+                pydirectinput.keyDown(cmd.key, _pause=False)
+                pydirectinput.keyUp(cmd.key, _pause=False)
+            except Exception as e:
+                self.on_error(e)
+            cmd.completed = last = time.perf_counter_ns()
+            self.sent += 1
+            self.queue_latency.record(cmd.sent - cmd.enqueued)
+            self.press_latency.record(cmd.completed - cmd.enqueued)
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """按键延迟分位数 (ms)：queue 入队到开始发送，press 入队到发送完成"""
+        return {"queue": self.queue_latency.summary(), "press": self.press_latency.summary()}
@@ -1,15 +1,35 @@
 ﻿# core/engine/engine.py
+import copy
+import os
 import threading
 import time
-from typing import Callable, Dict, List, Optional, Any
-import pydirectinput
-import keyboard
-from PIL import ImageGrab
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple, Any
+import numpy as np
 
 from core.models.skill import SkillAction, SkillState
-from core.config import load_config, save_config
-from core.engine.evaluator import evaluate_skill
-from core.engine.calibration import calibrate
+from core.config import DEFAULT_SETTINGS, ConfigWriter, load_config, load_settings
+from core.profile_store import LazyProfiles
+from core.engine.evaluator import COOLDOWN, FAIL, READY, BatchEvaluator, to_states
+from core.engine.conditions import ConditionSet, FactProvider, TickContext
+from core.engine.cooldown import CooldownModel
+from core.engine.scheduler import CastScheduler
+from core.engine.dispatch import InputDispatcher
+from core.engine.stats import EngineStats
+from core.engine.profiler import LoopProfiler
+from core.engine.recorder import EXT as RECORDING_EXT, SessionRecorder
+from core.engine.capture import CaptureThread, FrameSource, compute_capture_regions, create_frame_source
+from core.engine.calibration import calibrate, calibrate_buffs, calibrate_hp
+from core.engine.buffs import BuffDetector
+from core.engine.hp import HpReader
+
+# 没有待施放技能时等待新帧的最长时间（秒），用于及时响应停止与模版切换
+IDLE_WAIT = 0.1
+# stop() 等待战斗循环退出的最长时间（秒）
+LOOP_JOIN_TIMEOUT = 1.0
+# 尚未推送过的状态（与任何状态编码都不同，评估器重建后首次推送全部技能）
+UNPUBLISHED = -1
+
 
 class Engine:
     def __init__(
@@ -18,7 +38,7 @@ class Engine:
         on_log: Optional[Callable[[str], None]] = None,
         on_status: Optional[Callable[[bool], None]] = None,
         on_overlay: Optional[Callable[[str, str], None]] = None,
-        on_snapshot: Optional[Callable[[List[Dict]], None]] = None,
+        on_snapshot: Optional[Callable[[List[Tuple[int, SkillState, float]]], None]] = None,
         # 【关键】坐标更新回调
         on_coords_update: Optional[Callable[[Dict], None]] = None, 
     ):
@@ -28,20 +48,79 @@ class Engine:
         self.on_overlay = on_overlay or (lambda t, c: None)
         self.on_snapshot = on_snapshot or (lambda d: None)
         self.on_coords_update = on_coords_update or (lambda d: None)
+        # 配置写入在后台线程进行，连续修改合并为一次原子写入
+        self._writer = ConfigWriter(
+            config_path, self._config_snapshot,
+            on_saved=lambda: self.on_log("配置已保存"), on_error=lambda e: self.on_log(f"保存失败: {e}"),
+        )
 
         self.running = False
         self.current_profile = "Guardian - Dragonhunter"
         self.global_coords: Dict[str, Any] = {}
         self.profiles_data: Dict[str, List[SkillAction]] = {self.current_profile: []}
+        self.settings: Dict[str, Any] = copy.deepcopy(DEFAULT_SETTINGS)
+        self.frame_source: Optional[FrameSource] = None
+        self._capture: Optional[CaptureThread] = None
+        self._input: Optional[InputDispatcher] = None
+        self._loop: Optional[threading.Thread] = None
+        # 各阶段耗时统计，关闭时为 None
+        self._stats: Optional[EngineStats] = None
+        # 运行时性能采样（按需创建），开启/关闭都在战斗循环线程内完成
+        self._profiler: Optional[LoopProfiler] = None
+        # 决策时刻所用帧的“年龄”（抓取完成到做出施放决策的毫秒数）
+        self.frame_age_ms = 0.0
+        self._frame_ages = deque(maxlen=256)
+        # 变化检测：采样像素与上个 tick 完全相同时跳过评估与快照推送
+        self._fingerprint: Optional[bytes] = None
+        self._codes = np.zeros(0, dtype=np.int8)
+        # UI 状态推送：只推送与上次推送不同的技能状态，两次推送至少间隔 ui.snapshot_ms
+        self._published = np.zeros(0, dtype=np.int8)
+        self._publish_due = 0.0
+        self._names: tuple = ()
+        self.ticks = 0
+        self.skipped_ticks = 0
+        # 录制：UI 线程只写 _record_request，文件由战斗循环线程打开/写入/关闭
+        self._recorder: Optional[SessionRecorder] = None
+        self._record_request = None
+        self._record_path = ""
+        self._record_frames = False
+        self._record_part = 0
+        # 采样缓存：抓取区域与批量评估器都由当前模版的采样点推导，模版/技能/校准变化时失效
+        self._regions: Optional[List[tuple]] = None
+        self._evaluator: Optional[BatchEvaluator] = None
+        # sampling() 构建的整组对象，战斗循环每个 tick 从这里取一次
+        self._sampling: Optional[tuple] = None
+        # 失效计数：构建期间被置空的结果不缓存；锁只在失效与写入缓存时使用，不在每个 tick 上
+        self._sampling_gen = 0
+        self._sampling_lock = threading.Lock()
+        # 冷却模型与采样像素缓冲随评估器一起重建；未采样技能的像素保留上次的值
+        self._cooldowns: Optional[CooldownModel] = None
+        self._scheduler: Optional[CastScheduler] = None
+        self._pix: Optional[np.ndarray] = None
+        # 施放条件：每个模版编译一次；屏幕事实（HP / buff）由 fact_providers 按需读取，每个 tick 至多一次
+        self.fact_providers: Dict[str, FactProvider] = {}
+        self._conditions: Optional[ConditionSet] = None
+        self._context = TickContext()
+        self.sampled_skills = 0
         self._load()
 
     def _load(self):
         try:
             gc, pd = load_config(self.config_path)
             self.global_coords = gc
-            if pd:
+            if isinstance(pd, LazyProfiles):
+                # 模版库：直接使用惰性映射，只有当前模版会被加载
+                self.profiles_data = pd
+                if self.current_profile not in pd:
+                    self.current_profile = next(iter(pd), self.current_profile)
+                pd.setdefault(self.current_profile, [])
+            elif pd:
                 self.profiles_data.update(pd)
                 self.current_profile = next(iter(self.profiles_data.keys()))
+            self.settings = load_settings(self.config_path)
+            self._build_fact_providers()
+            self.frame_source = create_frame_source(self.settings["capture"], self.on_log)
+            self.set_stats_enabled(self.settings["stats"].get("enabled", False))
             self.on_log("核心引擎已就绪 (v3.1)")
             # 启动时推送一次坐标给 UI (用于恢复显示)
             self.on_coords_update(self.global_coords)
@@ -49,11 +128,18 @@ class Engine:
             self.on_log(f"Load Error: {e}")
 
     def save(self):
-        try:
-            save_config(self.config_path, self.global_coords, self.profiles_data)
-            self.on_log("配置已保存")
-        except Exception as e:
-            self.on_log(f"保存失败: {e}")
+        """登记保存，由后台写入线程在修改停止 SAVE_DELAY_MS 后合并写出"""
+        self._writer.schedule()
+
+    def flush(self):
+        """立即写出尚未落盘的配置（关闭窗口时调用）"""
+        self._writer.flush()
+
+    def _config_snapshot(self):
+        # 后台线程序列化，先复制顶层容器，避免与 UI / 校准线程的增删冲突；模版库只提交已加载的模版，不复制
+        pd = self.profiles_data
+        profiles = pd if isinstance(pd, LazyProfiles) else {k: list(v) for k, v in pd.items()}
+        return copy.deepcopy(self.global_coords), profiles, self.settings
 
     # --- 数据操作 ---
     def set_profile(self, profile: str):
@@ -61,6 +147,7 @@ class Engine:
         self.current_profile = profile
         if profile not in self.profiles_data: self.profiles_data[profile] = []
         self.on_log(f"切换模版 -> {profile}")
+        self.invalidate_sampling()
         self.save()
 
     def get_profiles(self) -> List[str]: return list(self.profiles_data.keys())
@@ -74,25 +161,276 @@ class Engine:
             skill.cx, skill.cy = gc['cx'], gc['cy']
             skill.p11x, skill.p11y = gc['p11x'], gc['p11y']
             try:
-                grab = ImageGrab.grab()
+                grab = self._frame_source().grab(compute_capture_regions([(skill.cx, skill.cy), (skill.p11x, skill.p11y)]))
                 skill.cr = grab.getpixel((skill.cx, skill.cy))
                 skill.p11r = grab.getpixel((skill.p11x, skill.p11y))
                 self.on_log(f"[{skill.key}] 自动绑定坐标与颜色")
             except: pass
             
         self.profiles_data.setdefault(self.current_profile, []).append(skill)
+        self.invalidate_sampling()
         self.save()
 
     def delete_skill_by_index(self, idx: int):
         skills = self.profiles_data.get(self.current_profile, [])
         if 0 <= idx < len(skills):
             skills.pop(idx)
+            self.invalidate_sampling()
             self.save()
 
+    # --- 采样 ---
+    def invalidate_sampling(self):
+        """采样点可能变化（切换模版、增删技能、校准）后调用，下个 tick 重新计算"""
+        if self._cooldowns is not None:
+            self._cooldowns.commit()
+        with self._sampling_lock:
+            self._sampling_gen += 1
+            self._sampling = None
+            self._regions = None
+        self._evaluator = None
+        self._cooldowns = None
+        self._scheduler = None
+        self._conditions = None
+        self._pix = None
+        self._fingerprint = None
+
+    def capture_regions(self, sampling: Optional[tuple] = None) -> List[tuple]:
+        """:param sampling: 战斗循环本 tick 使用的 sampling()，区域由同一组对象推导"""
+        regions = self._regions
+        if regions is None:
+            sampling = sampling or self.sampling()
+            ev, _, _, conds, _ = sampling
+            # 条件引用的屏幕事实所需区域（每种事实一份，与引用它的条件数量无关）
+            extra = [tuple(r) for name in sorted(conds.facts) if name in self.fact_providers
+                     for r in self.fact_providers[name].regions()]
+            regions = compute_capture_regions(ev.points) + extra
+            with self._sampling_lock:
+                # 这组采样对象已失效（模版在此期间切换）时不缓存，下个 tick 按新模版重新计算
+                if sampling is not self._sampling:
+                    return regions
+                self._regions = regions
+            cap = self._capture
+            if cap is not None:
+                cap.set_regions(regions)
+            px = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+            self.on_log(f"抓取区域: {len(regions)} 块, 共 {px} 像素")
+        return regions
+
+    def _frame_source(self) -> FrameSource:
+        if self.frame_source is None:
+            self.frame_source = create_frame_source(self.settings["capture"], self.on_log)
+        return self.frame_source
+
+    def frame_age_stats(self) -> Dict[str, float]:
+        """最近若干次决策时的帧年龄 (ms)"""
+        ages = sorted(self._frame_ages)
+        if not ages:
+            return {"last": 0.0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "last": self.frame_age_ms,
+            "avg": sum(ages) / len(ages),
+            "p95": ages[min(len(ages) - 1, int(len(ages) * 0.95))],
+            "max": ages[-1],
+        }
+
+    def input_stats(self) -> Dict[str, Any]:
+        """按键派发统计：队列深度与入队到按键的延迟分位数 (ms)"""
+        d = self._input
+        if d is None:
+            return {"depth": 0, "max_depth": 0, "sent": 0, "latency": {}}
+        return {"depth": d.depth, "max_depth": d.max_depth, "sent": d.sent, "latency": d.latency_stats()}
+
+    def set_stats_enabled(self, enabled: bool):
+        """开启/关闭各阶段耗时统计（运行中也可切换）"""
+        self._stats = EngineStats() if enabled else None
+        if self._capture:
+            self._capture.timing = self._stats.stages["capture"] if self._stats else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        各阶段耗时分位数 (ms) 与 ticks/s：
+        capture 抓取一帧 / evaluate 采样与评估 / decide 调度决策 / ui 回调 / tick 一次循环（不含等待）/
+        input 按键入队到完成（派发线程始终统计）
+        """
+        st = self._stats
+        out: Dict[str, Any] = st.snapshot() if st is not None else {"ticks_per_sec": 0.0, "stages": {}}
+        out["enabled"] = st is not None
+        if self._input is not None and self._input.press_latency.count:
+            out["stages"]["input"] = self._input.press_latency.summary()
+        return out
+
+    def evaluator(self) -> BatchEvaluator:
+        return self.sampling()[0]
+
+    def sampling(self) -> Tuple[BatchEvaluator, Optional[CooldownModel], CastScheduler, ConditionSet, TickContext]:
+        """
+        当前模版的 (评估器, 冷却模型, 调度器, 施放条件, 条件上下文)
+        由同一份技能列表一次构建、作为一个元组整体替换：其他线程切换模版时只会置空它，
+        战斗循环每个 tick 读取一次，拿到的各部分总是同一个模版的（技能列表取 evaluator.skills）
+        构建期间被置空（失效计数变化）时本次仍返回这组一致的对象，但不缓存，下个 tick 重新构建
+        """
+        sampling = self._sampling
+        if sampling is None:
+            gen = self._sampling_gen
+            skills = self.get_current_skills()
+            ev = BatchEvaluator(skills)
+            self._pix = np.zeros((len(ev.points), 3), dtype=np.uint8)
+            self._codes = np.full(len(skills), FAIL, dtype=np.int8)
+            self._published = np.full(len(skills), UNPUBLISHED, dtype=np.int8)
+            self._names = tuple(s.name for s in skills)
+            cs = self.settings["cooldown"]
+            model = CooldownModel(
+                skills, cs.get("slow_ms", 500), cs.get("lead_ms", 300), cs.get("alpha", 0.3),
+            ) if cs.get("enabled", True) else None
+            sched = CastScheduler(skills, self.settings["scheduler"].get("recast_ms", 150))
+            conds = ConditionSet(skills)
+            ctx = TickContext({k: p for k, p in self.fact_providers.items() if k in conds.facts})
+            sampling = (ev, model, sched, conds, ctx)
+            self._cooldowns, self._scheduler, self._conditions, self._context = model, sched, conds, ctx
+            self._evaluator = ev
+            with self._sampling_lock:
+                if gen == self._sampling_gen:
+                    self._sampling = sampling
+        return sampling
+
+    # --- 录制 ---
+    def start_recording(self, path: Optional[str] = None, frames: Optional[bool] = None):
+        """开启录制模式：每个 tick 追加采样像素与决策，可选同时保存整帧"""
+        rs = self.settings["record"]
+        if path is None:
+            safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.current_profile)
+            path = os.path.join(rs["dir"], f"{safe}_{time.strftime('%Y%m%d_%H%M%S')}{RECORDING_EXT}")
+        self._record_request = (path, rs.get("frames", False) if frames is None else frames)
+        self.on_log(f"录制开启 -> {path}")
+
+    def stop_recording(self):
+        self._record_request = False
+
+    def toggle_recording(self):
+        self.stop_recording() if self.recording else self.start_recording()
+
+    @property
+    def recording(self) -> bool:
+        return self._recorder is not None or bool(self._record_request)
+
+    def _record_begin(self, evaluator: BatchEvaluator, sched: CastScheduler):
+        """在 tick 开始、做出决策之前处理录制开关与分段，头部记下此刻的调度器状态，回放据此重现决策"""
+        req, self._record_request = self._record_request, None
+        if req is not None:
+            self._close_recorder()
+            if req:
+                self._record_path, self._record_frames = req
+                self._record_part = 0
+                self._open_recorder(self._record_path, evaluator, sched)
+        rec = self._recorder
+        if rec is not None and rec.evaluator is not evaluator:
+            # 采样布局变化（切换模版 / 增删技能 / 校准），另开一个分段文件
+            self._close_recorder()
+            self._record_part += 1
+            root, ext = os.path.splitext(self._record_path)
+            self._open_recorder(f"{root}_{self._record_part}{ext}", evaluator, sched)
+
+    def _open_recorder(self, path, evaluator: BatchEvaluator, sched: CastScheduler):
+        try:
+            self._recorder = SessionRecorder(path, evaluator, self.current_profile,
+                                             self._regions or [], self._record_frames,
+                                             meta={"scheduler": sched.state()})
+        except Exception as e:
+            self._recorder = None
+            self.on_log(f"录制失败: {e}")
+
+    def _close_recorder(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self.on_log(f"录制已保存: {self._recorder.path} ({self._recorder.count} 条)")
+            self._recorder = None
+
+    # --- 性能采样 ---
+    def start_profiling(self, seconds: Optional[float] = None, mode: Optional[str] = None):
+        """对战斗循环线程采集一个有限时长的性能窗口（不停止循环），结束后写入 profiler.dir"""
+        ps = self.settings["profiler"]
+        if self._profiler is None:
+            self._profiler = LoopProfiler(ps.get("dir", "profiles"), self.on_log)
+        try:
+            self._profiler.request(seconds or ps.get("seconds", 10), mode or ps.get("mode", "cprofile"),
+                                   ps.get("interval_ms", 1), self._profile_meta)
+        except ValueError as e:
+            self.on_log(f"性能采样失败: {e}")
+            return
+        if not self.running:
+            self.on_log("性能采样将在引擎启动后开始")
+
+    def stop_profiling(self):
+        if self._profiler is not None:
+            self._profiler.cancel()
+
+    def toggle_profiling(self):
+        self.stop_profiling() if self.profiling else self.start_profiling()
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None and self._profiler.active
+
+    def _profile_meta(self) -> Dict[str, Any]:
+        return {
+            "profile": self.current_profile,
+            "skills": len(self.get_current_skills()),
+            "ticks": self.ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "stats": self.stats(),
+            "frame_age_ms": self.frame_age_stats(),
+            "input": self.input_stats(),
+        }
+
+    # --- 屏幕事实 ---
+    def _build_fact_providers(self):
+        """根据校准数据创建条件所需的屏幕事实读取器"""
+        bars = self.settings["bars"]
+        hp = bars.get("hp")
+        if hp:
+            try:
+                self.fact_providers[HpReader.name] = HpReader(hp)
+            except (KeyError, ValueError) as e:
+                self.on_log(f"血条校准数据无效: {e}")
+        buffs = bars.get("buffs")
+        if buffs:
+            bs = self.settings["buffs"]
+            try:
+                self.fact_providers[BuffDetector.name] = BuffDetector.from_dir(
+                    buffs, bs.get("dir", "buffs"), scale=bs.get("scale", 4),
+                    threshold=bs.get("threshold", 0.8), step=bs.get("step", 1))
+            except (KeyError, ValueError, OSError) as e:
+                self.on_log(f"buff 栏校准数据或图标无效: {e}")
+        self.invalidate_sampling()
+
     # --- 校准逻辑 ---
     def start_calibration(self):
         threading.Thread(target=self._calibration_wizard, daemon=True).start()
 
+    def start_hp_calibration(self):
+        threading.Thread(target=self._hp_calibration_wizard, daemon=True).start()
+
+    def start_buff_calibration(self):
+        threading.Thread(target=self._buff_calibration_wizard, daemon=True).start()
+
+    def _buff_calibration_wizard(self):
+        try:
+            calibrate_buffs(self.settings["bars"], self.on_log, self.on_overlay)
+            self.on_overlay("buff 栏校准完成", "#30D158")
+            self._build_fact_providers()
+            self.save()
+        except Exception as e:
+            self.on_log(f"buff 栏校准中断: {e}")
+
+    def _hp_calibration_wizard(self):
+        try:
+            calibrate_hp(self.settings["bars"], self._frame_source().grab, self.on_log, self.on_overlay)
+            self.on_overlay("血条校准完成", "#30D158")
+            self._build_fact_providers()
+            self.save()
+        except Exception as e:
+            self.on_log(f"血条校准中断: {e}")
+
     def _calibration_wizard(self):
         try:
             self.on_log(">>> 开始校准程序")
@@ -100,6 +438,7 @@ class Engine:
             calibrate(self.global_coords, self.on_log, self.on_overlay)
             
             self.on_overlay("校准完成", "#30D158")
+            self.invalidate_sampling()
             self.save()
             # 【关键】校准完，推送到 UI
             self.on_coords_update(self.global_coords)
@@ -112,32 +451,194 @@ class Engine:
         if self.running: return
         self.running = True
         self.on_status(True)
-        threading.Thread(target=self._combat_loop, daemon=True).start()
+        self._fingerprint = None
+        # 停止时界面清空了技能状态，重新启动后全部技能重新推送一次
+        self._published[:] = UNPUBLISHED
+        self._publish_due = 0.0
+        self.ticks = self.skipped_ticks = self.sampled_skills = 0
+        cs = self.settings["capture"]
+        self._capture = CaptureThread(
+            self._frame_source(), slots=cs.get("slots", 3), max_fps=cs.get("max_fps", 0),
+            on_error=lambda e: self.on_log(f"抓屏失败: {e}"),
+        )
+        self._capture.set_regions(self.capture_regions())
+        if self._stats is not None:
+            self._stats.reset()
+            self._capture.timing = self._stats.stages["capture"]
+        self._capture.start()
+        self._input = InputDispatcher(
+            self.settings["input"].get("pause_ms", 10),
+            on_error=lambda e: self.on_log(f"按键失败: {e}"),
+        )
+        self._input.start()
+        self._loop = threading.Thread(target=self._combat_loop, name="combat", daemon=True)
+        self._loop.start()
 
     def stop(self):
         self.running = False
+        if self._capture:
+            self._capture.stop()
+            self._capture = None
+        # 等战斗循环退出（它会关闭录制文件）后再拆除派发线程，避免循环线程用到已拆除的对象
+        loop, self._loop = self._loop, None
+        if loop is not None and loop is not threading.current_thread():
+            loop.join(LOOP_JOIN_TIMEOUT)
+            if not loop.is_alive():
+                self._close_recorder()
+        if self._input:
+            self._input.stop()
+            lat = self._input.latency_stats()["press"]
+            if self._input.sent:
+                self.on_log(f"按键 {self._input.sent} 次，延迟 p50 {lat['p50']:.1f} / p95 {lat['p95']:.1f} / "
+                            f"p99 {lat['p99']:.1f} ms，最大队列深度 {self._input.max_depth}")
+            self._input = None
+        if self.ticks:
+            self.on_log(f"本次共 {self.ticks} 个 tick，画面无变化跳过 {self.skipped_ticks} 个")
+            total = self.ticks * max(1, len(self.get_current_skills()))
+            self.on_log(f"技能采样 {self.sampled_skills}/{total} 次 ({self.sampled_skills * 100 // total}%)")
+        model = self._cooldowns
+        if model is not None and model.dirty:
+            model.commit()
+            self.save()
         self.on_status(False)
         self.on_overlay("READY", "#30D158")
 
     def toggle(self):
         self.stop() if self.running else self.start()
 
+    def hud_state(self) -> Optional[Tuple[tuple, np.ndarray, np.ndarray]]:
+        """
+        界面 HUD 读取的技能状态（UI 线程按帧率调用，只复制战斗循环线程维护的数组，不加锁）
+        :return: (技能名, 状态编码, 冷却进度 0~1)，就绪为 1，冷却时长未知为 NaN；未运行时为 None
+        """
+        if not self.running or self._evaluator is None:
+            return None
+        names, codes, model = self._names, self._codes.copy(), self._cooldowns
+        if len(codes) != len(names):
+            return None
+        progress = np.where(codes == READY, 1.0, np.nan)
+        if model is not None and len(model.started) == len(codes):
+            est = model.estimate
+            cd = np.flatnonzero((codes == COOLDOWN) & (est > 0) & ~np.isnan(model.started))
+            progress[cd] = np.clip((time.monotonic() - model.started[cd]) / est[cd], 0.0, 1.0)
+        return names, codes, progress
+
+    def _publish_states(self, now: float) -> bool:
+        """
+        把自上次推送以来变化的技能状态以 [(技能序号, SkillState, 时刻)] 推送给 UI
+        距上次推送不足 snapshot_ms 时先攒着，到期后合并为一次推送；无变化时不推送
+        """
+        if now < self._publish_due:
+            return False
+        changed = np.flatnonzero(self._codes != self._published)
+        if not len(changed):
+            return False
+        self._publish_due = now + self.settings["ui"].get("snapshot_ms", 100) / 1000.0
+        codes = self._codes[changed]
+        self._published[changed] = codes
+        self.on_snapshot([(int(i), state, now) for i, state in zip(changed, to_states(codes))])
+        return True
+
     def _combat_loop(self):
+        seq = 0
+        frame = None
+        pix = None
         while self.running:
-            skills = self.get_current_skills()
+            # 评估器、调度器与技能列表来自同一次构建，切换模版不会让它们错位
+            sampling = self.sampling()
+            evaluator, model, sched, conds, ctx = sampling
+            skills = evaluator.skills
             if not skills:
                 time.sleep(0.5); continue
-            
-            for s in skills:
-                s.runtime.state = evaluate_skill(s)
-            
-            self.on_snapshot([]) 
-
-            for s in skills:
-                if not self.running: break
-                if s.runtime.state == SkillState.READY:
-                    self.on_overlay(f"CAST: {s.name}", "#00ffff")
-                    pydirectinput.press(s.key.lower())
-                    time.sleep(max(s.delay, 50) / 1000.0)
-            
-            time.sleep(0.05)
\ No newline at end of file
+
+            self.capture_regions(sampling)
+            # stop() 由其他线程置空这些属性，每个 tick 只读取一次
+            cap, inp = self._capture, self._input
+
+            # 等到下一帧或下一个施放截止时刻（先到者），不轮询
+            deadline = sched.deadline()
+            timeout = IDLE_WAIT if deadline is None else min(IDLE_WAIT, max(0.0, deadline - time.monotonic()))
+            newer = cap.wait(seq, timeout) if cap else None
+            if not self.running: break
+            now = time.monotonic()
+            if self._profiler is not None:
+                self._profiler.tick(self.ticks)
+            # 关闭统计时 st 为 None，各阶段只多一次判断
+            st = self._stats
+            if st is not None:
+                t0 = time.perf_counter_ns()
+            if self._recorder is not None or self._record_request is not None:
+                self._record_begin(evaluator, sched)
+
+            if newer is not None:
+                # 抓屏在独立线程进行，这里只处理最新一帧，所有技能共享同一帧
+                frame, seq = newer, newer.seq
+                self.ticks += 1
+                # 冷却模型只挑出本帧需要采样的技能，其余技能沿用上次的像素与状态
+                due = model.due(now) if model is not None else None
+                self.sampled_skills += int(due.sum()) if due is not None else len(skills)
+                try:
+                    pix = evaluator.gather(frame, due, self._pix)
+                except Exception:
+                    pix = None
+                # 采样像素打包成字节作为指纹，与上一帧相同则画面无变化
+                fingerprint = pix.tobytes() if pix is not None else b""
+                changed = fingerprint != self._fingerprint
+                if not changed:
+                    self.skipped_ticks += 1
+                else:
+                    self._fingerprint = fingerprint
+                    if pix is not None:
+                        self._codes = evaluator.evaluate_codes(pix)
+                    else:
+                        self._codes = np.full(len(evaluator.skills), FAIL, dtype=np.int8)
+                    for s, state in zip(skills, to_states(self._codes)):
+                        s.runtime.state = state
+
+                if model is not None:
+                    model.observe(now, due, self._codes)
+                if conds:
+                    # 只为就绪且带条件的技能求值，HP / buff 在本帧首次用到时才读取
+                    ctx.reset(frame)
+                    conds.evaluate(ctx, self._codes == READY)
+
+                self.frame_age_ms = (now - frame.timestamp) * 1000.0
+                self._frame_ages.append(self.frame_age_ms)
+
+                if st is not None:
+                    st.ticks += 1
+                    t1 = time.perf_counter_ns()
+                    st.stages["evaluate"].record(t1 - t0)
+                if self._publish_states(now) and st is not None:
+                    st.stages["ui"].record(time.perf_counter_ns() - t1)
+
+            if st is not None:
+                t1 = time.perf_counter_ns()
+            cast = []
+            gate = conds.allowed if conds else None
+            sched.update(self._codes, gate)
+            i = sched.next_cast(now)
+            if st is not None:
+                st.stages["decide"].record(time.perf_counter_ns() - t1)
+            if i is not None:
+                s = skills[i]
+                if inp is not None:
+                    inp.send(s.key.lower(), i)
+                sched.cast(i, now)
+                if model is not None:
+                    model.cast(i, now)
+                cast.append(i)
+                if st is not None:
+                    t1 = time.perf_counter_ns()
+                self.on_overlay(f"CAST: {s.name}", "#00ffff")
+                if st is not None:
+                    st.stages["ui"].record(time.perf_counter_ns() - t1)
+
+            if self._recorder is not None and (newer is not None or cast):
+                self._recorder.append(now, frame, pix, self._codes, cast, gate)
+            if st is not None:
+                st.stages["tick"].record(time.perf_counter_ns() - t0)
+
+        if self._profiler is not None:
+            self._profiler.close(self.ticks)
+        self._close_recorder()
@@ -1,14 +1,36 @@
-from PIL import ImageGrab
+from typing import Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 from core.models.skill import SkillAction, SkillState
+from core.engine.capture import RegionFrame, collect_sample_points, grab, sample_key
 
-def evaluate_skill(skill: SkillAction) -> SkillState:
+def grab_frame(regions=None):
+    """抓取一帧屏幕快照；同一 tick 内所有技能共享这一帧（regions 为空时抓整屏）"""
+    return grab(regions)
+
+def sample_patch(frame, x: int, y: int, k: int = 1):
+    """取 (x, y) 处的像素；k>1 时取以其为中心的 k×k 区域均值（超出区域的部分裁掉）"""
+    if k <= 1:
+        return frame.getpixel((x, y))
+    if not isinstance(frame, RegionFrame):
+        frame = RegionFrame.from_image(frame)
+    i, lx, ly = frame.locate((x, y))
+    a = frame.array(i)
+    r = k // 2
+    box = a[max(0, ly - r):ly + r + 1, max(0, lx - r):lx + r + 1, :3].reshape(-1, 3)
+    n = len(box)
+    return tuple(int(v) for v in (box.sum(axis=0, dtype=np.int64) + n // 2) // n)
+
+def evaluate_skill_on(frame, skill: SkillAction) -> SkillState:
+    """在给定帧上评估技能状态（frame 需提供 getpixel）"""
     if not (skill.cr and skill.p11r):
         return SkillState.FAIL
 
     try:
-        grab = ImageGrab.grab()
-        c = grab.getpixel((skill.cx, skill.cy))
-        p = grab.getpixel((skill.p11x, skill.p11y))
+        c = sample_patch(frame, skill.cx, skill.cy, skill.patch)
+        p = sample_patch(frame, skill.p11x, skill.p11y, skill.patch)
 
         def near(a, b): return abs(a - b) < 30
 
@@ -19,3 +41,191 @@ def evaluate_skill(skill: SkillAction) -> SkillState:
 
     except Exception:
         return SkillState.FAIL
+
+def evaluate_skill(skill: SkillAction) -> SkillState:
+    """兼容旧接口：单独抓屏后评估一个技能"""
+    if not (skill.cr and skill.p11r):
+        return SkillState.FAIL
+
+    try:
+        frame = grab_frame()
+    except Exception:
+        return SkillState.FAIL
+    return evaluate_skill_on(frame, skill)
+
+
+# --- 批量评估 ---
+# 状态编码：与 _STATES 下标一一对应
+READY, COOLDOWN, FAIL = 0, 1, 2
+_STATES = np.array([SkillState.READY, SkillState.COOLDOWN, SkillState.FAIL], dtype=object)
+
+class BatchEvaluator:
+    """
+    向量化批量评估器
+    - 构造时把模版内所有技能的采样坐标、参考颜色编译为 NumPy 索引/数值数组
+    - 每个 tick 对每个抓取区域做一次花式索引取出全部采样像素，多个技能共用的点只读一次
+    - k×k 区域采样（SkillAction.patch）预先展开为像素索引，每个 tick 一次取出后分段求和得到均值
+    - 容差比较一次完成，返回 SkillState 数组（与 skills 顺序一致）
+    """
+
+    def __init__(self, skills: Sequence[SkillAction], tolerance: int = 30):
+        self.skills = list(skills)
+        self.tolerance = tolerance
+        self.points = collect_sample_points(self.skills)
+        index = {p: i for i, p in enumerate(self.points)}
+        key = lambda s, x, y: index[sample_key(x, y, s.patch)]
+
+        valid = [i for i, s in enumerate(self.skills) if s.cr and s.p11r]
+        self._valid = np.array(valid, dtype=np.intp)
+        # (V, 2)：每个有效技能的 [中心点, 11 点钟点] 在 points 中的下标
+        self._idx = np.array(
+            [[key(s, s.cx, s.cy), key(s, s.p11x, s.p11y)] for s in (self.skills[i] for i in valid)],
+            dtype=np.intp,
+        ).reshape(-1, 2)
+        # (V, 2, 3)：参考颜色
+        self._ref = np.array(
+            [[s.cr[:3], s.p11r[:3]] for s in (self.skills[i] for i in valid)],
+            dtype=np.int16,
+        ).reshape(-1, 2, 3)
+
+        self._layout_key = None
+        self._layout = []
+        self._missing = np.zeros(len(self.points), dtype=bool)
+        # 技能下标 -> _idx 中的行（无参考颜色的技能为 -1），用于只采样部分技能
+        self._row = np.full(len(self.skills), -1, dtype=np.intp)
+        self._row[self._valid] = np.arange(len(valid))
+
+    def _bind(self, regions):
+        """按帧的区域划分，预先算好每个区域内的局部坐标（区域不变时复用）"""
+        key = tuple(regions)
+        if key == self._layout_key:
+            return
+        layout = []
+        missing = np.ones(len(self.points), dtype=bool)
+        for ri, (l, t, r, b) in enumerate(regions):
+            pos = [i for i, p in enumerate(self.points)
+                   if missing[i] and l <= p[0] < r and t <= p[1] < b]
+            if not pos:
+                continue
+            missing[pos] = False
+            single = np.array([i for i in pos if len(self.points[i]) == 2], dtype=np.intp)
+            ys = np.array([self.points[i][1] - t for i in single], dtype=np.intp)
+            xs = np.array([self.points[i][0] - l for i in single], dtype=np.intp)
+            patches = self._bind_patches([i for i in pos if len(self.points[i]) > 2], l, t, r - l, b - t)
+            layout.append((ri, single, ys, xs, patches))
+        self._layout_key = key
+        self._layout = layout
+        self._missing = missing
+
+    def _bind_patches(self, pos, l, t, w, h):
+        if not pos:
+            return None
+        boxes = []
+        for i in pos:
+            x, y, k = self.points[i]
+            r = k // 2
+            lx, ly = x - l, y - t
+            boxes.append((max(0, ly - r), min(h, ly + r + 1), max(0, lx - r), min(w, lx + r + 1)))
+        return _PatchPlan(np.array(pos, dtype=np.intp), np.array(boxes, dtype=np.intp))
+
+    def point_mask(self, active: np.ndarray) -> np.ndarray:
+        """技能布尔掩码 -> 这些技能用到的采样点掩码 (P,)"""
+        need = np.zeros(len(self.points), dtype=bool)
+        rows = self._row[active]
+        need[self._idx[rows[rows >= 0]].ravel()] = True
+        return need
+
+    def gather(self, frame, active: Optional[np.ndarray] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        取出采样点像素 (P, 3) uint8；不在抓取区域内的点为 0
+        :param active: 技能布尔掩码，只采样这些技能用到的点（开销随需要采样的技能数增长）
+        :param out: 复用的像素缓冲，未采样的点保留上次的值
+        """
+        need = self.point_mask(active) if active is not None else None
+        take = getattr(frame, "take", None)
+        if take is not None:
+            # 只含采样点的帧（如录制回放），直接按坐标取值
+            pix, self._missing = take(self.points)
+            self._layout_key = None
+            if out is None:
+                return pix
+            if need is None:
+                out[:] = pix
+            else:
+                out[need] = pix[need]
+            return out
+        if not isinstance(frame, RegionFrame):
+            frame = RegionFrame.from_image(frame)
+        self._bind(frame.regions)
+        pix = out if out is not None else np.zeros((len(self.points), 3), dtype=np.uint8)
+        for ri, pos, ys, xs, patches in self._layout:
+            if len(pos):
+                if need is None:
+                    pix[pos] = frame.array(ri)[ys, xs, :3]
+                else:
+                    m = need[pos]
+                    if m.any():
+                        pix[pos[m]] = frame.array(ri)[ys[m], xs[m], :3]
+            # 区域内的 k×k 采样整组计算，任一点需要时整组取出
+            if patches is not None and (need is None or need[patches.pos].any()):
+                pix[patches.pos] = patches.means(*frame.pixels(ri))
+        return pix
+
+    def evaluate(self, frame) -> np.ndarray:
+        if frame is None or not len(self._valid):
+            return _STATES[np.full(len(self.skills), FAIL, dtype=np.int8)]
+        return self.evaluate_pixels(self.gather(frame))
+
+    def evaluate_pixels(self, pix: np.ndarray) -> np.ndarray:
+        """由 gather() 取出的采样像素评估全部技能"""
+        return _STATES[self.evaluate_codes(pix)]
+
+    def evaluate_codes(self, pix: np.ndarray) -> np.ndarray:
+        """同 evaluate_pixels，但返回 int8 状态编码（READY / COOLDOWN / FAIL）"""
+        codes = np.full(len(self.skills), FAIL, dtype=np.int8)
+        if not len(self._valid):
+            return codes
+
+        pix = pix.astype(np.int16)
+        vals = pix[self._idx]                                   # (V, 2, 3)
+        ok = (np.abs(vals - self._ref) < self.tolerance).all(axis=(1, 2))
+        valid_codes = np.where(ok, READY, COOLDOWN).astype(np.int8)
+        # 采样点落在区域外的技能无法判断
+        valid_codes[self._missing[self._idx].any(axis=1)] = FAIL
+        codes[self._valid] = valid_codes
+        return codes
+
+
+class _PatchPlan:
+    """
+    一个抓取区域内全部 k×k 采样的均值计划
+    - 按区域尺寸分组（贴边的区域会被截小）：同组每个区域拆成 h 段连续的 w 像素，
+      经行内滑动窗口视图一次花式索引取出全部段，每段整段复制，避免逐像素随机访问
+    - 取出的像素按区域 np.add.reduceat 分段求和；开销与 区域数×k² 成正比，不受区域之间的距离影响
+    """
+
+    def __init__(self, pos: np.ndarray, boxes: np.ndarray):
+        self.pos = pos
+        sizes = np.stack([boxes[:, 1] - boxes[:, 0], boxes[:, 3] - boxes[:, 2]], axis=1)
+        self.groups = []
+        for h, w in np.unique(sizes, axis=0):
+            sel = np.flatnonzero((sizes == (h, w)).all(axis=1))
+            rows = (boxes[sel, 0][:, None] + np.arange(h)).ravel()
+            cols = np.repeat(boxes[sel, 2], h)
+            starts = np.arange(0, len(sel) * h * w, h * w)
+            self.groups.append((sel, int(w), rows, cols, starts, int(h * w)))
+
+    def means(self, src: np.ndarray, channels) -> np.ndarray:
+        """src 为像素连续的区域数组（可带多余通道），channels 为 R/G/B 所在的通道下标"""
+        out = np.empty((len(self.pos), len(channels)), dtype=np.int32)
+        for sel, w, rows, cols, starts, area in self.groups:
+            # (H, W-w+1, w, C)：每个起点开始的一段 w 像素
+            runs = sliding_window_view(src, w, axis=1).swapaxes(2, 3)[rows, cols]
+            total = np.add.reduceat(runs.reshape(-1, src.shape[2]), starts, axis=0, dtype=np.int32)
+            out[sel] = (total[:, channels] + area // 2) // area
+        return out
+
+
+def to_states(codes: np.ndarray) -> np.ndarray:
+    """状态编码 -> SkillState 数组"""
+    return _STATES[codes]
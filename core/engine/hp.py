@@ -0,0 +1,109 @@
+# core/engine/hp.py
+"""
+血量读取
+
+校准后设置 "bars" 段的 "hp" 记录血条的一条水平扫描线：
+    {"x0": 左端, "x1": 右端, "y": 行, "fill": [r, g, b] 满血时的填充色, "tol": 容差}
+血条从左向右填充，已填充部分是一段前缀。读取时只取这一行像素，
+用向量化的多点探测逐轮缩小填充边界所在区间（每轮同时分类 PROBES 个探测点），
+轮数为 log_PROBES(宽度)，与血条宽度几乎无关
+
+用法（对截图验证读数）:
+    python -m core.engine.hp 截图.png [更多截图 ...] [--config config.json]
+"""
+import sys
+from typing import List, Optional
+
+import numpy as np
+
+from core.engine.capture import RegionFrame
+from core.engine.conditions import HP, FactProvider
+
+# 每轮探测点数
+PROBES = 8
+DEFAULT_TOL = 40
+
+
+class HpReader(FactProvider):
+    name = HP
+
+    def __init__(self, coords: dict):
+        self.x0 = int(coords["x0"])
+        self.x1 = int(coords["x1"])
+        self.y = int(coords["y"])
+        self.fill = np.array(coords.get("fill") or (0, 0, 0), dtype=np.int16)[:3]
+        self.tol = int(coords.get("tol", DEFAULT_TOL))
+        if self.x1 <= self.x0:
+            raise ValueError("HP bar needs x1 > x0")
+        self.width = self.x1 - self.x0 + 1
+        self._region = None
+
+    def regions(self) -> List[tuple]:
+        return [(self.x0, self.y, self.x1 + 1, self.y + 1)]
+
+    def _row(self, frame) -> np.ndarray:
+        """扫描线所在的一行 (width, ≥3)，不复制"""
+        if not isinstance(frame, RegionFrame):
+            frame = RegionFrame.from_image(frame)
+        # 区域下标按帧的区域划分（按值）缓存：抓屏线程的每个环形缓冲槽各有一份区域列表
+        key = tuple(frame.regions)
+        if self._region is None or self._region[0] != key:
+            for i, (l, t, r, b) in enumerate(frame.regions):
+                if l <= self.x0 and self.x1 < r and t <= self.y < b:
+                    self._region = (key, i, self.x0 - l, self.y - t)
+                    break
+            else:
+                raise IndexError("HP bar is not inside one capture region")
+        _, i, lx, ly = self._region
+        return frame.array(i)[ly, lx:lx + self.width]
+
+    def _filled(self, row: np.ndarray, xs: np.ndarray) -> np.ndarray:
+        """探测点是否为填充色；取探测点与左右相邻像素的多数，抗单像素噪点"""
+        n = len(row)
+        idx = np.stack([np.maximum(xs - 1, 0), xs, np.minimum(xs + 1, n - 1)])
+        px = row[idx, :3].astype(np.int16)
+        hit = (np.abs(px - self.fill) < self.tol).all(axis=-1)
+        return hit.sum(axis=0) >= 2
+
+    def read(self, frame) -> Optional[float]:
+        """血量百分比 0~100"""
+        row = self._row(frame)
+        # 不变式：[0, lo) 为填充，[hi, width) 为未填充；每轮在 [lo, hi) 内均匀探测，区间缩小为相邻探测点的间距
+        lo, hi = 0, self.width
+        while lo < hi:
+            xs = np.unique(np.linspace(lo, hi - 1, min(PROBES, hi - lo)).astype(np.intp))
+            miss = np.flatnonzero(~self._filled(row, xs))
+            if len(miss):
+                m = miss[0]
+                hi = int(xs[m])
+                if m:
+                    lo = int(xs[m - 1]) + 1
+            else:
+                lo = int(xs[-1]) + 1
+        return lo * 100.0 / self.width
+
+
+def read_screenshot(path: str, coords: dict) -> Optional[float]:
+    from PIL import Image
+    with Image.open(path) as img:
+        return HpReader(coords).read(RegionFrame.from_image(img.convert("RGB")))
+
+
+def main(argv=None):
+    import argparse
+    from core.config import load_settings
+    ap = argparse.ArgumentParser(description="读取截图中的血量百分比（使用配置中校准的血条）")
+    ap.add_argument("images", nargs="+")
+    ap.add_argument("--config", default="config.json")
+    args = ap.parse_args(argv)
+    hp = load_settings(args.config)["bars"].get("hp")
+    if not hp:
+        print("config has no calibrated HP bar")
+        return 1
+    for path in args.images:
+        print(f"{path}: {read_screenshot(path, hp):.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# core/engine/profiler.py
+"""
+运行时性能采样
+
+只采集战斗循环线程，不停止循环，在有限时长的窗口内记录后写入文件：
+    - cprofile：在战斗循环线程内 enable / disable cProfile，输出 .pstats（python -m pstats / snakeviz 可读）
+    - sample：独立采样线程按固定间隔读取战斗循环线程的调用栈，输出 .collapsed
+      （每行 "帧;帧;帧 次数"，flamegraph.pl / speedscope 可读），开销与调用次数无关
+每个结果附带同名 .json：模版名、窗口时长、期间的 tick 数与 Engine.stats() 快照
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+MODES = ("cprofile", "sample")
+
+
+class _StackSampler:
+    """按间隔采样指定线程的调用栈，折叠为 "a;b;c" -> 次数"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.thread_id == own:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class LoopProfiler:
+    """
+    由 UI / 热键线程调用 request() / cancel()，由战斗循环线程在每次循环开始时调用 tick()
+    profiler 的开启与关闭都在战斗循环线程内完成，写文件在后台线程进行，不阻塞循环
+    """
+
+    def __init__(self, out_dir: str = "profiles", on_log: Optional[Callable[[str], None]] = None):
+        self.out_dir = out_dir
+        self.on_log = on_log or (lambda msg: None)
+        self._request = None          # (seconds, mode, interval_ms, meta_fn)，由循环线程取走
+        self._cancel = False
+        self._active = None           # 当前窗口：dict
+
+    @property
+    def active(self) -> bool:
+        return self._active is not None or self._request is not None
+
+    def request(self, seconds: float, mode: str = "cprofile", interval_ms: float = 1.0,
+                meta: Optional[Callable[[], Dict]] = None):
+        """请求采集一个窗口；meta 在窗口开始与结束时各调用一次（由循环线程），结果写入附带的 .json"""
+        if mode not in MODES:
+            raise ValueError(f"unknown profiler mode '{mode}', expected one of {MODES}")
+        self._cancel = False
+        self._request = (seconds, mode, interval_ms, meta or (lambda: {}))
+
+    def cancel(self):
+        """提前结束当前窗口（已采集的数据照常写入）"""
+        self._request = None
+        self._cancel = True
+
+    def tick(self, ticks: int):
+        """战斗循环线程每次循环开始时调用；ticks 为引擎累计的 tick 数"""
+        act = self._active
+        if act is not None:
+            if self._cancel or time.monotonic() >= act["until"]:
+                self._cancel = False
+                self._finish(ticks)
+            return
+        req, self._request = self._request, None
+        if req is not None:
+            self._begin(ticks, *req)
+
+    def close(self, ticks: int):
+        """循环退出时调用（同样在循环线程内），结束未完成的窗口"""
+        self._request = None
+        if self._active is not None:
+            self._finish(ticks)
+
+    def _begin(self, ticks, seconds, mode, interval_ms, meta):
+        now = time.monotonic()
+        act = {"mode": mode, "start": now, "until": now + seconds, "ticks": ticks,
+               "meta": meta, "meta_start": meta(), "started_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if mode == "cprofile":
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+            act["profile"] = prof
+        else:
+            sampler = _StackSampler(threading.get_ident(), interval_ms / 1000.0)
+            sampler.start()
+            act["sampler"] = sampler
+        self._active = act
+        self.on_log(f"性能采样开始 ({mode}, {seconds:g}s)")
+
+    def _finish(self, ticks):
+        act, self._active = self._active, None
+        if "profile" in act:
+            act["profile"].disable()
+        else:
+            act["sampler"].stop()
+        elapsed = time.monotonic() - act["start"]
+        info = {
+            "mode": act["mode"],
+            "started_at": act["started_at"],
+            "seconds": elapsed,
+            "ticks": ticks - act["ticks"],
+            "ticks_per_sec": (ticks - act["ticks"]) / elapsed if elapsed > 0 else 0.0,
+            "python": platform.python_version(),
+            "before": act["meta_start"],
+            "after": act["meta"](),
+        }
+        threading.Thread(target=self._write, args=(act, info), name="profiler-writer", daemon=True).start()
+
+    def _write(self, act, info):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            profile = str(info["after"].get("profile", "") or info["before"].get("profile", "") or "engine")
+            safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in profile)
+            base = os.path.join(self.out_dir, f"{safe}_{time.strftime('%Y%m%d_%H%M%S')}_{info['mode']}")
+            if "profile" in act:
+                path = base + ".pstats"
+                act["profile"].dump_stats(path)
+            else:
+                path = base + ".collapsed"
+                act["sampler"].write(path)
+                info["samples"] = act["sampler"].samples
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(info, f, ensure_ascii=False, indent=2, default=str)
+            self.on_log(f"性能采样已保存: {path} ({info['ticks']} 个 tick)")
+        except Exception as e:
+            self.on_log(f"性能采样保存失败: {e}")
@@ -0,0 +1,289 @@
+﻿# core/engine/recorder.py
+"""
+战斗会话录制与回放
+
+文件格式（.gwrec，小端）:
+    MAGIC (8 字节) | 头部长度 u32 | 头部 JSON (utf-8) | 补齐到 8 字节
+    记录 * N，每条定长（见 record_dtype）：
+        t        f8        tick 时刻 (time.monotonic)
+        frame_t  f8        所用帧的抓取时刻，无帧时为 0
+        pixels   u1[P,3]   全部采样点像素（顺序同头部 points）
+        states   i1[S]     评估结果编码（READY / COOLDOWN / FAIL）
+        cast     u1[S]     本 tick 施放的技能
+        gate     u1[S]     施放条件是否满足（version 2 起；条件依赖的 HP / buff 无法由采样像素重算，回放直接使用）
+    可选的整帧文件（<path>.frames）：每条记录对应各抓取区域原始像素依次拼接
+
+头部 JSON 记录采样点、抓取区域、技能配置、模版名与调度参数，回放时无需原始 config.json
+定长记录使回放可以直接 np.memmap，不解析、不复制
+"""
+import json
+import os
+import struct
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from core.models.skill import SkillAction
+from core.engine.capture import FrameSource, Point, Region
+from core.engine.evaluator import BatchEvaluator
+from core.engine.scheduler import CastScheduler
+
+MAGIC = b"GW2REC\x00\x01"
+EXT = ".gwrec"
+
+
+VERSION = 2
+
+
+def record_dtype(n_points: int, n_skills: int, version: int = VERSION) -> np.dtype:
+    fields = [
+        ("t", "<f8"),
+        ("frame_t", "<f8"),
+        ("pixels", "u1", (n_points, 3)),
+        ("states", "i1", (n_skills,)),
+        ("cast", "u1", (n_skills,)),
+    ]
+    if version >= 2:
+        fields.append(("gate", "u1", (n_skills,)))
+    return np.dtype(fields)
+
+
+class SessionRecorder:
+    """
+    追加写入录制文件
+    由战斗循环线程调用 append，一个文件对应一套采样布局（评估器变化时需另开文件）
+    """
+
+    def __init__(self, path: str, evaluator: BatchEvaluator, profile: str = "",
+                 regions: Sequence[Region] = (), frames: bool = False, meta: Optional[dict] = None):
+        self.path = path
+        self.evaluator = evaluator
+        self.regions = list(regions)
+        self.count = 0
+        self.dtype = record_dtype(len(evaluator.points), len(evaluator.skills))
+        self._rec = np.zeros(1, dtype=self.dtype)
+
+        header = json.dumps({
+            "version": VERSION,
+            "profile": profile,
+            "created": time.time(),
+            "points": [list(p) for p in evaluator.points],
+            "regions": [list(r) for r in self.regions],
+            "skills": [s.to_dict() for s in evaluator.skills],
+            "frames": bool(frames),
+            **(meta or {}),
+        }, ensure_ascii=False).encode("utf-8")
+        pad = (-(len(MAGIC) + 4 + len(header))) % 8
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "wb")
+        self._f.write(MAGIC + struct.pack("<I", len(header) + pad) + header + b" " * pad)
+        self._frames_f = open(path + ".frames", "wb") if frames else None
+
+    def append(self, t: float, frame, pixels: Optional[np.ndarray], states: np.ndarray, cast: Sequence[int],
+               gate: Optional[np.ndarray] = None):
+        rec = self._rec[0]
+        rec["t"] = t
+        rec["frame_t"] = getattr(frame, "timestamp", 0.0) if frame is not None else 0.0
+        if pixels is not None:
+            rec["pixels"] = pixels
+        else:
+            rec["pixels"] = 0
+        rec["states"] = states
+        rec["cast"] = 0
+        for i in cast:
+            rec["cast"][i] = 1
+        rec["gate"] = gate if gate is not None else 1
+        self._f.write(self._rec.tobytes())
+
+        if self._frames_f is not None:
+            if frame is not None and getattr(frame, "regions", None) == self.regions:
+                for a in frame.arrays:
+                    self._frames_f.write(np.ascontiguousarray(a[:, :, :3]).tobytes())
+            else:
+                self._frames_f.write(bytes(sum((r - l) * (b - t_) * 3 for l, t_, r, b in self.regions)))
+        self.count += 1
+
+    def close(self):
+        self._f.close()
+        if self._frames_f is not None:
+            self._frames_f.close()
+
+
+class Recording:
+    """以内存映射方式打开录制文件（只读）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a recording")
+            (hlen,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(hlen).decode("utf-8").rstrip())
+        offset = len(MAGIC) + 4 + hlen
+
+        self.points: List[Point] = [tuple(p) for p in self.header["points"]]
+        self.regions: List[Region] = [tuple(r) for r in self.header.get("regions", [])]
+        self.skills = [SkillAction.from_dict(d) for d in self.header["skills"]]
+        self.version = int(self.header.get("version", 1))
+        self.dtype = record_dtype(len(self.points), len(self.skills), self.version)
+
+        n = (os.path.getsize(path) - offset) // self.dtype.itemsize
+        self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=offset, shape=(n,)) if n else \
+            np.zeros(0, dtype=self.dtype)
+
+        self.frames = None
+        frames_path = path + ".frames"
+        if self.header.get("frames") and os.path.exists(frames_path) and n:
+            size = sum((r - l) * (b - t) * 3 for l, t, r, b in self.regions)
+            self.frames = np.memmap(frames_path, dtype=np.uint8, mode="r", shape=(n, size))
+
+    def __len__(self):
+        return len(self.records)
+
+    def frame(self, i: int) -> "SampledFrame":
+        rec = self.records[i]
+        return SampledFrame(self.points, rec["pixels"], float(rec["frame_t"]), seq=i + 1)
+
+
+class SampledFrame:
+    """
+    只含采样点像素的帧（录制回放用）
+    take() 按评估器的采样点取值，点集与录制时相同则直接返回 memmap 视图
+    """
+
+    def __init__(self, points: Sequence[Point], samples: np.ndarray, timestamp: float = 0.0, seq: int = 0):
+        self.points = points
+        self.samples = samples
+        self.timestamp = timestamp
+        self.seq = seq
+        self.regions: List[Region] = []
+        self._index = None
+
+    def take(self, points: Sequence[Point]):
+        if points == self.points:
+            return self.samples, np.zeros(len(points), dtype=bool)
+        if self._index is None:
+            self._index = {p: i for i, p in enumerate(self.points)}
+        idx = np.array([self._index.get(tuple(p), -1) for p in points], dtype=np.intp)
+        missing = idx < 0
+        pix = np.asarray(self.samples)[np.where(missing, 0, idx)]
+        pix[missing] = 0
+        return pix, missing
+
+    def getpixel(self, xy: Point):
+        pix, missing = self.take([xy])
+        if missing[0]:
+            raise IndexError(f"point {xy} was not recorded")
+        return tuple(int(v) for v in pix[0])
+
+
+class RecordingFrameSource(FrameSource):
+    """
+    录制文件回放后端：内存映射录制文件，按记录顺序逐帧输出 SampledFrame
+    可直接作为 Engine / CaptureThread 的抓屏后端使用
+    """
+    name = "recording"
+
+    def __init__(self, path: str, loop: bool = False):
+        super().__init__()
+        self.recording = Recording(path)
+        self.loop = loop
+        self._pos = 0
+
+    def _next(self) -> int:
+        if self._pos >= len(self.recording):
+            if not self.loop or not len(self.recording):
+                raise EOFError("recording finished")
+            self._pos = 0
+        i = self._pos
+        self._pos += 1
+        return i
+
+    def capture(self) -> SampledFrame:
+        return self.recording.frame(self._next())
+
+    def allocate(self) -> SampledFrame:
+        return SampledFrame(self.recording.points, np.zeros((len(self.recording.points), 3), dtype=np.uint8))
+
+    def capture_into(self, frame: SampledFrame) -> SampledFrame:
+        rec = self.recording.records[self._next()]
+        frame.samples[:] = rec["pixels"]
+        frame.timestamp = time.monotonic()
+        return frame
+
+    def grab(self, regions: Sequence[Region]) -> SampledFrame:
+        return self.recording.frame(max(0, self._pos - 1))
+
+
+def replay(path: str, skills: Optional[Sequence[SkillAction]] = None) -> dict:
+    """
+    以全速确定性地回放录制：逐条记录重新评估，并以记录时刻驱动施放调度器重现施放决策，与录制时的结果比对
+    :param skills: 用于评估的技能配置，默认使用录制时的配置（传入新配置可检验改动的影响）
+    :return: 记录数、耗时、吞吐与差异统计
+    """
+    rec = Recording(path)
+    evaluator = BatchEvaluator(skills if skills is not None else rec.skills)
+    sched_state = rec.header.get("scheduler", {})
+    scheduler = CastScheduler(evaluator.skills, sched_state.get("recast_ms", 150))
+    scheduler.restore(sched_state)
+    same_layout = len(evaluator.skills) == len(rec.skills)
+    cast = np.zeros(len(evaluator.skills), dtype=bool)
+
+    state_diff = cast_diff = 0
+    t0 = time.perf_counter()
+    for i in range(len(rec)):
+        frame = rec.frame(i)
+        codes = evaluator.evaluate_codes(evaluator.gather(frame))
+        r = rec.records[i]
+        now = float(r["t"])
+        scheduler.update(codes, r["gate"].astype(bool) if rec.version >= 2 else None)
+        cast[:] = False
+        j = scheduler.next_cast(now)
+        if j is not None:
+            scheduler.cast(j, now)
+            cast[j] = True
+        if same_layout:
+            state_diff += int(np.count_nonzero(codes != r["states"]))
+            cast_diff += int(np.count_nonzero(cast != r["cast"].astype(bool)))
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "records": len(rec),
+        "seconds": elapsed,
+        "ticks_per_sec": len(rec) / elapsed if elapsed > 0 else 0.0,
+        "compared": same_layout,
+        "state_mismatches": state_diff,
+        "cast_mismatches": cast_diff,
+    }
+
+
+def main(argv=None):
+    """python -m core.engine.recorder <录制文件> [--config config.json --profile 模版名]"""
+    import argparse
+    ap = argparse.ArgumentParser(description="回放战斗录制并统计吞吐与决策差异")
+    ap.add_argument("path")
+    ap.add_argument("--config", help="使用该配置文件中的技能重新评估")
+    ap.add_argument("--profile", help="配合 --config 使用，默认取录制时的模版名")
+    args = ap.parse_args(argv)
+
+    skills = None
+    if args.config:
+        from core.config import load_config
+        _, profiles = load_config(args.config)
+        name = args.profile or Recording(args.path).header.get("profile", "")
+        skills = profiles.get(name, [])
+
+    r = replay(args.path, skills)
+    print(f"records: {r['records']}  {r['ticks_per_sec']:.0f} ticks/s  ({r['seconds'] * 1000:.1f} ms)")
+    if r["compared"]:
+        print(f"state mismatches: {r['state_mismatches']}  cast mismatches: {r['cast_mismatches']}")
+    else:
+        print("skill list differs from the recording, decisions not compared")
+    return 1 if r["compared"] and (r["state_mismatches"] or r["cast_mismatches"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+﻿# core/engine/scheduler.py
+"""
+施放调度器
+
+技能按模版中的顺序决定优先级（越靠前越优先），就绪的技能放入以 (优先级, 最早允许施放时刻) 为键的堆中：
+    - 每次施放后，技能的 delay 变为全局冷却截止时刻（GCD），期间不再施放任何技能，但评估照常进行
+    - 同一技能两次按键之间至少间隔 recast_ms，给游戏画面留出显示冷却的时间，避免重复按键
+    - deadline() 给出下一次可能施放的时刻，战斗循环据此等待，而不是轮询 sleep
+调度只依赖传入的时刻，不读时钟，录制回放时可以确定性地重现施放决策
+"""
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models.skill import SkillAction
+from core.engine.evaluator import READY
+
+# 每次施放的最短全局冷却（毫秒），与原先按键后的最短等待一致
+MIN_GCD_MS = 50
+
+
+class CastScheduler:
+    """与一个 BatchEvaluator 的技能列表一一对应，由战斗循环线程独占使用"""
+
+    def __init__(self, skills: Sequence[SkillAction], recast_ms: int = 150):
+        self.skills = list(skills)
+        n = len(self.skills)
+        self.recast = recast_ms / 1000.0
+        self.gcd_until = 0.0
+        self.earliest = np.zeros(n, dtype=np.float64)
+        self._ready = np.zeros(n, dtype=bool)
+        self._queued = np.zeros(n, dtype=bool)
+        self._heap: List[Tuple[int, float, int]] = []
+
+    def update(self, codes: np.ndarray, allowed: Optional[np.ndarray] = None):
+        """
+        用最新的评估结果刷新就绪集合；不再就绪的技能在出堆时丢弃
+        :param allowed: 施放条件的结果掩码，条件不满足的技能视为未就绪
+        """
+        self._ready = codes == READY
+        if allowed is not None:
+            self._ready &= allowed
+        for i in np.flatnonzero(self._ready & ~self._queued):
+            heapq.heappush(self._heap, (int(i), float(self.earliest[i]), int(i)))
+            self._queued[i] = True
+
+    def next_cast(self, now: float) -> Optional[int]:
+        """返回此刻应施放的技能下标：全局冷却已过、已就绪、到达最早施放时刻的技能中优先级最高者"""
+        if now < self.gcd_until:
+            return None
+        heap, deferred, chosen = self._heap, [], None
+        while heap:
+            entry = heapq.heappop(heap)
+            i = entry[2]
+            if not self._ready[i]:
+                self._queued[i] = False
+                continue
+            if entry[1] > now:
+                deferred.append(entry)
+                continue
+            self._queued[i] = False
+            chosen = i
+            break
+        for entry in deferred:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    def cast(self, i: int, now: float):
+        """记录施放：delay 变为全局冷却截止时刻，同时推迟该技能的下一次按键"""
+        gcd = max(self.skills[i].delay, MIN_GCD_MS) / 1000.0
+        self.gcd_until = now + gcd
+        self.earliest[i] = now + max(gcd, self.recast)
+
+    def deadline(self) -> Optional[float]:
+        """下一次可能施放的时刻；没有就绪技能时返回 None（只需等待新帧）"""
+        times = [t for _, t, i in self._heap if self._ready[i]]
+        if not times:
+            return None
+        return max(self.gcd_until, min(times))
+
+    def state(self) -> dict:
+        """调度器时刻状态（用于录制头部）"""
+        return {"recast_ms": self.recast * 1000, "gcd_until": self.gcd_until, "earliest": self.earliest.tolist()}
+
+    def restore(self, state: dict):
+        self.gcd_until = float(state.get("gcd_until", 0.0))
+        earliest = state.get("earliest") or []
+        if len(earliest) == len(self.earliest):
+            self.earliest[:] = earliest
@@ -0,0 +1,104 @@
+# core/engine/stats.py
+"""
+耗时统计
+
+LatencyHistogram 是固定桶的对数直方图（HDR 风格）：纳秒值按 2 的幂分段，每段再等分为 SUB 个线性子桶，
+记录为 O(1) 的整数运算，内存固定，分位数的相对误差不超过 1/SUB
+EngineStats 按阶段（抓屏 / 评估 / 决策 / UI 回调 / 整个 tick）各持有一个直方图；按键延迟由派发线程自己统计
+"""
+import math
+import time
+from typing import Dict, List
+
+SUB_BITS = 4
+SUB = 1 << SUB_BITS
+# 最大可记录 2^40 ns（约 18 分钟），更大的值计入最后一个桶
+MAX_BITS = 40
+
+STAGES = ("capture", "evaluate", "decide", "ui", "tick")
+
+
+class LatencyHistogram:
+    """单写者直方图：每个阶段只由一个线程写入，读取方拿到的是近似一致的快照"""
+
+    __slots__ = ("counts", "count", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * ((MAX_BITS - SUB_BITS + 1) * SUB)
+        self.count = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(v: int) -> int:
+        if v < SUB:
+            return v if v > 0 else 0
+        e = v.bit_length() - SUB_BITS - 1
+        return (e + 1) * SUB + (v >> e) - SUB
+
+    @staticmethod
+    def value(i: int) -> int:
+        """桶的代表值（区间中点）"""
+        if i < SUB:
+            return i
+        e = i // SUB - 1
+        return ((i % SUB + SUB) << e) + ((1 << e) >> 1)
+
+    def record(self, ns: int):
+        i = self.bucket(ns)
+        counts = self.counts
+        counts[i if i < len(counts) else -1] += 1
+        self.count += 1
+        if ns > self.max:
+            self.max = ns
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.max = 0
+
+    def percentiles(self, qs=(0.50, 0.95, 0.99)) -> List[int]:
+        counts = list(self.counts)
+        total = sum(counts)
+        result = [0] * len(qs)
+        if not total:
+            return result
+        # 按目标排名升序，单次扫描累加计数
+        targets = sorted((max(1, math.ceil(q * total)), k) for k, q in enumerate(qs))
+        acc, t = 0, 0
+        for i, c in enumerate(counts):
+            if not c:
+                continue
+            acc += c
+            while t < len(targets) and acc >= targets[t][0]:
+                result[targets[t][1]] = min(self.value(i), self.max)
+                t += 1
+            if t == len(targets):
+                break
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        """分位数与最大值（毫秒）"""
+        p50, p95, p99 = self.percentiles()
+        return {"count": self.count, "p50": p50 / 1e6, "p95": p95 / 1e6, "p99": p99 / 1e6, "max": self.max / 1e6}
+
+
+class EngineStats:
+    """引擎各阶段的耗时直方图与 tick 计数"""
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in STAGES}
+        self.ticks = 0
+        self.started = time.monotonic()
+
+    def reset(self):
+        for h in self.stages.values():
+            h.reset()
+        self.ticks = 0
+        self.started = time.monotonic()
+
+    def snapshot(self) -> Dict[str, object]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "ticks_per_sec": self.ticks / elapsed if elapsed > 0 else 0.0,
+            "stages": {name: h.summary() for name, h in self.stages.items() if h.count},
+        }
@@ -0,0 +1,88 @@
+# core/hotkeys.py
+"""
+全局热键服务
+
+由 keyboard 库的系统键盘钩子事件驱动（keyboard.add_hotkey）：没有轮询线程，空闲时不唤醒。
+钩子线程里只做去重并调用 post(动作名) 投递出去（界面中为发往 UI 线程的信号），
+由接收方调用 dispatch(动作名) 执行回调；回调（如停止引擎需等待线程退出）不会阻塞系统键盘钩子。
+未提供 post 时回调在钩子线程中直接执行，只应做很快的事
+
+绑定来自 config.json 的 "hotkeys" 段：动作名 -> 按键组合（如 "f8"、"ctrl+shift+r"），空字符串表示不绑定
+按住不放时系统会重复发送按下事件，同一动作 REPEAT_MS 内只触发一次
+"""
+import time
+from typing import Callable, Dict, Optional
+
+import keyboard
+
+# 同一动作两次触发的最短间隔（毫秒），过滤按住时的自动重复
+REPEAT_MS = 250
+
+
+class HotkeyService:
+
+    def __init__(self, on_error: Optional[Callable[[str], None]] = None, repeat_ms: int = REPEAT_MS,
+                 post: Optional[Callable[[str], None]] = None):
+        """:param post: 把触发的动作名交给执行线程（须线程安全，如 Qt 信号的 emit），为 None 时在钩子线程直接执行"""
+        self.on_error = on_error or (lambda msg: None)
+        self.repeat = repeat_ms / 1000.0
+        self.post = post or self.dispatch
+        self.bindings: Dict[str, str] = {}
+        self._handles: Dict[str, object] = {}
+        self._callbacks: Dict[str, Callable[[], None]] = {}
+        self._last: Dict[str, float] = {}
+
+    def bind(self, action: str, combo: str, callback: Callable[[], None]) -> bool:
+        """绑定一个动作（已绑定的先解除），combo 为空时只解除"""
+        self.unbind(action)
+        if not combo:
+            return False
+        try:
+            self._handles[action] = keyboard.add_hotkey(combo, self._fire, args=(action,))
+        except (ValueError, ImportError, OSError) as e:
+            self.on_error(f"热键 {action} = '{combo}' 注册失败: {e}")
+            return False
+        self.bindings[action] = combo
+        self._callbacks[action] = callback
+        return True
+
+    def register(self, bindings: Dict[str, str], actions: Dict[str, Callable[[], None]]):
+        """按配置批量绑定；配置里没有对应动作的项忽略并提示"""
+        for action, combo in bindings.items():
+            callback = actions.get(action)
+            if callback is None:
+                self.on_error(f"未知的热键动作: {action}")
+                continue
+            self.bind(action, combo, callback)
+
+    def unbind(self, action: str):
+        handle = self._handles.pop(action, None)
+        self.bindings.pop(action, None)
+        self._callbacks.pop(action, None)
+        if handle is not None:
+            try:
+                keyboard.remove_hotkey(handle)
+            except (KeyError, ValueError):
+                pass
+
+    def clear(self):
+        for action in list(self._handles):
+            self.unbind(action)
+
+    def _fire(self, action: str):
+        """钩子线程：过滤自动重复后投递，不执行回调"""
+        now = time.monotonic()
+        if now - self._last.get(action, -self.repeat) < self.repeat:
+            return
+        self._last[action] = now
+        self.post(action)
+
+    def dispatch(self, action: str):
+        """执行动作的回调（在 post 投递到的线程中调用）；投递后已解除绑定的动作忽略"""
+        callback = self._callbacks.get(action)
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            self.on_error(f"热键 {action} 执行失败: {e}")
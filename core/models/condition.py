@@ -1,17 +1,54 @@
-﻿from dataclasses import dataclass
+﻿from dataclasses import dataclass, field
 from enum import Enum
+from typing import List
 
 class ConditionType(Enum):
     ALWAYS = "ALWAYS"
     HP_BELOW = "HP_BELOW"
     BUFF_ACTIVE = "BUFF_ACTIVE"
+    # 组合条件：children 为子条件
+    AND = "AND"
+    OR = "OR"
+    NOT = "NOT"
 
 @dataclass
 class Condition:
     type: ConditionType
     value: float | str | None = None
+    children: List["Condition"] = field(default_factory=list)
 
     def evaluate(self, context) -> bool:
+        """
+        直接解释执行（引擎使用 core.engine.conditions.compile_condition 编译后的版本）
+        context 需提供 hp_percent() -> float | None 与 buff_active(name) -> bool
+        """
         if self.type == ConditionType.ALWAYS:
             return True
+        if self.type == ConditionType.HP_BELOW:
+            hp = context.hp_percent()
+            return hp is not None and hp < float(self.value)
+        if self.type == ConditionType.BUFF_ACTIVE:
+            return context.buff_active(str(self.value))
+        if self.type == ConditionType.AND:
+            return all(c.evaluate(context) for c in self.children)
+        if self.type == ConditionType.OR:
+            return any(c.evaluate(context) for c in self.children)
+        if self.type == ConditionType.NOT:
+            return not all(c.evaluate(context) for c in self.children)
         return False
+
+    def to_dict(self):
+        d = {"type": self.type.value}
+        if self.value is not None:
+            d["value"] = self.value
+        if self.children:
+            d["children"] = [c.to_dict() for c in self.children]
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            type=ConditionType(d["type"]),
+            value=d.get("value"),
+            children=[cls.from_dict(c) for c in d.get("children", [])],
+        )
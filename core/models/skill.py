@@ -2,6 +2,8 @@
 from enum import Enum
 from typing import Optional, Tuple, List
 
+from .condition import Condition
+
 RGB = Tuple[int, int, int]
 
 class SkillState(Enum):
@@ -28,6 +30,12 @@ class SkillAction:
     p11y: int = 0
     p11r: Optional[RGB] = None
 
+    # 采样方式：1 为单像素；k>1 时取以采样点为中心的 k×k 区域均值（cr/p11r 同样是均值）
+    patch: int = 1
+
+    # 引擎学习到的冷却时长（毫秒），0 表示尚未学习
+    cooldown: int = 0
+
     runtime: SkillRuntimeState = field(default_factory=SkillRuntimeState)
     conditions: List["Condition"] = field(default_factory=list)
 
@@ -42,6 +50,9 @@ class SkillAction:
             "p11x": self.p11x,
             "p11y": self.p11y,
             "p11r": list(self.p11r) if self.p11r else None,
+            "patch": self.patch,
+            "cooldown": self.cooldown,
+            "conditions": [c.to_dict() for c in self.conditions],
         }
 
     @classmethod
@@ -56,4 +67,7 @@ class SkillAction:
             p11x=d.get("p11x", 0),
             p11y=d.get("p11y", 0),
             p11r=tuple(d["p11r"]) if d.get("p11r") else None,
+            patch=max(1, int(d.get("patch", 1) or 1)),
+            cooldown=max(0, int(d.get("cooldown", 0) or 0)),
+            conditions=[Condition.from_dict(c) for c in d.get("conditions") or []],
         )
@@ -0,0 +1,215 @@
+# core/profile_store.py
+"""
+SQLite 模版库（可选）
+
+config.json 的 "store" 段设置 "profiles": "profiles.db"（相对 config.json 所在目录）后，
+load_config / save_config 改为读写该文件，config.json 只保留校准数据与设置：
+    - 表 profiles(name 主键, position 顺序, skills 技能列表 JSON)
+    - load_config 只读出模版名索引，返回 LazyProfiles；某个模版第一次被访问时才解析并构造 SkillAction
+    - save_config 只写出已加载且内容变化的模版（与读出 / 上次写入时的 JSON 文本比较）以及被删除的模版
+启动耗时与内存只与用到的模版数量有关，与模版库大小无关
+
+从 config.json 一次性导入（原文件备份为 config.json.bak）:
+    python -m core.profile_store config.json [profiles.db]
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List
+
+from core.models.skill import SkillAction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    skills TEXT NOT NULL
+);
+"""
+
+_stores: Dict[str, "ProfileStore"] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str) -> "ProfileStore":
+    """按绝对路径复用同一个连接（load_config 与 save_config、UI 与后台写线程共享）"""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ProfileStore(path)
+        return store
+
+
+def _dumps(skills) -> str:
+    return json.dumps([s.to_dict() if hasattr(s, "to_dict") else s for s in skills], ensure_ascii=False)
+
+
+class ProfileStore:
+    """单个 SQLite 文件，连接可跨线程使用，所有访问经同一把锁串行化"""
+
+    def __init__(self, path: str):
+        self.path = path
+        import sqlite3  # 只有启用模版库时才导入
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT name FROM profiles ORDER BY position, rowid")]
+
+    def read(self, name: str) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT skills FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def write(self, changes: Dict[str, str], deleted: Iterable[str] = ()):
+        """一个事务内写入变化的模版（JSON 文本）并删除 deleted；新模版排在末尾"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM profiles WHERE name = ?", [(n,) for n in deleted])
+            for name, text in changes.items():
+                self._conn.execute(
+                    "INSERT INTO profiles (name, position, skills) "
+                    "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM profiles), ?) "
+                    "ON CONFLICT(name) DO UPDATE SET skills = excluded.skills",
+                    (name, text),
+                )
+
+    def save_all(self, profiles) -> int:
+        """写入一个普通的 {模版名: 技能列表}，只写与库中不同的模版，并删除库中多余的模版"""
+        changes = {}
+        for name, skills in profiles.items():
+            text = _dumps(skills)
+            try:
+                same = self.read(name) == text
+            except KeyError:
+                same = False
+            if not same:
+                changes[name] = text
+        deleted = [n for n in self.names() if n not in profiles]
+        self.write(changes, deleted)
+        return len(changes)
+
+    def profiles(self) -> "LazyProfiles":
+        return LazyProfiles(self)
+
+    def close(self):
+        with _stores_lock:
+            _stores.pop(self.path, None)
+        with self._lock:
+            self._conn.close()
+
+
+class LazyProfiles(MutableMapping):
+    """
+    模版名 -> 技能列表 的惰性映射：键来自索引，值在第一次访问时才从库中读出
+    对返回的列表原地增删改会在 commit() 时通过 JSON 文本比较发现
+    """
+
+    def __init__(self, store: ProfileStore):
+        self.store = store
+        self._names = store.names()
+        self._index = set(self._names)
+        self._loaded: Dict[str, list] = {}
+        self._saved: Dict[str, str] = {}
+        self._deleted = set()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        skills = self._loaded.get(name)
+        if skills is not None:
+            return skills
+        if name not in self._index:
+            raise KeyError(name)
+        text = self.store.read(name)
+        skills = [SkillAction.from_dict(d) for d in json.loads(text)]
+        self._loaded[name] = skills
+        self._saved[name] = text
+        return skills
+
+    def __setitem__(self, name, skills):
+        if name not in self._index:
+            self._names.append(name)
+            self._index.add(name)
+            self._deleted.discard(name)
+        self._loaded[name] = skills
+
+    def __delitem__(self, name):
+        if name not in self._index:
+            raise KeyError(name)
+        self._names.remove(name)
+        self._index.discard(name)
+        self._loaded.pop(name, None)
+        self._saved.pop(name, None)
+        self._deleted.add(name)
+
+    def loaded(self) -> List[str]:
+        return list(self._loaded)
+
+    def commit(self) -> int:
+        """只写出已加载且内容变化的模版与删除的模版，返回写入的模版数"""
+        changes = {}
+        for name, skills in list(self._loaded.items()):
+            text = _dumps(list(skills))
+            if text != self._saved.get(name):
+                changes[name] = text
+        deleted = set(self._deleted)
+        if changes or deleted:
+            self.store.write(changes, deleted)
+            self._saved.update(changes)
+            self._deleted -= deleted
+        return len(changes)
+
+
+def import_json(config_path: str, db_path: str = "") -> int:
+    """
+    把 config.json 中的 profiles 一次性导入 SQLite 模版库，并改写 config.json：
+    删除 profiles 段、写入 "store": {"profiles": db 路径}；原文件备份为 .bak
+    :return: 导入的模版数
+    """
+    from core.config import _read_json, _write_atomic
+    data = _read_json(config_path)
+    if data is None:
+        raise ValueError(f"cannot read '{config_path}'")
+    base = os.path.dirname(os.path.abspath(config_path))
+    db_path = db_path or os.path.join(base, "profiles.db")
+    profiles = data.pop("profiles", {}) or {}
+
+    store = open_store(db_path)
+    store.write({name: json.dumps(skills, ensure_ascii=False) for name, skills in profiles.items()})
+
+    shutil.copyfile(config_path, config_path + ".bak")
+    rel = os.path.relpath(os.path.abspath(db_path), base)
+    data.setdefault("store", {})["profiles"] = rel
+    _write_atomic(config_path, data)
+    return len(profiles)
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="把 config.json 中的模版导入 SQLite 模版库")
+    ap.add_argument("config")
+    ap.add_argument("db", nargs="?", default="")
+    args = ap.parse_args(argv)
+    n = import_json(args.config, args.db)
+    print(f"imported {n} profiles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""测试从仓库根目录导入 core.*（仓库没有打包配置）"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,84 @@
+# tests/test_buffs.py
+"""
+BuffDetector：在合成 buff 栏中找出贴入的模版图标
+"""
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.config import load_config, load_settings
+from core.engine.buffs import BuffDetector
+from core.engine.capture import RegionFrame
+
+ICON = 32
+RECT = {"x0": 100, "y0": 50, "x1": 100 + 12 * ICON, "y1": 50 + ICON}
+REGION = (90, 40, RECT["x1"] + 10, RECT["y1"] + 10)
+
+
+def _icon(seed: int) -> np.ndarray:
+    """带纹理的图标：4×4 的色块再放大，降采样后仍可区分"""
+    rng = np.random.default_rng(seed)
+    return np.kron(rng.integers(0, 256, (4, 4, 3)), np.ones((ICON // 4, ICON // 4, 1))).astype(np.uint8)
+
+
+@pytest.fixture
+def icons(tmp_path):
+    """buff 目录（每个图标一个 png）与各图标的像素"""
+    pixels = {}
+    for seed, name in enumerate(("Might", "Fury", "Quickness")):
+        pixels[name] = _icon(seed)
+        Image.fromarray(pixels[name]).save(tmp_path / f"{name}.png")
+    return tmp_path, pixels
+
+
+def _frame(placed) -> RegionFrame:
+    """buff 栏为带轻微噪声的暗色背景，placed 为 [(图标, 相对 buff 栏左端的 x)]"""
+    l, t, r, b = REGION
+    rng = np.random.default_rng(99)
+    a = rng.integers(20, 28, (b - t, r - l, 3)).astype(np.uint8)
+    for icon, x in placed:
+        y0, x0 = RECT["y0"] - t, RECT["x0"] - l + x
+        a[y0:y0 + ICON, x0:x0 + ICON] = icon
+    return RegionFrame([REGION], [a])
+
+
+def test_finds_pasted_icons(icons):
+    directory, px = icons
+    det = BuffDetector.from_dir(RECT, str(directory), scale=4, threshold=0.8)
+    assert det.names == ["Fury", "Might", "Quickness"]
+
+    # 起点不在降采样网格上（97 不是 4 的倍数）
+    assert det.read(_frame([(px["Might"], 97), (px["Quickness"], 230)])) == {"Might", "Quickness"}
+    scores = dict(zip(det.names, det.last_scores))
+    assert scores["Might"] > 0.95 and scores["Quickness"] > 0.95
+    assert scores["Fury"] < 0.8
+
+
+def test_empty_bar(icons):
+    directory, _ = icons
+    det = BuffDetector.from_dir(RECT, str(directory))
+    assert det.read(_frame([])) == frozenset()
+
+
+def test_region_cache_by_value(icons):
+    # 抓屏线程的每个缓冲槽各有一份区域列表：内容相同就应复用缓存的区域下标
+    directory, px = icons
+    det = BuffDetector.from_dir(RECT, str(directory))
+    det.read(_frame([]))
+    cached = det._region
+    assert det.read(_frame([(px["Fury"], 0)])) == {"Fury"}
+    assert det._region is cached
+
+
+def test_legacy_bar_migrates(tmp_path):
+    # 旧版写在 global_coords["BUFFS"] 中：load_config 不再把它当作技能槽位，load_settings 迁移到 "bars" 段
+    path = tmp_path / "config.json"
+    slot = {"cx": 1, "cy": 2, "p11x": 3, "p11y": 4}
+    rect = dict(RECT, icon=ICON)
+    legacy = dict(rect, cx=RECT["x0"], cy=RECT["y0"])
+    path.write_text(json.dumps({"global_coords": {"1": slot, "BUFFS": legacy}, "profiles": {}}), encoding="utf-8")
+    gc, _ = load_config(str(path))
+    assert gc == {"1": slot}
+    assert load_settings(str(path))["bars"]["buffs"] == rect
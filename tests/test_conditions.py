@@ -0,0 +1,130 @@
+# tests/test_conditions.py
+"""
+编译后的施放条件：与 Condition.evaluate 解释执行结果一致；每个 tick 每种事实至多读取一次
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from core.models.condition import Condition, ConditionType
+from core.models.skill import SkillAction
+from core.engine.conditions import BUFFS, HP, ConditionSet, FactProvider, TickContext, compile_condition
+
+T = ConditionType
+
+
+def hp(v):
+    return Condition(T.HP_BELOW, v)
+
+
+def buff(name):
+    return Condition(T.BUFF_ACTIVE, name)
+
+
+def node(kind, *children):
+    return Condition(kind, children=list(children))
+
+
+ALWAYS = Condition(T.ALWAYS)
+
+TREES = [
+    ALWAYS,
+    hp(50),
+    buff("Might"),
+    node(T.AND, hp(50), buff("Might")),
+    node(T.OR, hp(30), node(T.OR, buff("Fury"), buff("Might"))),
+    node(T.AND, node(T.AND, hp(80), ALWAYS), node(T.NOT, buff("Fury"))),
+    node(T.OR, ALWAYS, buff("Fury")),
+    node(T.NOT, hp(50), buff("Might")),
+    node(T.AND),
+    node(T.OR),
+    node(T.NOT),
+]
+
+# (HP 百分比, 已激活 buff)；None 表示读取不到
+WORLDS = list(itertools.product([None, 20.0, 60.0, 100.0], [None, frozenset(), {"Might"}, {"Might", "Fury"}]))
+
+
+class Fixed(FactProvider):
+    def __init__(self, name, value):
+        self.name, self.value, self.reads = name, value, 0
+
+    def read(self, frame):
+        self.reads += 1
+        return self.value
+
+
+class Broken(FactProvider):
+    name = HP
+
+    def read(self, frame):
+        raise IndexError("bar outside regions")
+
+
+def _ctx(hp_value, buffs):
+    providers = {}
+    if hp_value is not None:
+        providers[HP] = Fixed(HP, hp_value)
+    if buffs is not None:
+        providers[BUFFS] = Fixed(BUFFS, frozenset(buffs))
+    ctx = TickContext(providers)
+    ctx.reset(object())
+    return ctx
+
+
+@pytest.mark.parametrize("tree", TREES, ids=lambda c: str(c.to_dict()))
+def test_compiled_matches_interpreter(tree):
+    pred = compile_condition(tree)
+    for hp_value, buffs in WORLDS:
+        ctx = _ctx(hp_value, buffs)
+        assert pred(ctx) == tree.evaluate(ctx), (hp_value, buffs)
+
+
+def test_facts_read_once_per_tick():
+    # 多个技能引用同一事实：每个 tick 只读取一次，新的一帧重新读取
+    skills = [SkillAction(f"s{i}", str(i), 0, conditions=[node(T.AND, hp(90 - i), buff("Might"))])
+              for i in range(8)]
+    cs = ConditionSet(skills)
+    hp_p, buff_p = Fixed(HP, 50.0), Fixed(BUFFS, frozenset({"Might"}))
+    ctx = TickContext({HP: hp_p, BUFFS: buff_p})
+    ctx.reset(object())
+    assert cs.evaluate(ctx, np.ones(8, dtype=bool)).all()
+    assert (hp_p.reads, buff_p.reads) == (1, 1)
+    ctx.reset(object())
+    cs.evaluate(ctx, np.ones(8, dtype=bool))
+    assert (hp_p.reads, buff_p.reads) == (2, 2)
+
+
+def test_condition_set_skips_unconditional_skills():
+    skills = [
+        SkillAction("plain", "1", 0),
+        SkillAction("always", "2", 0, conditions=[ALWAYS]),
+        SkillAction("low", "3", 0, conditions=[hp(30)]),
+        SkillAction("both", "4", 0, conditions=[hp(80), buff("Fury")]),
+    ]
+    cs = ConditionSet(skills)
+    assert cs.index == [2, 3]
+    assert cs.facts == {HP, BUFFS}
+    allowed = cs.evaluate(_ctx(50.0, {"Fury"}), np.ones(4, dtype=bool))
+    assert allowed.tolist() == [True, True, False, True]
+
+
+def test_only_candidates_are_evaluated():
+    # 不在 candidates 中的技能不求值、不触发读取，保持上次的结果
+    cs = ConditionSet([SkillAction("low", "1", 0, conditions=[hp(30)]),
+                       SkillAction("buffed", "2", 0, conditions=[buff("Might")])])
+    provider = Fixed(HP, 10.0)
+    ctx = TickContext({HP: provider})
+    ctx.reset(object())
+    allowed = cs.evaluate(ctx, np.array([False, True]))
+    assert provider.reads == 0
+    assert allowed.tolist() == [True, False]
+
+
+def test_failed_read_counts_as_unknown():
+    ctx = TickContext({HP: Broken()})
+    ctx.reset(object())
+    assert compile_condition(hp(50))(ctx) is False
+    assert compile_condition(node(T.NOT, hp(50)))(ctx) is True
+    assert ctx.reads == 1
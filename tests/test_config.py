@@ -0,0 +1,106 @@
+# tests/test_config.py
+"""
+ConfigWriter：连续修改合并为一次写入、flush 立即写出、写入失败时原文件保持完整
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from core.config import ConfigWriter, load_config, load_settings, save_config
+from core.models.skill import SkillAction
+
+
+class State:
+    """模拟引擎的配置状态：snapshot 返回当前内容并计数"""
+
+    def __init__(self):
+        self.coords = {"1": {"cx": 1, "cy": 2, "p11x": 3, "p11y": 4}}
+        self.profiles = {"main": [SkillAction("s0", "1", 100)]}
+        self.settings = load_settings("does-not-exist.json")
+        self.snapshots = 0
+
+    def snapshot(self):
+        self.snapshots += 1
+        return dict(self.coords), {k: list(v) for k, v in self.profiles.items()}, self.settings
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "config.json")
+    state = State()
+    saved, errors = threading.Event(), []
+    w = ConfigWriter(path, state.snapshot, delay_ms=50, on_saved=saved.set, on_error=errors.append)
+    yield w, state, saved, errors
+    w.close()
+
+
+def test_debounce_coalesces_writes(writer):
+    w, state, saved, errors = writer
+    for i in range(10):
+        state.profiles["main"][0] = SkillAction("s0", "1", 100 + i)
+        w.schedule()
+        time.sleep(0.01)
+    # 最后一次修改后 delay_ms 内不写
+    assert w.writes == 0
+    assert saved.wait(2.0)
+    time.sleep(0.1)
+    assert (w.writes, state.snapshots, errors) == (1, 1, [])
+    _, profiles = load_config(w.path)
+    assert profiles["main"][0].delay == 109
+
+
+def test_flush_writes_immediately(writer):
+    w, state, saved, errors = writer
+    w.delay = 10.0
+    w.schedule()
+    assert w.pending
+    assert w.flush() is True
+    assert not w.pending and w.writes == 1
+    assert os.path.exists(w.path)
+    # 已经写出，后台线程与再次 flush 都不会重复写
+    assert w.flush() is False
+    w.delay = 0.0
+    time.sleep(0.1)
+    assert w.writes == 1
+
+
+def test_failed_write_keeps_original(writer, tmp_path):
+    w, state, saved, errors = writer
+    w.schedule()
+    assert w.flush()
+    with open(w.path, "rb") as f:
+        before = f.read()
+    assert before.startswith(b"\xef\xbb\xbf")
+    # 不能序列化的设置：写到一半失败
+    state.settings = dict(state.settings, bad=object())
+    w.schedule()
+    assert w.flush() is False
+    assert len(errors) == 1 and isinstance(errors[0], TypeError)
+    with open(w.path, "rb") as f:
+        assert f.read() == before
+    assert sorted(os.listdir(tmp_path)) == ["config.json"]
+
+
+def test_concurrent_saves_use_separate_temp_files(tmp_path):
+    # 多个线程同时原子写同一文件：每次写入各自的临时文件，最终文件完整可读
+    path = str(tmp_path / "config.json")
+    profiles = {"main": [SkillAction(f"s{i}", str(i), i) for i in range(50)]}
+    errors = []
+
+    def save():
+        try:
+            for _ in range(10):
+                save_config(path, {}, profiles, {})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(load_config(path)[1]["main"]) == 50
+    assert sorted(os.listdir(tmp_path)) == ["config.json"]
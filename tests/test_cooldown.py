@@ -0,0 +1,101 @@
+# tests/test_cooldown.py
+"""
+CooldownModel：只从完整的 施放/就绪 -> 冷却 -> 就绪 周期学习冷却时长，并据此稀疏采样
+"""
+import numpy as np
+import pytest
+
+from core.models.skill import SkillAction
+from core.engine.cooldown import CooldownModel
+from core.engine.evaluator import COOLDOWN, FAIL, READY
+
+TICK = 0.05
+
+
+def _model(n=1, cooldown=0, **kw):
+    return CooldownModel([SkillAction(f"s{i}", str(i + 1), 0, cooldown=cooldown) for i in range(n)], **kw)
+
+
+def _run(model, states, t0=0.0):
+    """按 TICK 逐 tick 观察 states（每个 tick 一个状态编码，只有一个技能）；返回结束时刻"""
+    t = t0
+    for code in states:
+        t += TICK
+        due = model.due(t)
+        model.observe(t, due, np.array([code], dtype=np.int8))
+    return t
+
+
+def test_learns_from_cast_cycle():
+    model = _model()
+    t = _run(model, [READY] * 3)
+    model.cast(0, t)
+    # 施放后 1 个 tick 进入冷却，冷却 40 个 tick（2 秒）后就绪
+    _run(model, [COOLDOWN] * 40 + [READY], t)
+    assert model.samples[0] == 1
+    assert model.estimate[0] == pytest.approx(40 * TICK + TICK / 2, abs=TICK)
+    assert model.dirty
+    model.commit()
+    assert model.skills[0].cooldown == int(round(model.estimate[0] * 1000))
+    assert not model.dirty
+
+
+def test_manual_cast_starts_at_ready_edge():
+    # 没有施放记录（手动施放）：从就绪转入冷却的时刻为起点
+    model = _model()
+    _run(model, [READY] * 3 + [COOLDOWN] * 20 + [READY])
+    assert model.samples[0] == 1
+    assert model.estimate[0] == pytest.approx(20 * TICK, abs=TICK)
+
+
+def test_skips_cycle_already_cooling_at_start():
+    # 启动时技能已在冷却中：起点未知，第一次就绪不计入估计，也不写回配置
+    model = _model(cooldown=1234)
+    _run(model, [COOLDOWN] * 10 + [READY])
+    assert model.samples[0] == 0
+    assert model.estimate[0] == pytest.approx(1.234)
+    assert not model.dirty
+    model.skills[0].cooldown = 999
+    model.commit()
+    assert model.skills[0].cooldown == 999
+
+
+def test_stale_cast_does_not_start_unknown_cycle():
+    # 很久以前的施放记录不能作为冷却起点
+    model = _model()
+    model.cast(0, 0.0)
+    _run(model, [FAIL] * 40 + [COOLDOWN] * 10 + [READY])
+    assert model.samples[0] == 0
+    assert model.estimate[0] == 0
+
+
+def test_short_cooldown_ignored():
+    # 短于 MIN_COOLDOWN 的冷却视为公共冷却 / 抖动
+    model = _model()
+    _run(model, [READY, COOLDOWN, READY])
+    assert model.samples[0] == 0
+    assert model.estimate[0] == 0
+
+
+def test_sparse_polling_until_lead():
+    # 已知 2 秒冷却：冷却开始后每 slow_ms 采样一次，距预计就绪不足 lead_ms 时每个 tick 采样
+    model = _model(cooldown=2000, slow_ms=500, lead_ms=300)
+    t = _run(model, [READY])
+    model.cast(0, t)
+    t += TICK
+    model.observe(t, model.due(t), np.array([COOLDOWN], dtype=np.int8))
+    assert model.next_poll[0] == pytest.approx(t + 0.5)
+    assert not model.due(t + 0.25)[0]
+    # 预计 t0 + 2.0 就绪，提前 0.3 秒恢复逐 tick 采样
+    start = model.started[0]
+    polls = []
+    while t < start + 2.0:
+        t += TICK
+        if model.due(t)[0]:
+            polls.append(t)
+            model.observe(t, np.array([True]), np.array([COOLDOWN], dtype=np.int8))
+    sparse = [p for p in polls if p < start + 2.0 - 0.3 - 1e-9]
+    assert len(sparse) <= 4
+    assert all(b - a <= 0.5 + 1e-9 for a, b in zip(polls, polls[1:]))
+    dense = [p for p in polls if p >= start + 2.0 - 0.3 + TICK]
+    assert len(dense) >= 0.3 / TICK - 2
@@ -0,0 +1,163 @@
+# tests/test_engine.py
+"""
+完整的 Engine（抓屏线程 + 战斗循环 + 按键派发线程），抓屏后端为计数的合成画面
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks import _stubs
+
+_stubs.install()
+
+from core.config import save_config  # noqa: E402
+from core.engine.capture import FrameSource, RegionFrame  # noqa: E402
+from core.engine.engine import Engine  # noqa: E402
+from core.models.skill import SkillAction, SkillState  # noqa: E402
+
+N_SKILLS = 6
+WIDTH, HEIGHT = 40 * N_SKILLS, 40
+
+
+def _screen() -> np.ndarray:
+    """第 i 个技能图标中心为 (200, 10i, 0)，11 点钟位置为 (0, 10i, 200)"""
+    a = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for i in range(N_SKILLS):
+        a[30, 40 * i + 20] = (200, 10 * i, 0)
+        a[10, 40 * i + 5] = (0, 10 * i, 200)
+    return a
+
+
+def _skills():
+    # 偶数技能的参考色与画面一致（就绪），奇数技能不一致（冷却中）
+    return [SkillAction(f"s{i}", str(i + 1), 60, cx=40 * i + 20, cy=30,
+                        cr=(200, 10 * i, 0) if i % 2 == 0 else (255, 255, 255),
+                        p11x=40 * i + 5, p11y=10, p11r=(0, 10 * i, 200))
+            for i in range(N_SKILLS)]
+
+
+EXPECTED = [SkillState.READY if i % 2 == 0 else SkillState.COOLDOWN for i in range(N_SKILLS)]
+
+
+class CountingSource(FrameSource):
+    """
+    合成画面的抓屏后端，记录抓取次数
+    gated 为 True 时每次抓取先等待 release() 放行一帧，测试可以逐帧推进战斗循环
+    """
+    name = "counting"
+
+    def __init__(self, gated: bool = False):
+        super().__init__()
+        self.screen = _screen()
+        self.grabs = 0
+        self.gated = gated
+        self._tokens = threading.Semaphore(0)
+        self.closed = False
+
+    def release(self, n: int = 1):
+        for _ in range(n):
+            self._tokens.release()
+
+    def grab(self, regions):
+        if self.gated:
+            while not self._tokens.acquire(timeout=0.02):
+                if self.closed:
+                    raise EOFError("source closed")
+        self.grabs += 1
+        arrays = [self.screen[t:b, l:r].copy() for l, t, r, b in regions]
+        return RegionFrame(regions, arrays, time.monotonic())
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def make(source, profiles=None, **callbacks):
+        path = str(tmp_path / "config.json")
+        save_config(path, {}, profiles or {"test": _skills()}, {
+            "capture": {"slots": 3, "max_fps": 200},
+            "input": {"pause_ms": 0},
+            "ui": {"snapshot_ms": 0},
+        })
+        engine = Engine(path, **callbacks)
+        engine.set_profile("test")
+        engine.frame_source = source
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.frame_source.close()
+        engine.stop()
+        engine.flush()
+
+
+def _wait(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_one_grab_per_tick(make_engine):
+    # 抓屏线程每放行一帧抓取一次，战斗循环处理这一帧并评估全部 N 个技能：每个 tick 恰好一次抓屏
+    source = CountingSource(gated=True)
+    engine = make_engine(source)
+    engine.start()
+    for tick in range(1, 6):
+        source.release()
+        assert _wait(lambda: engine.ticks == tick), f"tick {tick}"
+        assert source.grabs == tick
+        assert list(engine.evaluator().evaluate_pixels(engine._pix)) == EXPECTED
+    assert engine.ticks == source.grabs == 5
+
+
+def test_restart_publishes_all_states_again(make_engine):
+    snapshots = []
+    engine = make_engine(CountingSource(), on_snapshot=snapshots.append)
+
+    for run in range(2):
+        snapshots.clear()
+        engine.start()
+        # 界面在停止时清空了全部状态，每次启动后每个技能都应重新推送
+        assert _wait(lambda: len({i for d in snapshots for i, _, _ in d}) == N_SKILLS), f"run {run}"
+        engine.stop()
+        latest = {i: state for d in snapshots for i, state, _ in d}
+        assert [latest[i] for i in range(N_SKILLS)] == EXPECTED
+
+
+def test_profile_switch_while_running(make_engine):
+    # 模版在其他线程切换（热键 / 界面），技能数不同：在战斗循环读取技能列表的同时切换，
+    # 循环使用的技能列表、评估器与调度器必须来自同一个模版
+    logs = []
+    engine = make_engine(CountingSource(), profiles={"test": _skills(), "short": _skills()[:2]},
+                         on_log=logs.append)
+    read = engine.get_current_skills
+    switches = []
+
+    def racing_read():
+        skills = read()
+        if threading.current_thread() is engine._loop and len(switches) < 20:
+            switches.append(engine.current_profile)
+            engine.set_profile("short" if engine.current_profile == "test" else "test")
+        return skills
+
+    engine.get_current_skills = racing_read
+    engine.start()
+    # start() 已在本线程构建好采样对象，切换一次让战斗循环重新构建
+    engine.set_profile("short")
+    assert _wait(lambda: len(switches) == 20)
+    ticks = engine.ticks
+    assert engine._loop.is_alive()
+    assert _wait(lambda: engine.ticks > ticks + 5)
+    # 切换停止后使用的是最终模版
+    ev, _, sched, _, _ = engine.sampling()
+    assert ev.skills == engine.profiles_data[engine.current_profile]
+    assert len(sched.skills) == len(ev.skills)
@@ -0,0 +1,102 @@
+# tests/test_evaluator.py
+"""
+BatchEvaluator：单独评估与批量评估一致；k×k 区域均值（分段求和）与逐点 sample_patch 结果一致
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.models.skill import SkillAction, SkillState
+from core.engine import evaluator
+from core.engine.capture import RegionFrame
+from core.engine.evaluator import BatchEvaluator, evaluate_skill, sample_patch
+
+N_SKILLS = 21
+
+
+def _screen():
+    """合成屏幕：第 i 个技能图标中心为 (i, 0, 0)，11 点钟位置为 (0, i, 0)"""
+    a = np.zeros((60, 40 * N_SKILLS, 3), dtype=np.uint8)
+    for i in range(N_SKILLS):
+        a[30, 40 * i + 20] = (i * 10, 0, 0)
+        a[10, 40 * i + 5] = (0, i * 10, 0)
+    return Image.fromarray(a)
+
+
+def _skills():
+    skills = []
+    for i in range(N_SKILLS):
+        # 偶数技能的参考色与屏幕一致（就绪），奇数技能的中心色不同（冷却中）
+        cr = (i * 10, 0, 0) if i % 2 == 0 else (255, 255, 255)
+        skills.append(SkillAction(f"s{i}", str(i), 0, cx=40 * i + 20, cy=30, cr=cr,
+                                  p11x=40 * i + 5, p11y=10, p11r=(0, i * 10, 0)))
+    return skills
+
+
+@pytest.fixture
+def counting_grab(monkeypatch):
+    """替换抓屏函数：返回合成截图并计数"""
+    calls = []
+    image = _screen()
+
+    def fake_grab(regions=None):
+        calls.append(regions)
+        return image
+
+    monkeypatch.setattr(evaluator, "grab", fake_grab)
+    return calls
+
+
+def test_per_skill_wrapper_captures_each_time(counting_grab):
+    # 兼容接口 evaluate_skill 仍是每个技能抓一次，结果与批量评估相同
+    # （战斗循环每个 tick 只抓一次见 tests/test_engine.py）
+    skills = _skills()
+    states = [evaluate_skill(s) for s in skills]
+    assert len(counting_grab) == N_SKILLS
+    assert states == [SkillState.READY if i % 2 == 0 else SkillState.COOLDOWN for i in range(N_SKILLS)]
+    assert states == list(BatchEvaluator(skills).evaluate(_screen()))
+
+
+# --- k×k 区域均值 ---
+REGIONS = [(10, 20, 50, 45), (100, 0, 140, 30)]
+
+
+def _edge_points():
+    """每个区域的四角、各边中点与中心：k×k 区域在这些位置被区域边界裁掉"""
+    pts = []
+    for l, t, r, b in REGIONS:
+        xs = (l, l + 1, (l + r) // 2, r - 2, r - 1)
+        ys = (t, t + 1, (t + b) // 2, b - 2, b - 1)
+        pts += [(x, y) for x in xs for y in ys]
+    return pts
+
+
+def _frame(raw: bool):
+    rng = np.random.default_rng(8)
+    arrays = [rng.integers(0, 256, (b - t, r - l, 3), dtype=np.uint8) for l, t, r, b in REGIONS]
+    frame = RegionFrame(REGIONS, arrays)
+    if raw:
+        # 与 GDI 后端相同的 BGRA 原始缓冲
+        frame.raw = [np.concatenate([a[:, :, ::-1], np.full(a.shape[:2] + (1,), 255, np.uint8)], axis=2)
+                     for a in arrays]
+        frame.channels = [2, 1, 0]
+    return frame
+
+
+@pytest.mark.parametrize("raw", [False, True])
+@pytest.mark.parametrize("k", [1, 3, 7, (3, 7)])
+def test_patch_means_match_sample_patch(k, raw):
+    # k 为元组时同一区域内的技能交替使用不同的 k
+    ks = k if isinstance(k, tuple) else (k,)
+    pts = _edge_points()
+    skills = [SkillAction(f"s{j}", "1", 0, cx=a[0], cy=a[1], cr=(0, 0, 0), p11x=b[0], p11y=b[1], p11r=(0, 0, 0),
+                          patch=ks[j % len(ks)])
+              for j, (a, b) in enumerate(zip(pts[0::2], pts[1::2]))]
+    ev = BatchEvaluator(skills)
+    frame = _frame(raw)
+
+    pix = ev.gather(frame)
+    expected = np.array([sample_patch(frame, p[0], p[1], p[2] if len(p) > 2 else 1) for p in ev.points],
+                        dtype=np.uint8)
+    assert not ev._missing.any()
+    np.testing.assert_array_equal(pix, expected)
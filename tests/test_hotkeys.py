@@ -0,0 +1,76 @@
+# tests/test_hotkeys.py
+"""
+HotkeyService：钩子线程只投递动作名，回调由 dispatch() 在接收线程执行
+"""
+import pytest
+
+from benchmarks import _stubs
+
+_stubs.install()
+
+from core import hotkeys  # noqa: E402
+from core.hotkeys import HotkeyService  # noqa: E402
+
+
+@pytest.fixture
+def hooks(monkeypatch):
+    """替换 keyboard.add_hotkey：记录注册的钩子，测试直接调用它模拟按键"""
+    registered = {}
+
+    def add_hotkey(combo, fn, args=()):
+        registered[combo] = (fn, args)
+        return combo
+
+    monkeypatch.setattr(hotkeys.keyboard, "add_hotkey", add_hotkey)
+    monkeypatch.setattr(hotkeys.keyboard, "remove_hotkey", lambda handle: registered.pop(handle))
+    return registered
+
+
+def _press(hooks, combo):
+    fn, args = hooks[combo]
+    fn(*args)
+
+
+def test_hook_only_posts(hooks):
+    posted, calls = [], []
+    service = HotkeyService(post=posted.append, repeat_ms=0)
+    service.register({"toggle": "f8", "next_profile": ""}, {"toggle": lambda: calls.append("toggle"),
+                                                           "next_profile": lambda: calls.append("next")})
+    assert service.bindings == {"toggle": "f8"}
+
+    _press(hooks, "f8")
+    assert posted == ["toggle"] and calls == []
+
+    service.dispatch("toggle")
+    assert calls == ["toggle"]
+
+
+def test_repeat_filtered(hooks):
+    posted = []
+    service = HotkeyService(post=posted.append, repeat_ms=10_000)
+    service.bind("toggle", "f8", lambda: None)
+    for _ in range(5):
+        _press(hooks, "f8")
+    assert posted == ["toggle"]
+
+
+def test_dispatch_after_unbind_and_errors(hooks):
+    errors = []
+    service = HotkeyService(on_error=errors.append, post=lambda action: None)
+    service.bind("record", "f7", lambda: 1 / 0)
+    service.dispatch("record")
+    assert len(errors) == 1 and "record" in errors[0]
+
+    # 已投递但在执行前解除绑定的动作被忽略
+    service.unbind("record")
+    assert "f7" not in hooks
+    service.dispatch("record")
+    assert len(errors) == 1
+
+
+def test_without_post_runs_inline(hooks):
+    calls = []
+    service = HotkeyService(repeat_ms=0)
+    service.bind("toggle", "f8", lambda: calls.append(1))
+    _press(hooks, "f8")
+    assert calls == [1]
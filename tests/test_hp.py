@@ -0,0 +1,120 @@
+# tests/test_hp.py
+"""
+HpReader：合成血条扫描线的读数，单像素噪点不影响结果
+"""
+import json
+import sys
+import types
+from collections import namedtuple
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.config import load_config, load_settings
+from core.engine.calibration import calibrate_hp
+from core.engine.capture import RegionFrame
+from core.engine.hp import HpReader, read_screenshot
+
+FILL = (200, 30, 30)
+EMPTY = (40, 40, 40)
+WIDTH = 200
+COORDS = {"x0": 50, "x1": 50 + WIDTH - 1, "y": 12, "fill": list(FILL), "tol": 40}
+# 抓取区域比血条大一圈，扫描线不从区域原点开始
+REGION = (40, 0, 60 + WIDTH, 20)
+
+
+def _bar(percent: float, noise=None) -> np.ndarray:
+    """整块区域的像素，扫描线前 percent% 为填充色；noise 为扫描线上被改成相反颜色的像素（相对血条左端）"""
+    l, t, r, b = REGION
+    a = np.zeros((b - t, r - l, 3), dtype=np.uint8)
+    row = a[COORDS["y"] - t, COORDS["x0"] - l:COORDS["x0"] - l + WIDTH]
+    n = round(WIDTH * percent / 100)
+    row[:n] = FILL
+    row[n:] = EMPTY
+    if noise is not None:
+        row[noise] = EMPTY if noise < n else FILL
+    return a
+
+
+def _frame(a: np.ndarray) -> RegionFrame:
+    return RegionFrame([REGION], [a])
+
+
+@pytest.mark.parametrize("percent", [0, 37, 100])
+def test_read(percent):
+    assert HpReader(COORDS).read(_frame(_bar(percent))) == pytest.approx(percent)
+
+
+@pytest.mark.parametrize("percent", [0, 37, 100])
+def test_noisy_pixel(percent):
+    # 噪点可能落在任一探测点上（每个探测点取自身与左右相邻像素的多数）
+    # 两端像素与紧挨填充边界的像素（边界两侧的探测点已有一票属于另一侧）没有多数可依，不在此列
+    n = round(WIDTH * percent / 100)
+    reader = HpReader(COORDS)
+    for x in range(1, WIDTH - 1):
+        if n - 2 <= x <= n + 1:
+            continue
+        assert reader.read(_frame(_bar(percent, noise=x))) == pytest.approx(percent), f"noise at {x}"
+
+
+def test_region_cache_by_value():
+    # 抓屏线程的每个缓冲槽各有一份区域列表：内容相同就应复用缓存的区域下标
+    reader = HpReader(COORDS)
+    reader.read(RegionFrame([(0, 0, 10, 10), REGION], [np.zeros((10, 10, 3), np.uint8), _bar(50)]))
+    cached = reader._region
+    assert reader.read(RegionFrame([(0, 0, 10, 10), REGION], [np.zeros((10, 10, 3), np.uint8), _bar(37)])) \
+        == pytest.approx(37)
+    assert reader._region is cached
+
+
+def test_bar_outside_regions():
+    with pytest.raises(IndexError):
+        HpReader(COORDS).read(RegionFrame([(0, 0, 10, 10)], [np.zeros((10, 10, 3), np.uint8)]))
+
+
+def test_screenshot_fixture(tmp_path):
+    # 整屏截图：血条位于 (x0, y)，与校准坐标一致
+    screen = np.zeros((40, 300, 3), dtype=np.uint8)
+    l, t, r, b = REGION
+    screen[t:b, l:r] = _bar(37)
+    path = tmp_path / "hp_37.png"
+    Image.fromarray(screen).save(path)
+    assert read_screenshot(str(path), COORDS) == pytest.approx(37)
+
+
+def test_calibrate_through_frame_source(monkeypatch):
+    # 校准经由传入的 grab（引擎的 FrameSource）取像素，结果写入 bars["hp"]，不含技能槽位的 cx / cy
+    Point = namedtuple("Point", "x y")
+    clicks = iter([Point(COORDS["x1"], COORDS["y"]), Point(COORDS["x0"], COORDS["y"])])
+    noop = lambda *a, **kw: None
+    monkeypatch.setitem(sys.modules, "keyboard", types.SimpleNamespace(wait=noop))
+    monkeypatch.setitem(sys.modules, "winsound", types.SimpleNamespace(Beep=noop))
+    monkeypatch.setitem(sys.modules, "pyautogui", types.SimpleNamespace(position=lambda: next(clicks)))
+    monkeypatch.setattr("core.engine.calibration.time.sleep", noop)
+    grabs = []
+
+    screen = np.zeros((40, 300, 3), dtype=np.uint8)
+    l, t, r, b = REGION
+    screen[t:b, l:r] = _bar(100)
+
+    def grab(regions):
+        grabs.append(list(regions))
+        return RegionFrame(regions, [screen[t:b, l:r] for l, t, r, b in regions])
+
+    bars = {"hp": {}, "buffs": {}}
+    calibrate_hp(bars, grab, noop)
+    assert len(grabs) == 1
+    assert bars["hp"] == COORDS
+    assert HpReader(bars["hp"]).read(_frame(_bar(37))) == pytest.approx(37)
+
+
+def test_legacy_bar_migrates(tmp_path):
+    # 旧版写在 global_coords["HP"] 中：load_config 不再把它当作技能槽位，load_settings 迁移到 "bars" 段
+    path = tmp_path / "config.json"
+    slot = {"cx": 1, "cy": 2, "p11x": 3, "p11y": 4}
+    legacy = dict(COORDS, cx=COORDS["x0"], cy=COORDS["y"])
+    path.write_text(json.dumps({"global_coords": {"1": slot, "HP": legacy}, "profiles": {}}), encoding="utf-8")
+    gc, _ = load_config(str(path))
+    assert gc == {"1": slot}
+    assert load_settings(str(path))["bars"]["hp"] == COORDS
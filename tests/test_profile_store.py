@@ -0,0 +1,92 @@
+# tests/test_profile_store.py
+"""
+SQLite 模版库：LazyProfiles 只在访问时加载模版，commit 只写出变化的模版，经 load_config / save_config 往返一致
+"""
+import json
+
+import pytest
+
+from core.config import load_config, save_config
+from core.models.skill import SkillAction
+from core.profile_store import LazyProfiles, import_json, open_store
+
+PROFILES = {f"p{i}": [SkillAction(f"p{i}s{j}", str(j + 1), 100 * j).to_dict() for j in range(3)] for i in range(5)}
+
+
+@pytest.fixture
+def config(tmp_path):
+    """导入模版库后的 config.json 路径；结束时关闭共享连接"""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"global_coords": {}, "profiles": PROFILES}), encoding="utf-8-sig")
+    assert import_json(str(path)) == len(PROFILES)
+    yield str(path)
+    open_store(str(tmp_path / "profiles.db")).close()
+
+
+class CountingReads:
+    """包装 store.read，记录读取的模版名"""
+
+    def __init__(self, store):
+        self.names = []
+        self._read = store.read
+        store.read = self
+
+    def __call__(self, name):
+        self.names.append(name)
+        return self._read(name)
+
+
+def test_import_rewrites_config(config, tmp_path):
+    data = json.loads((tmp_path / "config.json").read_text(encoding="utf-8-sig"))
+    assert "profiles" not in data
+    assert data["store"] == {"profiles": "profiles.db"}
+    assert (tmp_path / "config.json.bak").exists()
+
+
+def test_loads_only_accessed_profiles(config):
+    _, profiles = load_config(config)
+    assert isinstance(profiles, LazyProfiles)
+    reads = CountingReads(profiles.store)
+    assert list(profiles) == list(PROFILES)
+    assert "p3" in profiles and len(profiles) == len(PROFILES)
+    assert reads.names == [] and profiles.loaded() == []
+    assert [s.name for s in profiles["p3"]] == ["p3s0", "p3s1", "p3s2"]
+    profiles["p3"]
+    assert reads.names == ["p3"] and profiles.loaded() == ["p3"]
+
+
+def test_commit_writes_only_changed(config):
+    _, profiles = load_config(config)
+    profiles["p0"]
+    profiles["p1"].append(SkillAction("new", "9", 500))
+    profiles["p2"][0].delay = 42
+    assert profiles.commit() == 2
+    assert profiles.commit() == 0
+
+    _, reloaded = load_config(config)
+    assert [s.name for s in reloaded["p1"]][-1] == "new"
+    assert reloaded["p2"][0].delay == 42
+    assert [s.to_dict() for s in reloaded["p0"]] == PROFILES["p0"]
+
+
+def test_add_and_delete_round_trip(config):
+    _, profiles = load_config(config)
+    del profiles["p1"]
+    profiles["extra"] = [SkillAction("x", "1", 0)]
+    save_config(config, {}, profiles, None)
+
+    _, reloaded = load_config(config)
+    assert list(reloaded) == ["p0", "p2", "p3", "p4", "extra"]
+    assert "p1" not in reloaded
+    assert reloaded["extra"][0].name == "x"
+    with pytest.raises(KeyError):
+        reloaded["p1"]
+
+
+def test_save_all_plain_profiles(config, tmp_path):
+    # 普通字典写入模版库：只写与库中不同的模版，并删除库中多余的模版
+    store = open_store(str(tmp_path / "profiles.db"))
+    plain = {name: [SkillAction.from_dict(d) for d in skills] for name, skills in PROFILES.items() if name != "p4"}
+    plain["p0"][0].delay = 7
+    assert store.save_all(plain) == 1
+    assert store.names() == ["p0", "p1", "p2", "p3"]
@@ -0,0 +1,131 @@
+# tests/test_recorder.py
+"""
+录制 → 内存映射回放：逐条重新评估并重现施放决策，应与录制时完全一致
+"""
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from core.models.skill import SkillAction
+from core.engine.capture import RegionFrame
+from core.engine.evaluator import BatchEvaluator
+from core.engine.recorder import MAGIC, Recording, SessionRecorder, record_dtype, replay
+from core.engine.scheduler import CastScheduler
+
+N_SKILLS = 5
+N_TICKS = 200
+REGION = (0, 0, 20 * N_SKILLS, 20)
+
+
+def _skills():
+    return [SkillAction(f"s{i}", str(i + 1), 100 + 50 * i, cx=20 * i + 10, cy=10, cr=(200, 200, 200),
+                        p11x=20 * i + 3, p11y=3, p11r=(90, 90, 90))
+            for i in range(N_SKILLS)]
+
+
+def _frame(t: int, ts: float) -> RegionFrame:
+    """第 t 个 tick 的画面：技能 i 在 (t + i) % 7 < 2 时处于冷却（中心变暗）"""
+    a = np.zeros((20, 20 * N_SKILLS, 3), dtype=np.uint8)
+    for i in range(N_SKILLS):
+        a[10, 20 * i + 10] = 40 if (t + i) % 7 < 2 else 200
+        a[3, 20 * i + 3] = 90
+    return RegionFrame([REGION], [a], ts)
+
+
+def _record(path, gates=None):
+    """按战斗循环的方式评估、调度并录制，返回施放次数"""
+    ev = BatchEvaluator(_skills())
+    sched = CastScheduler(ev.skills, 150)
+    rec = SessionRecorder(str(path), ev, "test", [REGION], meta={"scheduler": sched.state()})
+    casts = 0
+    for t in range(N_TICKS):
+        now = 100.0 + t * 0.02
+        frame = _frame(t, now)
+        pix = ev.gather(frame)
+        codes = ev.evaluate_codes(pix)
+        gate = gates(t) if gates else None
+        sched.update(codes, gate)
+        cast = []
+        i = sched.next_cast(now)
+        if i is not None:
+            sched.cast(i, now)
+            cast.append(i)
+            casts += 1
+        rec.append(now, frame, pix, codes, cast, gate)
+    rec.close()
+    return casts
+
+
+def _to_v1(src, dst):
+    """把录制改写为 version 1 格式（记录中没有 gate 字段）"""
+    old = Recording(str(src))
+    header = dict(old.header, version=1)
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    pad = (-(len(MAGIC) + 4 + len(body))) % 8
+    v1 = np.zeros(len(old), dtype=record_dtype(len(old.points), len(old.skills), version=1))
+    for name in v1.dtype.names:
+        v1[name] = old.records[name]
+    with open(dst, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(body) + pad) + body + b" " * pad)
+        f.write(v1.tobytes())
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "session.gwrec"
+    casts = _record(path)
+    assert casts > 0
+
+    rec = Recording(str(path))
+    assert len(rec) == N_TICKS
+    assert rec.version == 2
+    assert int(rec.records["cast"].sum()) == casts
+
+    r = replay(str(path))
+    assert r["records"] == N_TICKS
+    assert r["compared"]
+    assert r["state_mismatches"] == 0
+    assert r["cast_mismatches"] == 0
+
+
+def test_round_trip_uses_recorded_gate(tmp_path):
+    # 条件门控无法由采样像素重算，回放直接使用录制的 gate；技能 0 每隔一段时间被条件挡住
+    def gates(t):
+        g = np.ones(N_SKILLS, dtype=bool)
+        g[0] = (t // 10) % 2 == 0
+        return g
+
+    path, ungated = tmp_path / "gated.gwrec", tmp_path / "ungated.gwrec"
+    _record(path, gates)
+    _record(ungated)
+    rec = Recording(str(path))
+    assert not rec.records["gate"][:, 0].all()
+    # 门控确实改变了施放决策，否则本测试无法区分回放是否使用了 gate
+    assert (rec.records["cast"] != Recording(str(ungated)).records["cast"]).any()
+
+    r = replay(str(path))
+    assert r["state_mismatches"] == 0
+    assert r["cast_mismatches"] == 0
+
+
+def test_v1_recording_without_gate(tmp_path):
+    src, dst = tmp_path / "v2.gwrec", tmp_path / "v1.gwrec"
+    _record(src)
+    _to_v1(src, dst)
+
+    rec = Recording(str(dst))
+    assert rec.version == 1
+    assert "gate" not in rec.dtype.names
+    assert len(rec) == N_TICKS
+
+    r = replay(str(dst))
+    assert r["state_mismatches"] == 0
+    assert r["cast_mismatches"] == 0
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "bogus.gwrec"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        Recording(str(path))
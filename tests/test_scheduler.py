@@ -0,0 +1,88 @@
+# tests/test_scheduler.py
+"""
+CastScheduler：按模版顺序的优先级、全局冷却（GCD）与同技能重按间隔决定施放顺序
+"""
+import numpy as np
+import pytest
+
+from core.models.skill import SkillAction
+from core.engine.evaluator import COOLDOWN, READY
+from core.engine.scheduler import MIN_GCD_MS, CastScheduler
+
+
+def _scheduler(delays, recast_ms=150):
+    return CastScheduler([SkillAction(f"s{i}", str(i + 1), d) for i, d in enumerate(delays)], recast_ms)
+
+
+def _codes(*ready, n=4):
+    codes = np.full(n, COOLDOWN, dtype=np.int8)
+    codes[list(ready)] = READY
+    return codes
+
+
+def test_priority_follows_profile_order():
+    sched = _scheduler([0, 0, 0, 0])
+    sched.update(_codes(3, 1, 2))
+    assert sched.next_cast(0.0) == 1
+
+
+def test_gcd_blocks_every_skill():
+    # 施放 s0（delay 300ms）后 300ms 内不施放任何技能，之后轮到仍就绪的下一个优先级
+    sched = _scheduler([300, 0, 0, 0])
+    sched.update(_codes(0, 1))
+    assert sched.next_cast(0.0) == 0
+    sched.cast(0, 0.0)
+    sched.update(_codes(1))
+    assert sched.next_cast(0.299) is None
+    assert sched.deadline() == pytest.approx(0.3)
+    assert sched.next_cast(0.3) == 1
+
+
+def test_min_gcd_and_recast_interval():
+    # delay 为 0 时 GCD 取 MIN_GCD_MS；同一技能两次按键至少间隔 recast_ms
+    sched = _scheduler([0, 0, 0, 0], recast_ms=150)
+    sched.update(_codes(0))
+    sched.cast(sched.next_cast(0.0), 0.0)
+    assert sched.gcd_until == pytest.approx(MIN_GCD_MS / 1000)
+    sched.update(_codes(0))
+    assert sched.next_cast(0.1) is None
+    assert sched.deadline() == pytest.approx(0.15)
+    assert sched.next_cast(0.15) == 0
+
+
+def test_recast_wait_lets_lower_priority_through():
+    # s0 在重按间隔内时，GCD 已过的低优先级技能照常施放
+    sched = _scheduler([0, 0, 0, 0], recast_ms=150)
+    sched.update(_codes(0, 2))
+    sched.cast(sched.next_cast(0.0), 0.0)
+    sched.update(_codes(0, 2))
+    assert sched.next_cast(0.06) == 2
+
+
+def test_no_longer_ready_is_dropped():
+    sched = _scheduler([0, 0, 0, 0])
+    sched.update(_codes(0, 1))
+    sched.update(_codes(1))
+    assert sched.next_cast(0.0) == 1
+    sched.update(_codes())
+    assert sched.deadline() is None
+    assert sched.next_cast(1.0) is None
+
+
+def test_conditions_mask():
+    # 条件不满足的技能视为未就绪
+    sched = _scheduler([0, 0, 0, 0])
+    sched.update(_codes(0, 1), allowed=np.array([False, True, True, True]))
+    assert sched.next_cast(0.0) == 1
+
+
+def test_state_round_trip():
+    sched = _scheduler([200, 0, 0, 0])
+    sched.update(_codes(0))
+    sched.cast(sched.next_cast(1.0), 1.0)
+    other = _scheduler([200, 0, 0, 0])
+    other.restore(sched.state())
+    other.update(_codes(0))
+    assert other.next_cast(1.1) is None
+    assert other.deadline() == pytest.approx(1.2)
+    assert other.next_cast(1.2) == 0
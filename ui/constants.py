@@ -12,6 +12,9 @@ BTN_CANCEL = "取消"
 BTN_START = "开始 (F8)"
 BTN_STOP = "停止"
 BTN_CALIBRATE = "校准"
+BTN_CALIBRATE_HP = "血条校准"
+BTN_CALIBRATE_BUFFS = "Buff 栏校准"
+BTN_PROFILE = "性能采样 (F9)"
 BTN_VALIDATE = "校验"
 
 # placeholers / labels
@@ -1,6 +1,4 @@
 ﻿# -*- coding: utf-8 -*-
-import threading
-import time
 from PySide6 import QtCore, QtWidgets, QtGui
 from PySide6.QtWidgets import (
     QTextEdit, QMenu, QLineEdit, QPushButton, QFrame,
@@ -8,17 +6,15 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtGui import QAction, QFont, QColor
 from core.engine.engine import Engine
-from ui.overlay import Overlay
 from ui.panels.skill_list import SkillListPanel
-from ui.widgets.skill_editor import SkillEditor
-from core.config import save_config, load_config
 from core.models.skill import SkillAction
+from core.hotkeys import HotkeyService
 
 # 统一从 ui.constants 导入 UI 文案与配色（简洁可维护）
 from ui.constants import (
     APP_TITLE, LABEL_ADD_SKILL, PLACEHOLDER_NAME, PLACEHOLDER_KEY, PLACEHOLDER_DELAY,
     BTN_ADD, BTN_EDIT, BTN_SAVE, BTN_CANCEL, BTN_START, BTN_STOP,
-    STATUS_READY, STATUS_RUNNING, COLOR_PRIMARY, COLOR_FAIL, COLOR_TEXT_SUB
+    STATUS_READY, STATUS_RUNNING, COLOR_PRIMARY, COLOR_FAIL, COLOR_TEXT_SUB, BTN_PROFILE, BTN_CALIBRATE_HP, BTN_CALIBRATE_BUFFS
 )
 
 # 尝试导入 ModernButton 与相关常量，若缺失则提供回退实现以避免 NameError
@@ -50,6 +46,7 @@ class UiBridge(QtCore.QObject):
     overlay = QtCore.Signal(str, str)
     snapshot = QtCore.Signal(list)
     coords_update = QtCore.Signal(dict)  # 恢复坐标更新信号
+    hotkey = QtCore.Signal(str)  # 热键钩子线程投递的动作名，在 UI 线程执行
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
@@ -65,11 +62,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.bridge.overlay.connect(self._set_overlay)
         self.bridge.snapshot.connect(self._on_snapshot)
         self.bridge.coords_update.connect(self._update_coords_monitor)  # 连接监视器
+        self.bridge.hotkey.connect(self._on_ui_hotkey)
         
         # === 2. 引擎初始化 ===
         self.engine = Engine(
             config_path="config.json",
-            on_log=self.bridge.log.emit,
+            on_log=self._on_engine_log,
             on_status=self.bridge.status.emit,
             on_overlay=self.bridge.overlay.emit,
             on_snapshot=self.bridge.snapshot.emit,
@@ -77,14 +75,32 @@ class MainWindow(QtWidgets.QMainWindow):
         )
 
         # === 3. 初始化组件 ===
-        self.overlay = Overlay()
-        self.overlay.show()
+        # 悬浮窗在事件循环开始后创建（不阻塞主窗口首次绘制），技能编辑器在第一次编辑时创建
+        self.overlay = None
+        self._overlay_text = None
+        self.skill_editor = None
+        QtCore.QTimer.singleShot(0, self._create_overlay)
+
+        # 悬浮窗耗时摘要：每秒最多刷新 4 次，只在引擎运行时计时（见 _set_status）
+        self._stats_timer = QtCore.QTimer(self)
+        self._stats_timer.setInterval(250)
+        self._stats_timer.timeout.connect(self._update_overlay_stats)
+        self._stats_overlay = self.engine.settings["stats"].get("overlay", False)
         
         self._init_ui()
         
-        # 启动键盘监听
-        self._key_thread = threading.Thread(target=self._key_listener, daemon=True)
-        self._key_thread.start()
+        # 全局热键：系统键盘事件驱动，钩子线程只经信号投递动作名，回调全部在 UI 线程执行
+        # （停止引擎会等待战斗循环与派发线程退出，不能阻塞系统键盘钩子）
+        self.hotkeys = HotkeyService(on_error=self.engine.on_log, post=self.bridge.hotkey.emit)
+        self.hotkeys.register(self.engine.settings["hotkeys"], {
+            "toggle": self.engine.toggle,
+            "profiling": self.engine.toggle_profiling,
+            "record": self.engine.toggle_recording,
+            "calibrate": self.engine.start_calibration,
+            "calibrate_hp": self.engine.start_hp_calibration,
+            "calibrate_buffs": self.engine.start_buff_calibration,
+            "next_profile": self._next_profile,
+        })
 
     def _init_ui(self):
         central = QtWidgets.QWidget()
@@ -131,6 +147,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_calib = ModernButton(BTN_CALIBRATE, "#0A84FF", "#409CFF")
         self.btn_calib.clicked.connect(self.engine.start_calibration)
         left_l.addWidget(self.btn_calib)
+
+        # 血条校准按钮 (蓝)：HP_BELOW 条件依赖
+        self.btn_calib_hp = ModernButton(BTN_CALIBRATE_HP, "#0A84FF", "#409CFF")
+        self.btn_calib_hp.clicked.connect(self.engine.start_hp_calibration)
+        left_l.addWidget(self.btn_calib_hp)
+
+        # buff 栏校准按钮 (蓝)：BUFF_ACTIVE 条件依赖
+        self.btn_calib_buffs = ModernButton(BTN_CALIBRATE_BUFFS, "#0A84FF", "#409CFF")
+        self.btn_calib_buffs.clicked.connect(self.engine.start_buff_calibration)
+        left_l.addWidget(self.btn_calib_buffs)
+
+        # 性能采样按钮 (灰)：采集战斗循环一段时间的性能数据，不停止循环
+        self.btn_profile = ModernButton(BTN_PROFILE, "#3A3A3C", "#48484A")
+        self.btn_profile.clicked.connect(self.engine.toggle_profiling)
+        left_l.addWidget(self.btn_profile)
         
         left_l.addSpacing(20)
 
@@ -192,22 +223,9 @@ class MainWindow(QtWidgets.QMainWindow):
         cl.setContentsMargins(20, 20, 20, 20)
         cl.setSpacing(10)
 
-        # 分割线：上方技能列表，下方编辑器
-        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
-        splitter.setStyleSheet("QSplitter::handle { background-color: #333; height: 2px; }")
-        
-        # 技能列表面板
+        # 技能列表面板（编辑器为对话框，点击编辑时才创建）
         self.skill_list_panel = SkillListPanel()
-        splitter.addWidget(self.skill_list_panel)
-        
-        # 技能编辑器 (恢复显示)
-        self.skill_editor = SkillEditor(self)
-        # 默认隐藏，选中技能后显示? 或者一直显示
-        splitter.addWidget(self.skill_editor)
-        splitter.setStretchFactor(0, 2)
-        splitter.setStretchFactor(1, 1)
-        
-        cl.addWidget(splitter, 1)
+        cl.addWidget(self.skill_list_panel, 1)
 
         # 3. 添加技能表单 (底部栏)
         form = QtWidgets.QHBoxLayout()
@@ -315,16 +333,8 @@ class MainWindow(QtWidgets.QMainWindow):
             QMessageBox.warning(self, "错误", "延迟需为整数（毫秒）。")
             return
 
-        # 确保加载了 profiles/global_coords
-        if not hasattr(self, "profiles") or not hasattr(self, "global_coords"):
-            gc, pr = load_config()
-            self.global_coords = gc
-            self.profiles = pr
-
-        profile_name = getattr(self, "current_profile", None) or next(iter(self.profiles), None)
-        if profile_name is None:
-            profile_name = "Default"
-            self.profiles[profile_name] = []
+        # 直接修改引擎的模版数据，由引擎的后台写入线程保存
+        profile_name = self.engine.current_profile
 
         new_skill_data = {
             "name": name,
@@ -337,14 +347,9 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception:
             s = new_skill_data
 
-        self.profiles.setdefault(profile_name, []).append(s)
-
-        try:
-            save_config("config.json", self.global_coords, self.profiles)
-        except Exception as e:
-            print("保存配置失败:", e)
-            QMessageBox.warning(self, "错误", "保存配置失败，请检查日志。")
-            return
+        self.engine.profiles_data.setdefault(profile_name, []).append(s)
+        self.engine.invalidate_sampling()
+        self.engine.save()
 
         self.input_new_name.clear()
         self.input_new_key.clear()
@@ -400,8 +405,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.skill_list_panel.set_skills(skills, self._open_skill_editor, self._on_skill_deleted)
 
     @QtCore.Slot(list)
-    def _on_snapshot(self, _):
-        self.skill_list_panel.refresh()
+    def _on_snapshot(self, deltas):
+        self.skill_list_panel.update_states(deltas)
+
+    def _on_engine_log(self, msg):
+        # LogPanel.log 只写入缓冲区（线程安全），由面板定时器批量刷新，不必每条日志发一次信号
+        panel = getattr(self, "log_panel", None)
+        if getattr(panel, "thread_safe", False):
+            panel.log(msg)
+        else:
+            self.bridge.log.emit(msg)
 
     @QtCore.Slot(str)
     def _append_log(self, msg): 
@@ -422,42 +435,63 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             self.status_lbl.setText(STATUS_READY)
             self.status_lbl.setStyleSheet(f"font-size:24px; font-weight:800; color:{COLOR_FAIL};")
+            self.skill_list_panel.clear_states()
+        if self.overlay is not None:
+            self.overlay.set_active(running)
+        if not self._stats_overlay:
+            return
+        if running:
+            self._stats_timer.start()
+        else:
+            self._stats_timer.stop()
+            if self.overlay is not None:
+                self.overlay.set_stats(None)
 
     @QtCore.Slot(str, str)
     def _set_overlay(self, t, c): 
-        # Overlay 现在的 set_text 只有一个参数，需要适配
-        self.overlay.set_text(t)
+        if self.overlay is None:
+            self._overlay_text = (t, c)
+            return
+        self.overlay.set_text(t, c)
+
+    def _create_overlay(self):
+        from ui.overlay import Overlay
+        self.overlay = Overlay(self.engine.settings["ui"].get("hud_fps", 30))
+        self.overlay.set_source(self.engine.hud_state)
+        if self._overlay_text:
+            self.overlay.set_text(*self._overlay_text)
+        self.overlay.set_active(self.engine.running)
+        self.overlay.show()
+
+    def _update_overlay_stats(self):
+        if self.overlay is not None:
+            self.overlay.set_stats(self.engine.stats())
+
+    @QtCore.Slot(str)
+    def _on_ui_hotkey(self, action):
+        self.hotkeys.dispatch(action)
 
-    def _key_listener(self):
-        import keyboard
-        while True:
-            if keyboard.is_pressed('F8'):
-                self.engine.toggle()
-                time.sleep(0.3)
-            time.sleep(0.02)
+    def _next_profile(self):
+        if self.profile_combo.count():
+            self.profile_combo.setCurrentIndex((self.profile_combo.currentIndex() + 1) % self.profile_combo.count())
 
     def closeEvent(self, e):
+        self.hotkeys.clear()
         self.engine.stop()
-        self.engine.save()
-        self.overlay.close()
+        self.engine.flush()
+        if self.overlay is not None:
+            self.overlay.close()
         super().closeEvent(e)
 
     def _open_skill_editor(self, skill):
         # 打开编辑器并在保存后回调 _on_skill_saved
+        if self.skill_editor is None:
+            from ui.widgets.skill_editor import SkillEditor
+            self.skill_editor = SkillEditor(self)
         self.skill_editor.exec_for(skill, lambda orig, new: self._on_skill_saved(orig, new))
 
     def _on_skill_saved(self, original_skill, new_data):
-        # 确保有 profiles 与 current_profile
-        if not hasattr(self, "profiles") or not hasattr(self, "global_coords"):
-            gc, pr = load_config()
-            self.global_coords = gc
-            self.profiles = pr
-
-        profile_name = getattr(self, "current_profile", None) or next(iter(self.profiles), None)
-        if not profile_name:
-            return
-
-        skills = self.profiles.get(profile_name, [])
+        skills = self.engine.get_current_skills()
         updated = False
         for i, s in enumerate(skills):
             # 匹配：对象相同或按 name/key/cx 匹配
@@ -490,19 +524,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 break
 
         if updated:
-            # 持久化并刷新 UI
-            try:
-                save_config("config.json", self.global_coords, self.profiles)
-            except Exception as e:
-                print("保存配置失败:", e)
+            # 持久化（引擎后台写入）并刷新 UI
+            self.engine.invalidate_sampling()
+            self.engine.save()
             self._refresh_list()
 
     def _on_skill_deleted(self, skill):
-        # 找到当前 profile 并删除匹配项（按对象或 name/key/delay）
-        profile_name = getattr(self, "current_profile", None) or next(iter(getattr(self, "profiles", {})), None)
-        if not profile_name:
-            return
-        skills = self.profiles.get(profile_name, [])
+        # 在当前 profile 中删除匹配项（按对象或 name/key/delay）
+        skills = self.engine.get_current_skills()
         removed = False
         for i, s in enumerate(skills):
             # 匹配逻辑：对象相同或关键字段相同
@@ -512,11 +541,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 break
         # 如果被删除，持久化并刷新 UI
         if removed:
-            try:
-                from core.config import save_config
-                save_config("config.json", self.global_coords, self.profiles)
-            except Exception as e:
-                print("保存配置失败:", e)
+            self.engine.invalidate_sampling()
+            self.engine.save()
             self._refresh_list()
 
     def _on_skill_selected(self, skill, card_widget):
@@ -543,12 +569,7 @@ class MainWindow(QtWidgets.QMainWindow):
             print("未选择技能，无法删除。")
             return
 
-        # 找到当前 profile
-        profile_name = getattr(self, "current_profile", None) or next(iter(getattr(self, "profiles", {})), None)
-        if not profile_name:
-            return
-
-        skills = self.profiles.get(profile_name, [])
+        skills = self.engine.get_current_skills()
         removed = False
         for i, s in enumerate(skills):
             # 匹配：对象相同或按 name/key/delay 匹配
@@ -558,11 +579,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 break
 
         if removed:
-            try:
-                from core.config import save_config
-                save_config("config.json", self.global_coords, self.profiles)
-            except Exception as e:
-                print("保存配置失败:", e)
+            self.engine.invalidate_sampling()
+            self.engine.save()
             # 清除选择引用并刷新
             self._selected_skill = None
             if hasattr(self, "_selected_card_widget") and self._selected_card_widget:
@@ -1,9 +1,32 @@
 ﻿# -*- coding: utf-8 -*-
-from PySide6 import QtWidgets, QtCore
-from ui.constants import STATUS_READY
+from typing import Callable, Optional
+
+import numpy as np
+from PySide6 import QtWidgets, QtCore, QtGui
+from ui.constants import STATUS_READY, COLOR_READY, COLOR_FAIL
+
+COLOR_COOLDOWN = "#FFD60A"
+
 
 class Overlay(QtWidgets.QWidget):
-    def __init__(self):
+    """
+    置顶 HUD，全部内容在 paintEvent 中用 QPainter 绘制，没有子控件
+    - set_text / set_stats 内容与上次相同时直接返回，变化只置脏标记，不立即重绘
+    - 定时器按 max_fps 检查脏标记并读取技能状态源（set_source，如 Engine.hud_state），
+      有变化才 update()，因此重绘频率不超过 max_fps
+    - 定时器只在 set_active(True)（引擎运行中）且窗口可见时运行；空闲时不轮询，
+      文字 / 摘要变化直接 update()
+    - 冷却条进度量化到像素，像素不变时不重绘；窗口只在行数变化时调整高度
+    """
+    WIDTH = 260
+    TEXT_H = 40
+    GAP = 6
+    STATS_LINE_H = 15
+    BAR_ROW_H = 14
+    BAR_X = 90
+    PAD = 10
+
+    def __init__(self, max_fps: int = 30):
         super().__init__()
         self.setWindowFlags(
             QtCore.Qt.Tool |
@@ -12,22 +35,191 @@ class Overlay(QtWidgets.QWidget):
         )
         self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
 
-        self.label = QtWidgets.QLabel(STATUS_READY, self)
-        self.label.setStyleSheet("""
-            QLabel {
-                background-color: rgba(30, 30, 30, 180);
-                color: #EDEDED;
-                border-radius: 12px;
-                padding: 10px 18px;
-                font-size: 14px;
-                font-weight: 500;
-            }
-        """)
-
-        layout = QtWidgets.QVBoxLayout(self)
-        layout.addWidget(self.label)
-        layout.setContentsMargins(0, 0, 0, 0)
-
-    def set_text(self, text: str):
-        self.label.setText(text)
-        self.adjustSize()
+        self.font_text = QtGui.QFont()
+        self.font_text.setPixelSize(14)
+        self.font_text.setWeight(QtGui.QFont.Medium)
+        self.font_stats = QtGui.QFont("Consolas")
+        self.font_stats.setPixelSize(11)
+        self.font_bar = QtGui.QFont()
+        self.font_bar.setPixelSize(11)
+        self.bg_text = QtGui.QColor(30, 30, 30, 180)
+        self.bg_stats = QtGui.QColor(30, 30, 30, 150)
+        self.color_text = QtGui.QColor("#EDEDED")
+        self.color_sub = QtGui.QColor("#A0A0A0")
+        self.color_track = QtGui.QColor(60, 60, 64, 200)
+        self.state_colors = [QtGui.QColor(COLOR_READY), QtGui.QColor(COLOR_COOLDOWN), QtGui.QColor(COLOR_FAIL)]
+
+        self._text = ""
+        self._elided = ""
+        self._color: Optional[str] = None
+        self._accent: Optional[QtGui.QColor] = None
+        self._stats_lines = []
+        self._source: Optional[Callable] = None
+        self._names = ()
+        self._codes = np.zeros(0, dtype=np.int8)
+        self._fill = np.zeros(0, dtype=np.int16)   # 冷却条填充宽度（像素），-1 为未知
+        self._dirty = True
+        self._active = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(max(1, int(1000 / max(1, max_fps))))
+        self._timer.timeout.connect(self._tick)
+
+        self.set_text(STATUS_READY)
+        self._relayout()
+
+    # --- 数据输入（UI 线程） ---
+    def set_text(self, text: str, color: Optional[str] = None):
+        if text == self._text and color == self._color:
+            return
+        self._text, self._color = text, color
+        self._accent = QtGui.QColor(color) if color else None
+        width = self.WIDTH - 36 - (6 if self._accent else 0)
+        self._elided = QtGui.QFontMetrics(self.font_text).elidedText(text, QtCore.Qt.ElideRight, width)
+        self._mark_dirty()
+
+    def set_stats(self, stats: Optional[dict]):
+        """显示 Engine.stats() 的摘要（各阶段 p50/p99 ms 与 ticks/s），传 None 隐藏"""
+        lines = []
+        if stats and stats.get("stages"):
+            lines = [f"{stats['ticks_per_sec']:.0f} ticks/s"]
+            for name, h in stats["stages"].items():
+                lines.append(f"{name:<8} {h['p50']:6.2f} / {h['p99']:6.2f} ms")
+        if lines == self._stats_lines:
+            return
+        resize = len(lines) != len(self._stats_lines)
+        self._stats_lines = lines
+        if resize:
+            self._relayout()
+        self._mark_dirty()
+
+    def set_source(self, source: Optional[Callable]):
+        """技能状态源：无参函数，返回 (技能名, 状态编码, 冷却进度) 或 None"""
+        self._source = source
+
+    def set_active(self, active: bool):
+        """引擎启动 / 停止时调用：运行中按 max_fps 轮询状态源，停止后读取最后一次（清空冷却条）并停止定时器"""
+        self._active = active
+        self._sync_timer()
+        if not active:
+            self._tick()
+
+    def _mark_dirty(self):
+        # 定时器未运行时没有人检查脏标记，直接请求重绘（Qt 会合并多次 update）
+        if self._timer.isActive():
+            self._dirty = True
+        else:
+            self._dirty = False
+            self.update()
+
+    def _sync_timer(self):
+        if self._active and self.isVisible():
+            if not self._timer.isActive():
+                self._timer.start()
+        else:
+            self._timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._sync_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    # --- 定时刷新 ---
+    def _bar_width(self) -> int:
+        return self.WIDTH - self.BAR_X - self.PAD
+
+    def _tick(self):
+        if self._source is not None:
+            state = self._source()
+            if state is None:
+                names, codes, fill = (), self._codes[:0], self._fill[:0]
+            else:
+                names, codes, progress = state
+                fill = np.where(np.isnan(progress), -1, np.round(np.nan_to_num(progress) * self._bar_width()))
+                fill = fill.astype(np.int16)
+            if names is not self._names and names != self._names:
+                resize = len(names) != len(self._names)
+                self._names, self._codes, self._fill = names, codes, fill
+                if resize:
+                    self._relayout()
+                self._dirty = True
+            elif not (np.array_equal(codes, self._codes) and np.array_equal(fill, self._fill)):
+                self._codes, self._fill = codes, fill
+                self._dirty = True
+        if self._dirty:
+            self._dirty = False
+            self.update()
+
+    def _relayout(self):
+        h = self.TEXT_H
+        if self._stats_lines:
+            h += self.GAP + self.PAD + len(self._stats_lines) * self.STATS_LINE_H
+        if self._names:
+            h += self.GAP + self.PAD + len(self._names) * self.BAR_ROW_H
+        if self.height() != h or self.width() != self.WIDTH:
+            self.setFixedSize(self.WIDTH, h)
+
+    # --- 绘制 ---
+    def paintEvent(self, event):
+        p = QtGui.QPainter(self)
+        p.setRenderHint(QtGui.QPainter.Antialiasing)
+        p.setPen(QtCore.Qt.NoPen)
+        w = self.WIDTH
+
+        # 状态文字
+        p.setBrush(self.bg_text)
+        p.drawRoundedRect(0, 0, w, self.TEXT_H, 12, 12)
+        x = 18
+        if self._accent is not None:
+            p.setBrush(self._accent)
+            p.drawRoundedRect(12, 12, 4, self.TEXT_H - 24, 2, 2)
+            x += 6
+        p.setFont(self.font_text)
+        p.setPen(self.color_text)
+        p.drawText(QtCore.QRect(x, 0, w - x - 18, self.TEXT_H), QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, self._elided)
+        y = self.TEXT_H
+
+        # 耗时摘要
+        if self._stats_lines:
+            y += self.GAP
+            h = self.PAD + len(self._stats_lines) * self.STATS_LINE_H
+            p.setPen(QtCore.Qt.NoPen)
+            p.setBrush(self.bg_stats)
+            p.drawRoundedRect(0, y, w, h, 8, 8)
+            p.setFont(self.font_stats)
+            p.setPen(self.color_sub)
+            for k, line in enumerate(self._stats_lines):
+                p.drawText(self.PAD, y + self.PAD // 2 + k * self.STATS_LINE_H,
+                           w - 2 * self.PAD, self.STATS_LINE_H, QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, line)
+            y += h
+
+        # 冷却条：就绪满格绿色，冷却中按进度黄色，冷却时长未知 / 失败时整条暗色
+        if self._names:
+            y += self.GAP
+            h = self.PAD + len(self._names) * self.BAR_ROW_H
+            p.setPen(QtCore.Qt.NoPen)
+            p.setBrush(self.bg_stats)
+            p.drawRoundedRect(0, y, w, h, 8, 8)
+            p.setRenderHint(QtGui.QPainter.Antialiasing, False)
+            p.setFont(self.font_bar)
+            bw = self._bar_width()
+            top = y + self.PAD // 2
+            for k, name in enumerate(self._names):
+                ry = top + k * self.BAR_ROW_H
+                p.setPen(self.color_sub)
+                p.drawText(self.PAD, ry, self.BAR_X - self.PAD - 4, self.BAR_ROW_H,
+                           QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, name)
+                by = ry + (self.BAR_ROW_H - 6) // 2
+                p.fillRect(self.BAR_X, by, bw, 6, self.color_track)
+                code, fill = int(self._codes[k]), int(self._fill[k])
+                color = self.state_colors[code] if 0 <= code < len(self.state_colors) else self.color_track
+                if fill < 0:
+                    color = QtGui.QColor(color)
+                    color.setAlpha(90)
+                    fill = bw
+                if fill:
+                    p.fillRect(self.BAR_X, by, fill, 6, color)
+        p.end()
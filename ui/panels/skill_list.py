@@ -1,32 +1,71 @@
 ﻿# -*- coding: utf-8 -*-
 from PySide6 import QtWidgets
-from PySide6.QtWidgets import QWidget, QGridLayout, QLabel, QSizePolicy
+from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QFrame
 from PySide6.QtCore import Qt
 from ui.widgets.skill_card import SkillCard
 
-class SkillListPanel(QWidget):
+
+class DelayArrow(QWidget):
+    """卡片之间的 “延迟 + 箭头” 标记，随卡片一起复用"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        l = QVBoxLayout(self)
+        l.setContentsMargins(0, 0, 0, 0)
+        l.setSpacing(2)
+        self.lbl_delay = QLabel("")
+        self.lbl_delay.setAlignment(Qt.AlignHCenter | Qt.AlignBottom)
+        self.lbl_delay.setStyleSheet("color:#9AA0A6; font-size:11px;")
+        lbl_arrow = QLabel("➜")
+        lbl_arrow.setAlignment(Qt.AlignCenter)
+        lbl_arrow.setStyleSheet("color:#8E8E93; font-size:18px;")
+        l.addWidget(self.lbl_delay)
+        l.addWidget(lbl_arrow)
+        self._delay = None
+
+    def set_delay(self, delay_ms):
+        if delay_ms != self._delay:
+            self._delay = delay_ms
+            self.lbl_delay.setText(f"{delay_ms} 毫秒")  # ms -> 毫秒
+
+
+class SkillListPanel(QtWidgets.QAbstractScrollArea):
+    """
+    技能列表（虚拟化）
+    - 数据（去重后的技能、对应的引擎技能序号、延迟、运行状态）与卡片分离，只为可见的行绑定卡片
+    - 卡片与箭头放在复用池中，池大小随可见数量增长、从不缩小；滚动与调整大小只重新绑定和移动，不销毁也不新建
+    - 状态变化只更新对应可见卡片的状态指示点，不可见的技能只记录状态，滚动到时再绑定
+    """
+    CARD_W = 170         # 减小卡片宽度以便多列换行更好看
+    ARROW_W = 56
+    SPACING = 12
+    MARGIN = 12
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.grid = QGridLayout(self)
-        self.grid.setSpacing(12)
-        self.grid.setContentsMargins(12, 12, 12, 12)
-        self.setLayout(self.grid)
-        self.items = []
+        self.setFrameShape(QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setStyleSheet("background-color: #151515; border-radius:8px;")
+        self.skills = []
+        self.indices = []    # 每项对应的引擎技能序号（去重后与位置不再一一对应）
+        self.delays = []
+        self.states = {}     # 引擎技能序号 -> SkillState
+        # 复用池与当前可见项的绑定
+        self.cards = []
+        self.arrows = []
+        self.cards_by_index = {}
+        self._card_h = 0
+        self._cols = 1
+        self._selected = None
+        self._edit_cb = self._delete_cb = self._select_cb = None
 
     def set_skills(self, skills, bind_callback, delete_callback=None, select_callback=None):
-        # 清空旧项
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            w = item.widget()
-            if w:
-                w.setParent(None)
-        self.items = []
+        self._edit_cb, self._delete_cb, self._select_cb = bind_callback, delete_callback, select_callback
 
         # 去重（按 name/key/delay）避免重复展示
         seen = set()
-        filtered = []
-        for s in skills:
+        self.skills, self.indices, self.delays = [], [], []
+        for i, s in enumerate(skills):
             name = s.get("name") if isinstance(s, dict) else getattr(s, "name", "")
             key = s.get("key") if isinstance(s, dict) else getattr(s, "key", "")
             delay = s.get("delay") if isinstance(s, dict) else getattr(s, "delay", "")
@@ -34,63 +73,129 @@ class SkillListPanel(QWidget):
             if k in seen:
                 continue
             seen.add(k)
-            filtered.append(s)
+            self.skills.append(s)
+            self.indices.append(i)
+            self.delays.append(int(delay or 0))
+
+        # 技能序号可能已变化，旧状态作废（引擎重建评估器后会重新推送全部状态）
+        self.states = {}
+        if not any(s is self._selected for s in self.skills):
+            self._selected = None
+        self._relayout()
+
+    # --- 选中 / 状态 ---
+    def get_selected_skill_index(self):
+        for s, i in zip(self.skills, self.indices):
+            if s is self._selected:
+                return i
+        return None
 
-        for i, skill in enumerate(filtered):
-            card = SkillCard(skill)
-            # 传入 select_callback，以便卡片点击时通知 MainWindow
-            card.bind_to(bind_callback, delete_callback, select_callback)
-            delay_ms = skill.get("delay") if isinstance(skill, dict) else getattr(skill, "delay", 0)
-            self.items.append((card, int(delay_ms or 0)))
+    def update_states(self, deltas):
+        """应用引擎推送的状态变化 [(技能序号, SkillState, 时刻)]，只更新可见卡片的状态指示点"""
+        for i, state, _ in deltas:
+            self.states[i] = state
+            card = self.cards_by_index.get(i)
+            if card is not None:
+                card.set_state(state)
 
-        self._reflow()
+    def clear_states(self):
+        self.states = {}
+        for card in self.cards_by_index.values():
+            card.set_state(None)
 
-        # 清除任何之前的视觉选中（由 MainWindow 控制）
-        # 这里不持有 selected 状态，MainWindow 通过回调管理
+    def _on_card_selected(self, skill, card):
+        self._selected = skill
+        for c in self.cards_by_index.values():
+            want = c.skill is skill
+            if c._selected != want:
+                c.set_selected(want)
+        if self._select_cb:
+            self._select_cb(skill, card)
 
+    def _on_edit(self, skill):
+        if self._edit_cb:
+            self._edit_cb(skill)
+
+    def _on_delete(self, skill):
+        if self._delete_cb:
+            self._delete_cb(skill)
+
+    # --- 布局 ---
     def resizeEvent(self, e):
         super().resizeEvent(e)
-        self._reflow()
-
-    def _reflow(self):
-        if not self.items:
-            return
-        available = max(1, self.width() - 24)
-        card_w = 170         # 减小卡片宽度以便多列换行更好看
-        arrow_w = 56
-        unit_w = card_w + arrow_w
-        cols = max(1, available // unit_w)
-
-        # 清空再布局
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            w = item.widget()
-            if w:
-                w.setParent(None)
-
-        row = 0
-        col_slot = 0
-        for idx, (card, delay_ms) in enumerate(self.items):
-            col = col_slot * 2
-            self.grid.addWidget(card, row, col)
-            if idx < len(self.items) - 1:
-                w = QWidget()
-                from PySide6.QtWidgets import QVBoxLayout
-                l = QVBoxLayout(w)
-                l.setContentsMargins(0, 0, 0, 0)
-                l.setSpacing(2)
-                lbl_delay = QLabel(f"{delay_ms} 毫秒")  # ms -> 毫秒
-                lbl_delay.setAlignment(Qt.AlignHCenter | Qt.AlignBottom)
-                lbl_delay.setStyleSheet("color:#9AA0A6; font-size:11px;")
-                lbl_arrow = QLabel("➜")
-                lbl_arrow.setAlignment(Qt.AlignCenter)
-                lbl_arrow.setStyleSheet("color:#8E8E93; font-size:18px;")
-                l.addWidget(lbl_delay)
-                l.addWidget(lbl_arrow)
-                w.setFixedWidth(arrow_w)
-                w.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-                self.grid.addWidget(w, row, col + 1)
-            col_slot += 1
-            if col_slot >= cols:
-                row += 1
-                col_slot = 0
+        self._relayout()
+
+    def scrollContentsBy(self, dx, dy):
+        self._layout_visible()
+
+    def _new_card(self):
+        card = SkillCard(None, self.viewport())
+        card.bind_to(self._on_edit, self._on_delete, self._on_card_selected)
+        return card
+
+    def _relayout(self):
+        """按视口宽度计算列数与滚动范围，再摆放可见项"""
+        n = len(self.skills)
+        if n and not self.cards:
+            self.cards.append(self._new_card())
+        if self.cards and not self._card_h:
+            self._card_h = self.cards[0].sizeHint().height()
+        unit_w = self.CARD_W + self.ARROW_W
+        self._cols = max(1, (self.viewport().width() - 2 * self.MARGIN) // unit_w)
+        rows = (n + self._cols - 1) // self._cols
+        row_h = self._card_h + self.SPACING
+        total = 2 * self.MARGIN + rows * row_h - self.SPACING if rows else 0
+        vh = self.viewport().height()
+        sb = self.verticalScrollBar()
+        sb.setRange(0, max(0, total - vh))
+        sb.setPageStep(vh)
+        sb.setSingleStep(max(1, row_h // 2))
+        self._layout_visible()
+
+    def _layout_visible(self):
+        """把可见行的技能绑定到池中的卡片并移动到位，其余池内卡片隐藏"""
+        n, cols = len(self.skills), self._cols
+        row_h = self._card_h + self.SPACING
+        top = self.verticalScrollBar().value()
+        start = end = 0
+        if n and row_h > 0:
+            first = max(0, (top - self.MARGIN) // row_h)
+            last = (top + self.viewport().height() - self.MARGIN) // row_h
+            start, end = first * cols, min(n, (last + 1) * cols)
+        count = max(0, end - start)
+        while len(self.cards) < count:
+            self.cards.append(self._new_card())
+        while len(self.arrows) < count:
+            self.arrows.append(DelayArrow(self.viewport()))
+
+        self.cards_by_index = {}
+        unit_w = self.CARD_W + self.ARROW_W
+        for slot, item in enumerate(range(start, end)):
+            row, col = divmod(item, cols)
+            x = self.MARGIN + col * unit_w
+            y = self.MARGIN + row * row_h - top
+            skill, index = self.skills[item], self.indices[item]
+
+            card = self.cards[slot]
+            # 技能可能被原地修改（编辑器 setattr），按显示的值而不是对象判断是否需要更新文字
+            card.set_skill(skill)
+            card.set_state(self.states.get(index))
+            selected = skill is self._selected
+            if card._selected != selected:
+                card.set_selected(selected)
+            card.setGeometry(x, y, self.CARD_W, self._card_h)
+            card.show()
+            self.cards_by_index[index] = card
+
+            arrow = self.arrows[slot]
+            if item < n - 1:
+                arrow.set_delay(self.delays[item])
+                arrow.setGeometry(x + self.CARD_W, y, self.ARROW_W, self._card_h)
+                arrow.show()
+            else:
+                arrow.hide()
+
+        for card in self.cards[count:]:
+            card.hide()
+        for arrow in self.arrows[count:]:
+            arrow.hide()
@@ -1,8 +1,28 @@
 # -*- coding: utf-8 -*-
-from PySide6 import QtWidgets
+import threading
+from collections import deque
+
+from PySide6 import QtCore, QtWidgets
+
+# 批量刷新间隔（毫秒）
+FLUSH_MS = 100
+# 文档最多保留的行数，超出后丢弃最早的行
+MAX_BLOCKS = 5000
+# 两次刷新之间最多缓冲的行数，超出后丢弃最早的行（日志突发时保护 UI 线程）
+MAX_PENDING = 500
+
 
 class LogPanel(QtWidgets.QPlainTextEdit):
-    def __init__(self):
+    """
+    日志面板
+    - log() 只写入缓冲区，可在任意线程调用；定时器在 UI 线程把缓冲的行一次性插入
+    - 定时器为单次触发，只在缓冲由空变为非空时启动，没有日志时不唤醒
+    - 连续重复的行合并为一行并标注次数；缓冲超过 MAX_PENDING 时丢弃最早的行
+    - 文档按 MAX_BLOCKS 行环形保留，丢弃 / 合并的行数在刷新时附一行提示
+    """
+    thread_safe = True
+
+    def __init__(self, max_blocks=MAX_BLOCKS, flush_ms=FLUSH_MS, max_pending=MAX_PENDING):
         super().__init__()
         self.setReadOnly(True)
         self.setPlaceholderText("系统日志")
@@ -13,6 +33,50 @@ class LogPanel(QtWidgets.QPlainTextEdit):
             border-radius:10px;
         }
         """)
+        self.setMaximumBlockCount(max_blocks)
+
+        self._lock = threading.Lock()
+        self._pending = deque()      # [文本, 次数]
+        self._max_pending = max_pending
+        self._dropped = 0
+        self._collapsed = 0
+        # 累计值，供调试查看
+        self.dropped_total = 0
+        self.collapsed_total = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_ms)
+        self._timer.timeout.connect(self.flush)
 
     def log(self, text):
-        self.appendPlainText(text)
+        text = str(text)
+        with self._lock:
+            if self._pending and self._pending[-1][0] == text:
+                self._pending[-1][1] += 1
+                self._collapsed += 1
+                return
+            if len(self._pending) >= self._max_pending:
+                _, n = self._pending.popleft()
+                self._dropped += n
+            arm = not self._pending
+            self._pending.append([text, 1])
+        if arm:
+            # 定时器属于 UI 线程，经队列连接启动（可能在其他线程调用）
+            QtCore.QMetaObject.invokeMethod(self._timer, "start", QtCore.Qt.QueuedConnection)
+
+    def flush(self):
+        """把缓冲的行一次插入文档（UI 线程，由单次定时器调用）"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, deque()
+            dropped, collapsed = self._dropped, self._collapsed
+            self._dropped = self._collapsed = 0
+
+        lines = [t if n == 1 else f"{t}  (×{n})" for t, n in pending]
+        if dropped or collapsed:
+            self.dropped_total += dropped
+            self.collapsed_total += collapsed
+            lines.append(f"[日志] 突发：丢弃 {dropped} 行，合并重复 {collapsed} 行")
+        self.appendPlainText("\n".join(lines))
@@ -67,70 +67,105 @@ class ModernButton(QtWidgets.QPushButton):
         super().leaveEvent(event)
 
 
-class CoordMonitor(QtWidgets.QScrollArea):
+class CoordModel(QtCore.QAbstractListModel):
+    """校准数据模型：每行一个按键 (key, cx, cy)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role == QtCore.Qt.DisplayRole:
+            return self.rows[index.row()]
+        return None
+
+    def set_coords(self, global_coords):
+        """按键集合不变时只对数值变化的行发 dataChanged，增删按键才重置模型"""
+        # 排序：1-9, 0, F1-F3
+        keys = sorted(global_coords.keys(), key=lambda k: (len(k), k))
+        rows = [(k, global_coords[k].get('cx', 0), global_coords[k].get('cy', 0)) for k in keys]
+        if [r[0] for r in rows] != [r[0] for r in self.rows]:
+            self.beginResetModel()
+            self.rows = rows
+            self.endResetModel()
+            return
+        for i, (old, new) in enumerate(zip(self.rows, rows)):
+            if old != new:
+                self.rows[i] = new
+                idx = self.index(i)
+                self.dataChanged.emit(idx, idx)
+
+
+class CoordDelegate(QtWidgets.QStyledItemDelegate):
+    """绘制一行：圆角底色 + [Key] + POS: x, y，不为每行创建控件"""
+    ROW_H = 32
+    SPACING = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.font_key = QtGui.QFont("Consolas")
+        self.font_key.setBold(True)
+        self.font_pos = QtGui.QFont()
+        self.font_pos.setPixelSize(11)
+        self.bg = QtGui.QColor("#252525")
+        self.color_key = QtGui.QColor("#0A84FF")
+        self.color_pos = QtGui.QColor("#AAAAAA")
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(option.rect.width(), self.ROW_H + self.SPACING)
+
+    def paint(self, painter, option, index):
+        key, cx, cy = index.data()
+        r = option.rect.adjusted(0, 0, 0, -self.SPACING)
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(self.bg)
+        painter.drawRoundedRect(r, 6, 6)
+        painter.setFont(self.font_key)
+        painter.setPen(self.color_key)
+        painter.drawText(r.adjusted(10, 0, 0, 0), QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, f"[{key}]")
+        painter.setFont(self.font_pos)
+        painter.setPen(self.color_pos)
+        painter.drawText(r.adjusted(56, 0, -10, 0), QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, f"POS: {cx}, {cy}")
+        painter.restore()
+
+
+class CoordMonitor(QtWidgets.QListView):
     """
     左侧参数监视器：
-    显示 Key | (x, y) | Color Block
+    显示 Key | (x, y)
+    模型 + 委托绘制，只绘制可见行；坐标更新只重绘变化的行
     """
     def __init__(self):
         super().__init__()
-        self.setWidgetResizable(True)
         self.setStyleSheet("""
-            QScrollArea { border: none; background: transparent; }
+            QListView { border: none; background: transparent; }
             QScrollBar:vertical { width: 4px; background: transparent; }
             QScrollBar::handle:vertical { background: #555; border-radius: 2px; }
         """)
-        
-        self.container = QtWidgets.QWidget()
-        self.container.setStyleSheet("background: transparent;")
-        self.layout = QtWidgets.QVBoxLayout(self.container)
-        self.layout.setContentsMargins(0,0,0,0)
-        self.layout.setSpacing(4)
-        self.layout.addStretch() # 弹簧垫底
-        
-        self.setWidget(self.container)
-        self.rows = {}
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.coord_model = CoordModel(self)
+        self.setModel(self.coord_model)
+        self.setItemDelegate(CoordDelegate(self))
 
     def update_data(self, global_coords):
-        # 清空旧数据（保留最后的弹簧）
-        while self.layout.count() > 1:
-            item = self.layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-            
-        self.rows.clear()
-        
-        if not global_coords:
-            lbl = QtWidgets.QLabel("暂无校准数据")
-            lbl.setStyleSheet("color: #666; font-style: italic; margin-top: 10px;")
-            lbl.setAlignment(QtCore.Qt.AlignCenter)
-            self.layout.insertWidget(0, lbl)
-            return
+        self.coord_model.set_coords(global_coords or {})
 
-        # 排序：1-9, 0, F1-F3
-        keys = sorted(global_coords.keys(), key=lambda k: (len(k), k))
-        
-        for k in keys:
-            data = global_coords[k]
-            row = QtWidgets.QFrame()
-            row.setStyleSheet("background-color: #252525; border-radius: 6px;")
-            row.setFixedHeight(32)
-            
-            rl = QtWidgets.QHBoxLayout(row)
-            rl.setContentsMargins(10, 0, 10, 0)
-            
-            # Key
-            lbl_key = QtWidgets.QLabel(f"[{k}]")
-            lbl_key.setFixedWidth(40)
-            lbl_key.setStyleSheet("color: #0A84FF; font-weight: bold; font-family: Consolas;")
-            
-            # Coords
-            cx, cy = data.get('cx', 0), data.get('cy', 0)
-            lbl_pos = QtWidgets.QLabel(f"POS: {cx}, {cy}")
-            lbl_pos.setStyleSheet("color: #AAAAAA; font-size: 11px;")
-            
-            rl.addWidget(lbl_key)
-            rl.addWidget(lbl_pos)
-            rl.addStretch()
-            
-            self.layout.insertWidget(self.layout.count()-1, row)
\ No newline at end of file
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.coord_model.rows:
+            painter = QtGui.QPainter(self.viewport())
+            font = painter.font()
+            font.setItalic(True)
+            painter.setFont(font)
+            painter.setPen(QtGui.QColor("#666"))
+            painter.drawText(self.viewport().rect().adjusted(0, 10, 0, 0),
+                             QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop, "暂无校准数据")
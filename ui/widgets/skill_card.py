@@ -1,7 +1,18 @@
 ﻿# -*- coding: utf-8 -*-
 from PySide6 import QtWidgets, QtCore
 from ui.constants import *
+from PySide6.QtWidgets import QLabel, QPushButton
 from ui.constants import BTN_EDIT
+from core.models.skill import SkillState
+
+# 状态指示点样式：预先生成，更新状态时只替换指示点自身的样式
+_STATE_DOT = "color:{}; font-size:12px; background: transparent;"
+STATE_STYLES = {
+    SkillState.READY: _STATE_DOT.format(COLOR_READY),
+    SkillState.COOLDOWN: _STATE_DOT.format("#FFD60A"),
+    SkillState.FAIL: _STATE_DOT.format(COLOR_FAIL),
+}
+STATE_IDLE_STYLE = _STATE_DOT.format("#3A3A3C")
 
 class SkillCard(QtWidgets.QFrame):
     clicked = QtCore.Signal(object)
@@ -31,12 +42,21 @@ class SkillCard(QtWidgets.QFrame):
         v_main.setContentsMargins(8, 6, 8, 6)
         v_main.setSpacing(6)
 
-        # 第一行：技能名（放大）
+        # 第一行：技能名（放大）+ 运行状态指示点
+        head = QtWidgets.QHBoxLayout()
+        head.setContentsMargins(0, 0, 0, 0)
+        head.setSpacing(6)
         name = self.skill.get("name") if isinstance(self.skill, dict) else getattr(self.skill, "name", "")
         self.lbl_name = QtWidgets.QLabel(str(name))
         self.lbl_name.setObjectName("skillName")
         self.lbl_name.setStyleSheet("font-size:16px; font-weight:700; color:#FFFFFF;")
-        v_main.addWidget(self.lbl_name)
+        head.addWidget(self.lbl_name, 1)
+
+        self._state = None
+        self.lbl_state = QtWidgets.QLabel("●")
+        self.lbl_state.setStyleSheet(STATE_IDLE_STYLE)
+        head.addWidget(self.lbl_state, 0, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        v_main.addLayout(head)
 
         # 第二行：按键 + 按钮
         row = QtWidgets.QWidget()
@@ -78,6 +98,9 @@ class SkillCard(QtWidgets.QFrame):
                 pass
             ancestor = getattr(ancestor, "parent", lambda: None)()
 
+        # 当前显示的 (技能名, 按键)，重新绑定时按值比较
+        self._shown = (str(name), str(key))
+
         h.addWidget(self.lbl_key, 1)
         h.addWidget(self.btn_edit, 0, QtCore.Qt.AlignRight)
         h.addWidget(self.btn_delete, 0, QtCore.Qt.AlignRight)
@@ -87,6 +110,21 @@ class SkillCard(QtWidgets.QFrame):
         self._selected = False
         self._select_cb = None
 
+    def set_skill(self, skill):
+        """
+        绑定技能（列表复用卡片、技能被原地修改后调用）
+        按显示的值比较，技能名 / 按键不变时不更新文字
+        """
+        self.skill = skill
+        name = skill.get("name") if isinstance(skill, dict) else getattr(skill, "name", "")
+        key = skill.get("key") if isinstance(skill, dict) else getattr(skill, "key", "")
+        shown = (str(name), str(key))
+        if shown == self._shown:
+            return
+        self._shown = shown
+        self.lbl_name.setText(shown[0])
+        self.lbl_key.setText(f"按键：{shown[1]}")
+
     def bind_to(self, edit_callback=None, delete_callback=None, select_callback=None):
         # 绑定编辑、删除、选择回调
         if edit_callback:
@@ -106,6 +144,14 @@ class SkillCard(QtWidgets.QFrame):
         # 由外部通过 set_selected 控制多个卡的互斥选中
         super().mousePressEvent(event)
 
+    def set_state(self, state):
+        """更新运行状态指示点（READY / COOLDOWN / FAIL，None 为未运行），卡片本身不重建、不重设样式"""
+        if state == self._state:
+            return
+        self._state = state
+        self.lbl_state.setStyleSheet(STATE_STYLES.get(state, STATE_IDLE_STYLE))
+        self.lbl_state.setToolTip(state.value if state is not None else "")
+
     def set_selected(self, yes: bool):
         self._selected = bool(yes)
         if self._selected: